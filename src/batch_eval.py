@@ -0,0 +1,251 @@
+"""
+Batch evaluation of Checkers positions with NumPy.
+
+BatchEvaluator scores many positions at once with the features and weights
+of evaluate.py (men, kings, back row, center, advancement and mobility), and
+gives the same scores as evaluate(). Positions are turned into arrays with
+one column per dark square: a 0/1 plane for each of black men, black kings,
+red men and red kings. Every feature is then a handful of array operations
+over the whole batch instead of a Python loop per position: the features
+other than mobility are a single matrix product with a per-square table, and
+mobility looks up the neighbours of every square.
+
+Positions are converted and scored batch_size at a time, which bounds the
+memory used by the arrays. Large batches amortize NumPy's overhead per call;
+see "bench.py eval" for the throughput of different batch sizes.
+
+Examples:
+    1) Score the positions of a list of games, each for the player whose
+    turn it is::
+        evaluator = BatchEvaluator(games[0].dims)
+        scores = evaluator.score([(game.engine, BLACK if game.curr_player == 1
+                                   else RED) for game in games])
+
+    2) Get the feature arrays (one row per position, columns as in
+    FEATURES)::
+        evaluator.features(evaluator.encode(positions))
+
+    3) Get the features of positions stored as bytes, without making an
+    engine for each (see tune.py)::
+        evaluator.features(evaluator.encode_packed(black, red, kings, sides))
+"""
+
+import numpy as np
+
+from bitboard import BitboardEngine, BLACK, RED, bits
+from evaluate import WEIGHTS, eval_masks
+
+# int: Default number of positions converted and scored at once
+BATCH_SIZE = 4096
+
+# list[list[tuple(int, int)]]: Directions of the steps of BLACK and RED men
+# (kings step in both)
+_MAN_DIRS = [[(-1, -1), (-1, 1)], [(1, -1), (1, 1)]]
+
+
+class BatchEvaluator:
+    """
+    Class for scoring batches of positions of one board size
+    """
+
+    def __init__(self, dims, weights=WEIGHTS, batch_size=BATCH_SIZE):
+        """
+        Constructor
+
+        Args:
+            dims (int): Number of rows (and columns) of the board
+            weights (tuple(int)): weight of each feature in FEATURES
+            batch_size (int): positions converted and scored at once
+        """
+        engine = BitboardEngine(dims)
+        self.dims = dims
+        self.weights = np.array(weights, dtype=np.int64)
+        self.batch_size = batch_size
+
+        # list[int]: Bit index of each dark square (one column per square)
+        self.squares = list(bits(engine.valid))
+        self._columns = np.array(self.squares, dtype=np.intp)
+        self._nbytes = (len(engine.coords) + 7) // 8
+
+        # np.ndarray: The features other than mobility are sums over the
+        # squares, so they are a single product of the planes (black men,
+        # black kings, red men, red kings, one after the other) with this
+        # table, which counts black pieces up and red pieces down
+        back, center, advance = eval_masks(dims)
+        n = len(self.squares)
+        self._linear = np.zeros((4, n, 5), dtype=np.float32)
+        for i, sq in enumerate(self.squares):
+            for side in (BLACK, RED):
+                sign = 1 if side == BLACK else -1
+                men = self._linear[2 * side, i]
+                kings = self._linear[2 * side + 1, i]
+                men[0] = kings[1] = sign
+                men[2] = sign * (back[side] >> sq & 1)
+                men[3] = kings[3] = sign * (center >> sq & 1)
+                for mask, rows in advance[side]:
+                    if mask >> sq & 1:
+                        men[4] = sign * rows
+        self._linear = self._linear.reshape(4 * n, 5)
+
+        # np.ndarray: Column of the neighbour of each square in the
+        # directions of each side's men, or n if it's off the board (an
+        # extra column that is never empty)
+        column = {sq: i for i, sq in enumerate(self.squares)}
+        self._neighbours = np.full((2, 2, n), n, dtype=np.intp)
+        for i, sq in enumerate(self.squares):
+            r, c = engine.coords[sq]
+            for side in (BLACK, RED):
+                for j, (dr, dc) in enumerate(_MAN_DIRS[side]):
+                    if 0 <= r + dr < dims and 0 <= c + dc < dims:
+                        self._neighbours[side, j, i] = column[
+                            engine.square(r + dr, c + dc)]
+
+
+    #
+    #PRIVATE METHODS
+    #
+    def _pack(self, masks):
+        """
+        Packs masks into an array of little-endian bytes
+
+        Args:
+            masks (Sequence[int]): masks of squares, by bit index
+
+        Returns:
+            Array of shape (len(masks), bytes per mask) (np.ndarray)
+        """
+        nbytes = self._nbytes
+        data = b"".join(mask.to_bytes(nbytes, "little") for mask in masks)
+        return np.frombuffer(data, dtype=np.uint8).reshape(len(masks), nbytes)
+
+
+    def _planes(self, packed):
+        """
+        Unpacks masks into 0/1 arrays with one column per dark square
+
+        Args:
+            packed (np.ndarray): masks as returned by _pack()
+
+        Returns:
+            Array of shape (len(packed), number of dark squares) (np.ndarray)
+        """
+        unpacked = np.unpackbits(packed, axis=1, bitorder="little")
+        return unpacked[:, self._columns].astype(np.float32)
+
+
+    def _empty_neighbours(self, empty, side):
+        """
+        Counts the empty neighbours of every square in the directions of a
+        side's men
+
+        Args:
+            empty (np.ndarray): 0/1 array of the empty squares, with an
+            extra column of zeros for off-board neighbours
+            side (int): BLACK or RED, whose men's directions to use
+
+        Returns:
+            Array of the counts, one column per dark square (np.ndarray)
+        """
+        first, second = self._neighbours[side]
+        return empty[:, first] + empty[:, second]
+
+
+    #
+    #PUBLIC METHODS
+    #
+    def encode(self, positions):
+        """
+        Turns positions into arrays
+
+        Args:
+            positions (Sequence[tuple(BitboardEngine, int)]): engines with
+            the positions, and the side to score each position for
+
+        Returns:
+            The black men, black kings, red men and red kings planes, in an
+            array of shape (len(positions), 4, number of dark squares), and
+            the sides, in an array of shape (len(positions),)
+            (tuple(np.ndarray, np.ndarray))
+        """
+        return self.encode_packed(
+            self._pack([engine.pieces[BLACK] for engine, _ in positions]),
+            self._pack([engine.pieces[RED] for engine, _ in positions]),
+            self._pack([engine.kings for engine, _ in positions]),
+            [side for _, side in positions])
+
+
+    def encode_packed(self, black, red, kings, sides):
+        """
+        Turns positions given as packed masks (as in a record file, see
+        records.py) into arrays
+
+        Args:
+            black (np.ndarray): black pieces masks, as little-endian bytes,
+            one row per position
+            red (np.ndarray): red pieces masks, in the same way
+            kings (np.ndarray): kings masks, in the same way
+            sides (Sequence[int]): the side to score each position for
+
+        Returns:
+            The planes and sides, as encode() returns them
+            (tuple(np.ndarray, np.ndarray))
+        """
+        black = self._planes(black)
+        red = self._planes(red)
+        kings = self._planes(kings)
+        planes = np.stack([black - black * kings, black * kings,
+                           red - red * kings, red * kings], axis=1)
+        return planes, np.asarray(sides, dtype=np.int64)
+
+
+    def features(self, encoded):
+        """
+        Gets the features of encoded positions, from the point of view of the
+        side each one is scored for (as evaluate.features() does)
+
+        Args:
+            encoded (tuple(np.ndarray, np.ndarray)): planes and sides
+            returned by encode()
+
+        Returns:
+            Array of shape (number of positions, len(FEATURES)) (np.ndarray)
+        """
+        planes, sides = encoded
+        count = len(planes)
+        black_kings = planes[:, 1]
+        red_kings = planes[:, 3]
+        black = planes[:, 0] + black_kings
+        red = planes[:, 2] + red_kings
+        empty = np.concatenate(
+            [1 - black - red, np.zeros((count, 1), dtype=np.float32)], axis=1)
+
+        # Black minus red for each feature
+        linear = planes.reshape(count, -1) @ self._linear
+        up = self._empty_neighbours(empty, BLACK)
+        down = self._empty_neighbours(empty, RED)
+        mobility = ((black - red_kings) * up +
+                    (black_kings - red) * down).sum(axis=1)
+        found = np.concatenate([linear, mobility[:, None]], axis=1)
+        sign = 1 - 2 * sides
+        return np.rint(found).astype(np.int64) * sign[:, None]
+
+
+    def score(self, positions):
+        """
+        Scores positions, batch_size at a time
+
+        Args:
+            positions (Sequence[tuple(BitboardEngine, int)]): engines with
+            the positions, and the side to score each position for
+
+        Returns:
+            The score of each position, positive if the side is ahead (as
+            evaluate.evaluate() gives) (np.ndarray)
+        """
+        scores = []
+        for start in range(0, len(positions), self.batch_size):
+            batch = positions[start:start + self.batch_size]
+            scores.append(self.features(self.encode(batch)) @ self.weights)
+        if not scores:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(scores)
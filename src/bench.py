@@ -0,0 +1,299 @@
+"""
+Benchmarks for the Checkers engine.
+
+Examples:
+    1) Time capture generation in dense 20x20 king endgames::
+        python3 src/bench.py captures
+
+    2) Count the nodes searched at a fixed depth with and without the
+    transposition table and move ordering::
+        python3 src/bench.py nodes --depth 7
+
+    3) Compare the time of fixed-depth searches on 1 and 4 processes::
+        python3 src/bench.py parallel --workers 4
+
+    4) Measure how many positions per second the evaluation scores, one at
+    a time and in NumPy batches::
+        python3 src/bench.py eval --batch-size 256 --batch-size 4096
+"""
+
+import random
+import time
+
+import click
+
+from bitboard import (BitboardEngine, BLACK, RED, KING, bits,
+                      count_captures, flatten_captures)
+from checkers import Checkers
+from evaluate import evaluate
+from search import Search
+from parallel import ParallelSearch
+
+
+def _king_endgame(engine, rng, n_black, band_rows, band_cols):
+    """
+    Sets up a dense king endgame: a band of red kings on every dark square
+    of alternate rows (so that every square between them is a landing
+    square), with black kings scattered on the empty squares around it.
+
+    Args:
+        engine (BitboardEngine): engine to set the position on
+        rng (random.Random): random number generator
+        n_black (int): number of black kings
+        band_rows (int): number of rows covered by the band of red kings
+        band_cols (int): number of columns covered by the band
+
+    Returns None
+    """
+    engine.pieces = [0, 0]
+    engine.kings = 0
+    engine.key = 0
+    top = rng.randrange(0, engine.dims - band_rows)
+    left = rng.randrange(0, engine.dims - band_cols + 1)
+    for r in range(top + 1, top + 1 + band_rows, 2):
+        for c in range(left, left + band_cols):
+            if (r + c) % 2 != 0:
+                engine.add(engine.square(r, c), RED, True)
+    empty = list(bits(engine.empty()))
+    for sq in rng.sample(empty, n_black):
+        engine.add(sq, BLACK, True)
+
+
+def _naive_paths(engine, sq, enemy, empty, captured):
+    """
+    Reference capture DFS that builds every sequence directly, with no
+    memoization (how captures were generated before capture trees)
+
+    Args:
+        engine (BitboardEngine): engine with the position
+        sq (int): bit index of the current square
+        enemy (int): mask of the opponent's pieces
+        empty (int): mask of the squares that can be landed on
+        captured (int): mask of the pieces jumped so far
+
+    Returns:
+        List of capture sequences (list(list(int)))
+    """
+    paths = []
+    for over, land in engine.jumps[KING][sq]:
+        if (enemy & ~captured) >> over & 1 and empty >> land & 1:
+            rest = _naive_paths(engine, land, enemy, empty,
+                                captured | (1 << over))
+            if rest:
+                for path in rest:
+                    paths.append([land] + path)
+            else:
+                paths.append([land])
+    return paths
+
+
+def _random_positions(size, n, plies, rng):
+    """
+    Plays random games to get positions to search
+
+    Args:
+        size (int): board size (as in Checkers)
+        n (int): number of positions
+        plies (int): random moves played from the start of each game
+        rng (random.Random): random number generator
+
+    Returns:
+        List of engines with the positions and the side to move in each
+        (list(tuple(BitboardEngine, int)))
+    """
+    positions = []
+    while len(positions) < n:
+        engine = Checkers(size).engine.copy()
+        side = BLACK
+        for _ in range(plies):
+            moves = engine.legal_moves(side)
+            if not moves:
+                break
+            engine.make(rng.choice(moves))
+            side = 1 - side
+        if engine.has_moves(side):
+            positions.append((engine, side))
+    return positions
+
+
+@click.group(name="checkers-bench")
+def cmd():
+    pass
+
+
+@cmd.command(name="captures")
+@click.option('-n', '--positions', type=click.INT, default=20)
+@click.option('--size', type=click.INT, default=9)
+@click.option('--black-kings', type=click.INT, default=6)
+@click.option('--band-rows', type=click.INT, default=9)
+@click.option('--band-cols', type=click.INT, default=10)
+@click.option('--seed', type=click.INT, default=0)
+def captures(positions, size, black_kings, band_rows, band_cols, seed):
+    """
+    Compares building capture trees with listing every capture sequence,
+    on dense king endgames
+    """
+    rng = random.Random(seed)
+    engine = BitboardEngine(size * 2 + 2)
+    tree_time = count_time = flat_time = naive_time = 0
+    sequences = nodes = 0
+
+    for _ in range(positions):
+        _king_endgame(engine, rng, black_kings, band_rows, band_cols)
+        enemy = engine.pieces[RED]
+        empty = engine.empty()
+        movers = list(bits(engine.jumpers(BLACK)))
+
+        start = time.perf_counter()
+        memo = {}
+        trees = [engine.capture_tree(sq, memo) for sq in movers]
+        tree_time += time.perf_counter() - start
+        nodes += len(memo)
+
+        start = time.perf_counter()
+        sequences += sum(count_captures(tree) for tree in trees)
+        count_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        flat = [flatten_captures(tree) for tree in trees]
+        flat_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        naive = [_naive_paths(engine, sq, enemy, empty, 0) for sq in movers]
+        naive_time += time.perf_counter() - start
+        assert naive == flat
+
+    print(f"{positions} positions, {sequences} capture sequences, "
+          f"{nodes} tree nodes")
+    for label, seconds in [("Capture trees", tree_time),
+                           ("Trees + count", tree_time + count_time),
+                           ("Trees + flatten", tree_time + flat_time),
+                           ("Sequence-by-sequence DFS", naive_time)]:
+        print(f"{label + ':':<26}{1000 * seconds / positions:8.3f} "
+              "ms/position")
+
+
+@cmd.command(name="nodes")
+@click.option('-n', '--positions', type=click.INT, default=10)
+@click.option('--size', type=click.INT, default=3)
+@click.option('--depth', type=click.INT, default=6)
+@click.option('--plies', type=click.INT, default=12)
+@click.option('--seed', type=click.INT, default=0)
+def nodes(positions, size, depth, plies, seed):
+    """
+    Compares the nodes searched at a fixed depth with and without the
+    transposition table and move ordering
+    """
+    rng = random.Random(seed)
+    games = _random_positions(size, positions, plies, rng)
+    configs = [("Plain alpha-beta", 0, False),
+               ("Move ordering", 0, True),
+               ("Transposition table", 16, False),
+               ("Table + ordering", 16, True)]
+
+    print(f"{positions} positions, searched to depth {depth}")
+    plain_scores = None
+    for label, hash_mb, ordering in configs:
+        total = quiescence = 0
+        seconds = 0
+        scores = []
+        for engine, side in games:
+            search = Search(max_depth=depth, hash_mb=hash_mb,
+                            ordering=ordering)
+            start = time.perf_counter()
+            search.best_move(engine, side)
+            seconds += time.perf_counter() - start
+            total += search.nodes
+            quiescence += search.qnodes
+            scores.append(search.score)
+        # Ordering alone never changes the result of an alpha-beta search
+        if plain_scores is None:
+            plain_scores = scores
+        elif not hash_mb:
+            assert scores == plain_scores
+        print(f"{label + ':':<22}{total:10} nodes ({quiescence:8} in "
+              f"quiescence) {1000 * seconds / positions:10.1f} ms/position")
+
+
+@cmd.command(name="parallel")
+@click.option('-n', '--positions', type=click.INT, default=10)
+@click.option('--size', type=click.INT, default=3)
+@click.option('--depth', type=click.INT, default=8)
+@click.option('--plies', type=click.INT, default=12)
+@click.option('--workers', type=click.INT, default=4)
+@click.option('--seed', type=click.INT, default=0)
+def parallel(positions, size, depth, plies, workers, seed):
+    """
+    Compares fixed-depth searches on one process and on several, and
+    reports the speedup
+    """
+    rng = random.Random(seed)
+    games = _random_positions(size, positions, plies, rng)
+
+    # Start the worker processes before timing anything
+    ParallelSearch(workers, max_depth=1).best_move(*games[0])
+
+    print(f"{positions} positions, searched to depth {depth}")
+    times = []
+    found = []
+    for count in (1, workers):
+        total = 0
+        seconds = 0
+        moves = []
+        for engine, side in games:
+            search = ParallelSearch(count, max_depth=depth)
+            start = time.perf_counter()
+            moves.append(search.best_move(engine, side))
+            seconds += time.perf_counter() - start
+            total += search.nodes
+        times.append(seconds)
+        found.append(moves)
+        print(f"{count:2} worker(s):{total:10} nodes "
+              f"{1000 * seconds / positions:10.1f} ms/position")
+    same = sum(a == b for a, b in zip(*found))
+    print(f"Speedup: {times[0] / times[1]:.2f}x, same move in {same} of "
+          f"{positions} positions")
+
+
+@cmd.command(name="eval")
+@click.option('-n', '--positions', type=click.INT, default=20000)
+@click.option('--size', type=click.INT, default=3)
+@click.option('--plies', type=click.INT, default=20)
+@click.option('--batch-size', type=click.INT, multiple=True,
+              default=[64, 1024, 4096])
+@click.option('--seed', type=click.INT, default=0)
+def evaluation(positions, size, plies, batch_size, seed):
+    """
+    Measures the throughput of the evaluation, one position at a time and in
+    NumPy batches
+    """
+    # NumPy is only needed for this benchmark
+    from batch_eval import BatchEvaluator
+
+    rng = random.Random(seed)
+    games = _random_positions(size, min(positions, 1000), plies, rng)
+    games = [games[i % len(games)] for i in range(positions)]
+    print(f"{positions} positions on a {2 * size + 2}x{2 * size + 2} board")
+
+    start = time.perf_counter()
+    expected = [evaluate(engine, side) for engine, side in games]
+    seconds = time.perf_counter() - start
+    print(f"{'One at a time:':<22}{positions / seconds:12.0f} positions/s")
+
+    for count in batch_size:
+        evaluator = BatchEvaluator(2 * size + 2, batch_size=count)
+        start = time.perf_counter()
+        scores = evaluator.score(games)
+        seconds = time.perf_counter() - start
+        assert scores.tolist() == expected
+        encoded = evaluator.encode(games[:count])
+        start = time.perf_counter()
+        evaluator.features(encoded) @ evaluator.weights
+        scoring = time.perf_counter() - start
+        print(f"{f'Batches of {count}:':<22}{positions / seconds:12.0f} "
+              f"positions/s ({len(encoded[1]) / scoring:12.0f} without "
+              f"converting)")
+
+
+if __name__ == "__main__":
+    cmd()
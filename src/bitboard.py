@@ -0,0 +1,896 @@
+"""
+Bitboard move generation for Checkers.
+
+Only the dark squares of a Checkers board can ever hold a piece, so the
+engine stores a position as three Python ints (the pieces of each side and
+the kings) with one bit per dark square.
+
+Squares are numbered with the "ghost square" layout, generalised to any
+board with an even number of rows: the dark square (r, c) is stored at bit
+(r * (dims + 1) + c) // 2. With that numbering every diagonal step is a
+constant shift (dims // 2 or dims // 2 + 1 bits), and stepping off the left
+or right edge of the board always lands on a "ghost" bit that is never a
+valid square, so the moves of every piece on the board can be computed
+at once with a few shifts and masks.
+
+Examples:
+    1) Create an engine for an 8x8 board and place two pieces::
+        e = BitboardEngine(8)
+        e.add(e.square(5, 0), BLACK)
+        e.add(e.square(4, 1), RED)
+
+    2) Find which black pieces can capture::
+        e.jumpers(BLACK)
+
+    3) Get all the move sequences of the piece at (5, 0)::
+        e.piece_paths(e.square(5, 0))
+
+    4) Get its captures as a tree, and count or list them::
+        tree = e.capture_tree(e.square(5, 0))
+        count_captures(tree)
+        flatten_captures(tree)
+
+    5) Play an encoded move on the engine alone and take it back (e.g. in a
+    search, where the Pieces of a Checkers game don't need to move)::
+        move = e.legal_moves(BLACK)[0]
+        record = e.make(move)
+        e.unmake(record)
+"""
+
+import copy
+import random
+
+# int: Side identifiers used by the engine
+BLACK = 0
+RED = 1
+
+# int: Index of the king tables in the step/jump tables (BLACK and RED index
+# the tables of non-king pieces of that side)
+KING = 2
+
+# int: Number of bits used for each square of an encoded move
+SQUARE_BITS = 16
+SQUARE_MASK = (1 << SQUARE_BITS) - 1
+
+# dict[int, tuple(list[tuple(int, int, int, int)], int)]: Zobrist keys for
+# each board dimension, shared by every engine of that size
+_ZOBRIST = {}
+
+# dict[int, tuple(list, list)]: Step and jump tables for each board
+# dimension, shared by every engine of that size
+_TABLES = {}
+
+
+def _shift(mask, n):
+    """
+    Shifts a mask n bits towards the higher bits (or lower, if n < 0)
+
+    Args:
+        mask (int): bit mask to shift
+        n (int): number of bits
+
+    Returns:
+        The shifted mask (int)
+    """
+    if n >= 0:
+        return mask << n
+    return mask >> -n
+
+
+def bits(mask):
+    """
+    Iterates over the indices of the set bits of a mask, lowest first
+
+    Args:
+        mask (int): bit mask
+
+    Yields:
+        Index of each set bit (int)
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def encode_move(frm, to, captured=0):
+    """
+    Packs a move into a single int: the square the piece starts on, the
+    square it ends on and the mask of the pieces it captures. Two capture
+    sequences with the same start, end and captured pieces leave the board
+    in the same state, so they share an encoding.
+
+    Args:
+        frm (int): bit index of the square the piece starts on
+        to (int): bit index of the square the piece ends on
+        captured (int): mask of the captured pieces
+
+    Returns:
+        The encoded move (int)
+    """
+    return frm | (to << SQUARE_BITS) | (captured << (2 * SQUARE_BITS))
+
+
+def decode_move(move):
+    """
+    Unpacks a move encoded with encode_move()
+
+    Args:
+        move (int): the encoded move
+
+    Returns:
+        Tuple of the start square, end square and captured pieces mask
+        (tuple(int, int, int))
+    """
+    return (move & SQUARE_MASK, (move >> SQUARE_BITS) & SQUARE_MASK,
+            move >> (2 * SQUARE_BITS))
+
+
+def flatten_captures(node):
+    """
+    Lists every capture sequence of a capture tree (see
+    BitboardEngine.capture_tree())
+
+    Args:
+        node (tuple): node of the capture tree
+
+    Returns:
+        List of sequences of the squares landed on, as bit indices
+        (list(list(int)))
+    """
+    paths = []
+    for _, land, child in node:
+        if child:
+            for path in flatten_captures(child):
+                paths.append([land] + path)
+        else:
+            paths.append([land])
+    return paths
+
+
+def count_captures(node, counts=None):
+    """
+    Counts the capture sequences of a capture tree without listing them.
+    Shared nodes are only counted once.
+
+    Args:
+        node (tuple): node of the capture tree
+        counts (Optional[dict]): counts of the nodes already visited
+
+    Returns:
+        Number of capture sequences (int)
+    """
+    if counts is None:
+        counts = {}
+    if not node:
+        return 0
+    if id(node) not in counts:
+        total = 0
+        for _, _, child in node:
+            total += count_captures(child, counts) if child else 1
+        counts[id(node)] = total
+    return counts[id(node)]
+
+
+def zobrist_keys(dims):
+    """
+    Gets the Zobrist keys for a board size. The keys are pseudo-random but
+    seeded with the board size, so a position always has the same key (even
+    in another process).
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+
+    Returns:
+        Tuple of a list with, for each bit index, the keys of a black piece,
+        black king, red piece and red king on that square, and the key of
+        red being the side to move (tuple(list[tuple(int, int, int, int)],
+        int))
+    """
+    if dims not in _ZOBRIST:
+        rng = random.Random(dims)
+        n_bits = (dims - 1) * (dims + 2) // 2 + 2
+        keys = [tuple(rng.getrandbits(64) for _ in range(4))
+                for _ in range(n_bits)]
+        _ZOBRIST[dims] = (keys, rng.getrandbits(64))
+    return _ZOBRIST[dims]
+
+
+def move_tables(dims):
+    """
+    Gets the step and jump tables for a board size, building them the first
+    time they are needed. For every kind of piece (BLACK or RED non-king
+    piece, or KING) and every dark square, the tables list where the piece
+    can step to, and which squares it can jump over and land on, keeping
+    only the ones that are on the board.
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+
+    Returns:
+        Tuple of the step table and the jump table. steps[kind][sq] is a
+        tuple of destination bit indices, and jumps[kind][sq] is a tuple of
+        (jumped, landing) bit index pairs, both in the order of the
+        directions of the piece (tuple(list[list[tuple(int)]],
+        list[list[tuple(tuple(int, int))]]))
+    """
+    if dims not in _TABLES:
+        n_bits = (dims - 1) * (dims + 2) // 2 + 2
+        directions = [[(-1, -1), (-1, 1)],
+                      [(1, -1), (1, 1)],
+                      [(1, -1), (1, 1), (-1, -1), (-1, 1)]]
+
+        steps = [[()] * n_bits for _ in directions]
+        jumps = [[()] * n_bits for _ in directions]
+        for kind, dirs in enumerate(directions):
+            for r in range(dims):
+                for c in range(dims):
+                    if (r + c) % 2 == 0:
+                        continue
+                    sq = (r * (dims + 1) + c) // 2
+                    kind_steps = []
+                    kind_jumps = []
+                    for dr, dc in dirs:
+                        r1, c1 = r + dr, c + dc
+                        r2, c2 = r1 + dr, c1 + dc
+                        if 0 <= r1 < dims and 0 <= c1 < dims:
+                            kind_steps.append((r1 * (dims + 1) + c1) // 2)
+                        if 0 <= r2 < dims and 0 <= c2 < dims:
+                            kind_jumps.append(((r1 * (dims + 1) + c1) // 2,
+                                               (r2 * (dims + 1) + c2) // 2))
+                    steps[kind][sq] = tuple(kind_steps)
+                    jumps[kind][sq] = tuple(kind_jumps)
+        _TABLES[dims] = (steps, jumps)
+    return _TABLES[dims]
+
+
+class BitboardEngine:
+    """
+    Class for representing a Checkers position as bitboards
+    """
+
+    def __init__(self, dims):
+        """
+        Constructor
+
+        Args:
+            dims (int): Number of rows (and columns) of the board
+        """
+        # int: The dimensions of the board
+        self.dims = dims
+
+        # int: Number of dark squares in each row
+        self.half = dims // 2
+
+        # int: Mask with one bit set for every dark square on the board
+        self.valid = 0
+
+        # list[Optional[tuple(int, int)]]: Board coordinates of each bit
+        # (None for ghost bits)
+        self.coords = [None] * ((dims - 1) * (dims + 2) // 2 + 2)
+        for r in range(dims):
+            for c in range(dims):
+                if (r + c) % 2 != 0:
+                    sq = self.square(r, c)
+                    self.valid |= 1 << sq
+                    self.coords[sq] = (r, c)
+
+        # Bit offsets of the diagonal steps, in the same order as the
+        # directions used by Piece: (1, -1), (1, 1), (-1, -1), (-1, 1)
+        h = self.half
+        # list[list[int]]: Directions a non-king piece of each side can move
+        self.man_dirs = [[-(h + 1), -h], [h, h + 1]]
+        # list[int]: Directions a king can move
+        self.king_dirs = [h, h + 1, -(h + 1), -h]
+
+        # int: Mask of the first and last rows, where pieces are crowned
+        self.crown_rows = 0
+        for c in range(dims):
+            for r in (0, dims - 1):
+                if (r + c) % 2 != 0:
+                    self.crown_rows |= 1 << self.square(r, c)
+
+        # Step and jump tables for this board size (see move_tables())
+        self.steps, self.jumps = move_tables(dims)
+
+        # list[int]: Pieces of each side, indexed by BLACK/RED
+        self.pieces = [0, 0]
+
+        # int: Which of the pieces are kings
+        self.kings = 0
+
+        # int: Incremented on every change to the position, so results
+        # computed from it can be cached until the next change
+        self.version = 0
+
+        # Zobrist keys for this board size (see zobrist_keys())
+        self.zobrist, self.zobrist_side = zobrist_keys(dims)
+
+        # int: Zobrist hash of the pieces on the board, updated on every
+        # change (does not include the side to move)
+        self.key = 0
+
+
+    def copy(self):
+        """
+        Makes an independent copy of the position. The (read-only) tables are
+        shared with the original.
+
+        Args:
+            None
+
+        Returns:
+            The copy (BitboardEngine)
+        """
+        other = copy.copy(self)
+        other.pieces = list(self.pieces)
+        return other
+
+
+    def square(self, r, c):
+        """
+        Gets the bit index of the square at (r, c)
+
+        Args:
+            r (int): row of the square
+            c (int): column of the square
+
+        Returns:
+            Bit index of the square (int)
+        """
+        return (r * (self.dims + 1) + c) // 2
+
+
+    def add(self, sq, side, king=False):
+        """
+        Places a piece on an empty square
+
+        Args:
+            sq (int): bit index of the square
+            side (int): BLACK or RED
+            king (bool): whether the piece is a king
+
+        Returns None
+        """
+        self.version += 1
+        self.pieces[side] |= 1 << sq
+        if king:
+            self.kings |= 1 << sq
+        self.key ^= self.zobrist[sq][2 * side + king]
+
+
+    def remove(self, sq):
+        """
+        Removes whatever piece is on the given square
+
+        Args:
+            sq (int): bit index of the square
+
+        Returns None
+        """
+        self.version += 1
+        kind = self.kind(sq)
+        if kind is not None:
+            self.key ^= self.zobrist[sq][kind]
+        keep = ~(1 << sq)
+        self.pieces[BLACK] &= keep
+        self.pieces[RED] &= keep
+        self.kings &= keep
+
+
+    def relocate(self, frm, to):
+        """
+        Moves the piece on one square to another (empty) square, keeping its
+        side and type. Does not capture or promote.
+
+        Args:
+            frm (int): bit index of the square the piece is on
+            to (int): bit index of the destination square
+
+        Returns None
+        """
+        self.version += 1
+        frm_bit = 1 << frm
+        to_bit = 1 << to
+        kind = self.kind(frm)
+        self.key ^= self.zobrist[frm][kind] ^ self.zobrist[to][kind]
+        side = BLACK if self.pieces[BLACK] & frm_bit else RED
+        self.pieces[side] ^= frm_bit | to_bit
+        if self.kings & frm_bit:
+            self.kings ^= frm_bit | to_bit
+
+
+    def crown(self, sq):
+        """
+        Turns the piece on the given square into a king
+
+        Args:
+            sq (int): bit index of the square
+
+        Returns None
+        """
+        if self.kings >> sq & 1:
+            return
+        self.version += 1
+        kind = self.kind(sq)
+        self.key ^= self.zobrist[sq][kind] ^ self.zobrist[sq][kind + 1]
+        self.kings |= 1 << sq
+
+
+    def kind(self, sq):
+        """
+        Gets what is on a square, as an index into the Zobrist keys
+
+        Args:
+            sq (int): bit index of the square
+
+        Returns:
+            0 for a black piece, 1 for a black king, 2 for a red piece, 3 for
+            a red king, or None if the square is empty (Optional[int])
+        """
+        if self.pieces[BLACK] >> sq & 1:
+            side = BLACK
+        elif self.pieces[RED] >> sq & 1:
+            side = RED
+        else:
+            return None
+        return 2 * side + (self.kings >> sq & 1)
+
+
+    def compute_key(self):
+        """
+        Computes the Zobrist hash of the pieces from scratch. Should always
+        be equal to self.key.
+
+        Returns:
+            Zobrist hash of the pieces on the board (int)
+        """
+        key = 0
+        for sq in bits(self.pieces[BLACK] | self.pieces[RED]):
+            key ^= self.zobrist[sq][self.kind(sq)]
+        return key
+
+
+    def empty(self):
+        """
+        Gets the mask of empty dark squares
+
+        Returns:
+            Mask of empty squares (int)
+        """
+        return self.valid & ~(self.pieces[BLACK] | self.pieces[RED])
+
+
+    def movers(self, side, empty=None):
+        """
+        Gets the pieces of a side that have a non-capturing step available
+
+        Args:
+            side (int): BLACK or RED
+            empty (Optional[int]): mask of empty squares, if already known
+
+        Returns:
+            Mask of the pieces that can step (int)
+        """
+        if empty is None:
+            empty = self.empty()
+        own = self.pieces[side]
+        kings = own & self.kings
+        mask = 0
+        for d in self.man_dirs[side]:
+            mask |= own & _shift(empty, -d)
+        for d in self.man_dirs[1 - side]:
+            mask |= kings & _shift(empty, -d)
+        return mask
+
+
+    def jumpers(self, side, empty=None):
+        """
+        Gets the pieces of a side that have a capture available
+
+        Args:
+            side (int): BLACK or RED
+            empty (Optional[int]): mask of empty squares, if already known
+
+        Returns:
+            Mask of the pieces that can capture (int)
+        """
+        if empty is None:
+            empty = self.empty()
+        enemy = self.pieces[1 - side]
+        own = self.pieces[side]
+        kings = own & self.kings
+        mask = 0
+        for d in self.man_dirs[side]:
+            mask |= own & _shift(enemy & _shift(empty, -d), -d)
+        for d in self.man_dirs[1 - side]:
+            mask |= kings & _shift(enemy & _shift(empty, -d), -d)
+        return mask
+
+
+    def attacks(self, side, empty=None):
+        """
+        Gets the attack map of a side: the enemy pieces it could jump with
+        its next move. The enemy pieces not in the map are safe for a turn,
+        and the enemy's pieces in it are hanging.
+
+        Args:
+            side (int): BLACK or RED
+            empty (Optional[int]): mask of empty squares, if already known
+
+        Returns:
+            Mask of the enemy pieces that can be captured (int)
+        """
+        if empty is None:
+            empty = self.empty()
+        enemy = self.pieces[1 - side]
+        own = self.pieces[side]
+        kings = own & self.kings
+        mask = 0
+        for d in self.man_dirs[side]:
+            mask |= enemy & _shift(own, d) & _shift(empty, -d)
+        for d in self.man_dirs[1 - side]:
+            mask |= enemy & _shift(kings, d) & _shift(empty, -d)
+        return mask
+
+
+    def count_steps(self, side, empty=None):
+        """
+        Counts the non-capturing steps of a side, without generating them
+
+        Args:
+            side (int): BLACK or RED
+            empty (Optional[int]): mask of empty squares, if already known
+
+        Returns:
+            Number of steps (int)
+        """
+        if empty is None:
+            empty = self.empty()
+        own = self.pieces[side]
+        kings = own & self.kings
+        count = 0
+        for d in self.man_dirs[side]:
+            count += (own & _shift(empty, -d)).bit_count()
+        for d in self.man_dirs[1 - side]:
+            count += (kings & _shift(empty, -d)).bit_count()
+        return count
+
+
+    def has_moves(self, side):
+        """
+        Checks whether a side has any legal move, without generating any
+
+        Args:
+            side (int): BLACK or RED
+
+        Returns:
+            Whether the side can move (bool)
+        """
+        empty = self.empty()
+        return bool(self.movers(side, empty) or self.jumpers(side, empty))
+
+
+    def _capture_node(self, sq, jumps, enemy, empty, captured, memo):
+        """
+        Builds the capture tree of a piece standing on a square, having
+        already jumped the pieces in captured. Jumped pieces stay on the
+        board until the sequence is over, so they can neither be jumped
+        twice nor landed on.
+
+        Nodes are memoized by (square, captured pieces), so capture orders
+        that end up in the same state share a node and the tree is really a
+        DAG.
+
+        Args:
+            sq (int): bit index of the current square
+            jumps (list[tuple(tuple(int, int))]): jump table of the piece
+            enemy (int): mask of the opponent's pieces
+            empty (int): mask of the squares that can be landed on
+            captured (int): mask of the pieces jumped so far
+            memo (dict): nodes already built for this piece kind and board
+
+        Returns:
+            Capture node (tuple(tuple(int, int, tuple)))
+        """
+        key = (sq, captured)
+        node = memo.get(key)
+        if node is None:
+            node = tuple(
+                (over, land, self._capture_node(land, jumps, enemy, empty,
+                                                captured | (1 << over), memo))
+                for over, land in jumps[sq]
+                if (enemy & ~captured) >> over & 1 and empty >> land & 1)
+            memo[key] = node
+        return node
+
+
+    def capture_tree(self, sq, memo=None):
+        """
+        Gets every capture sequence of the piece on a square, as a tree. The
+        position is not modified.
+
+        Each node is a tuple of branches (jumped, landing, child): the bit
+        index of the piece jumped, of the square landed on, and the node of
+        the jumps available from there (an empty tuple where the sequence
+        ends). Use flatten_captures() to get the sequences as lists.
+
+        Args:
+            sq (int): bit index of the square of the piece
+            memo (Optional[dict]): memo to share between pieces of the same
+                side and type in the same position
+
+        Returns:
+            Root node of the tree, empty if the piece cannot capture (tuple)
+        """
+        side, kind = self._kind(sq)
+        if memo is None:
+            memo = {}
+        return self._capture_node(sq, self.jumps[kind], self.pieces[1 - side],
+                                  self.empty(), 0, memo)
+
+
+    def _kind(self, sq):
+        """
+        Gets the side of the piece on a square, and which of the step/jump
+        tables applies to it
+
+        Args:
+            sq (int): bit index of the square of the piece
+
+        Returns:
+            Tuple of the side of the piece and its table index (BLACK, RED
+            or KING) (tuple(int, int))
+        """
+        side = BLACK if self.pieces[BLACK] >> sq & 1 else RED
+        if self.kings >> sq & 1:
+            return side, KING
+        return side, side
+
+
+    def piece_paths(self, sq):
+        """
+        Gets all the legal move sequences for the piece on a square. If the
+        piece can capture, only the (maximal) capture sequences are returned.
+
+        Args:
+            sq (int): bit index of the square of the piece
+
+        Returns:
+            List of move sequences, as bit indices of the squares reached
+            (list(list(int)))
+        """
+        tree = self.capture_tree(sq)
+        if tree:
+            return flatten_captures(tree)
+        _, kind = self._kind(sq)
+        empty = self.empty()
+        return [[to] for to in self.steps[kind][sq] if empty >> to & 1]
+
+
+    def _tree_moves(self, frm, node, captured, moves):
+        """
+        Encodes every capture sequence of a capture tree, without building
+        the sequences
+
+        Args:
+            frm (int): bit index of the square the piece starts on
+            node (tuple): node of the capture tree
+            captured (int): mask of the pieces captured to reach the node
+            moves (dict[int, None]): encoded moves found so far (a dict is
+                used as an ordered set)
+
+        Returns None
+        """
+        for over, land, child in node:
+            jumped = captured | (1 << over)
+            if child:
+                self._tree_moves(frm, child, jumped, moves)
+            else:
+                moves[encode_move(frm, land, jumped)] = None
+
+
+    def player_moves(self, side):
+        """
+        Gets all the legal moves of a side as encoded moves (see
+        encode_move()). If any piece can capture, only captures are legal.
+
+        Args:
+            side (int): BLACK or RED
+
+        Returns:
+            Dictionary mapping the bit index of each piece that can move to
+            its encoded moves (dict[int, list[int]])
+        """
+        empty = self.empty()
+        enemy = self.pieces[1 - side]
+        kings = self.kings
+        moves = {}
+
+        mask = self.jumpers(side, empty)
+        if mask:
+            man_memo = {}
+            king_memo = {}
+            for sq in bits(mask):
+                if kings >> sq & 1:
+                    tree = self._capture_node(sq, self.jumps[KING], enemy,
+                                              empty, 0, king_memo)
+                else:
+                    tree = self._capture_node(sq, self.jumps[side], enemy,
+                                              empty, 0, man_memo)
+                found = {}
+                self._tree_moves(sq, tree, 0, found)
+                moves[sq] = list(found)
+            return moves
+
+        man_steps = self.steps[side]
+        king_steps = self.steps[KING]
+        for sq in bits(self.movers(side, empty)):
+            steps = king_steps[sq] if kings >> sq & 1 else man_steps[sq]
+            moves[sq] = [sq | (to << SQUARE_BITS) for to in steps
+                         if empty >> to & 1]
+        return moves
+
+
+    def legal_moves(self, side):
+        """
+        Gets all the legal moves of a side as a flat list of encoded moves
+
+        Args:
+            side (int): BLACK or RED
+
+        Returns:
+            Encoded moves, in order of the square they start on (list[int])
+        """
+        return [move for moves in self.player_moves(side).values()
+                for move in moves]
+
+
+    def make(self, move):
+        """
+        Plays an encoded move: moves the piece, removes the captured pieces
+        and crowns the piece if it ends on the first or last row. The move
+        must be legal in the current position.
+
+        Args:
+            move (int): the encoded move
+
+        Returns:
+            Undo record for unmake() (tuple(int, int, bool, int))
+        """
+        frm, to, captured = decode_move(move)
+        side = BLACK if self.pieces[BLACK] >> frm & 1 else RED
+        king = bool(self.kings >> frm & 1)
+        record = (move, side, king, self.kings & captured)
+        self.relocate(frm, to)
+        for sq in bits(captured):
+            self.remove(sq)
+        if self.crown_rows >> to & 1:
+            self.crown(to)
+        return record
+
+
+    def unmake(self, record):
+        """
+        Takes back a move played with make(). Moves must be taken back in
+        the reverse order they were made.
+
+        Args:
+            record (tuple): undo record returned by make()
+
+        Returns None
+        """
+        move, side, king, captured_kings = record
+        frm, to, captured = decode_move(move)
+        self.remove(to)
+        self.add(frm, side, king)
+        for sq in bits(captured):
+            self.add(sq, 1 - side, bool(captured_kings >> sq & 1))
+
+
+    def path_to_move(self, frm, path):
+        """
+        Encodes a move given as a sequence of squares
+
+        Args:
+            frm (int): bit index of the square the piece starts on
+            path (list[int]): bit indices of the squares reached
+
+        Returns:
+            The encoded move (int)
+        """
+        captured = 0
+        prev = frm
+        for sq in path:
+            if abs(sq - prev) > self.half + 1:
+                captured |= 1 << ((sq + prev) // 2)
+            prev = sq
+        return encode_move(frm, path[-1], captured)
+
+
+    def move_to_path(self, move):
+        """
+        Expands an encoded move back into the sequence of squares reached.
+        The move must be legal in the current position. If several capture
+        sequences share the encoding, the first one found is returned.
+
+        Args:
+            move (int): the encoded move
+
+        Returns:
+            Bit indices of the squares reached (list[int])
+        """
+        frm, to, captured = decode_move(move)
+        if not captured:
+            return [to]
+        _, kind = self._kind(frm)
+        return self._expand(frm, to, captured, self.jumps[kind],
+                            self.empty())
+
+
+    def _expand(self, sq, to, captured, jumps, empty):
+        """
+        DFS for move_to_path(): finds a jump sequence from a square that
+        jumps exactly the pieces in captured and ends on to
+
+        Args:
+            sq (int): bit index of the current square
+            to (int): bit index of the square the sequence must end on
+            captured (int): mask of the pieces still to be jumped
+            jumps (list[tuple(tuple(int, int))]): jump table of the piece
+            empty (int): mask of the squares that can be landed on
+
+        Returns:
+            Optional[list[int]]: the rest of the sequence, or None if there
+            is no such sequence
+        """
+        if not captured:
+            return [] if sq == to else None
+        for over, land in jumps[sq]:
+            if captured >> over & 1 and empty >> land & 1:
+                rest = self._expand(land, to, captured & ~(1 << over), jumps,
+                                    empty)
+                if rest is not None:
+                    return [land] + rest
+        return None
+
+
+    def player_paths(self, side):
+        """
+        Gets all the legal move sequences of a side. If any piece can
+        capture, only capture sequences are legal.
+
+        Args:
+            side (int): BLACK or RED
+
+        Returns:
+            Dictionary mapping the bit index of each piece that can move to
+            its move sequences (dict[int, list(list(int))])
+        """
+        empty = self.empty()
+        enemy = self.pieces[1 - side]
+        kings = self.kings
+        paths = {}
+
+        mask = self.jumpers(side, empty)
+        if mask:
+            # Pieces of the same type see the same board, so they can share
+            # capture tree nodes
+            man_memo = {}
+            king_memo = {}
+            for sq in bits(mask):
+                if kings >> sq & 1:
+                    tree = self._capture_node(sq, self.jumps[KING], enemy,
+                                              empty, 0, king_memo)
+                else:
+                    tree = self._capture_node(sq, self.jumps[side], enemy,
+                                              empty, 0, man_memo)
+                paths[sq] = flatten_captures(tree)
+            return paths
+
+        man_steps = self.steps[side]
+        king_steps = self.steps[KING]
+        for sq in bits(self.movers(side, empty)):
+            steps = king_steps[sq] if kings >> sq & 1 else man_steps[sq]
+            paths[sq] = [[to] for to in steps if empty >> to & 1]
+        return paths
@@ -0,0 +1,320 @@
+"""
+Opening books for the Checkers bots.
+
+An opening book maps positions (by Zobrist hash, see Checkers.zobrist_key())
+to the moves worth playing there, with a weight for each. Books are built
+from self-play: the search bot plays itself, sometimes picking a random
+move to vary the games, and every move played in the first plies of a game
+earns 2 points if its side went on to win and 1 point for a draw.
+
+Books are saved as a sorted binary file of fixed-size records (position
+hash, move and weight), so a position is looked up by binary search on the
+memory-mapped file, with no load step. Moves are stored by the squares they
+start and end on (the low 32 bits of an encoded move, see
+bitboard.encode_move()).
+
+Examples:
+    1) Build a book for the 8x8 board from 50 games::
+        python3 src/book.py --size 3 -n 50 -o book-8x8.bin
+
+    2) Pick a book move for a game's position::
+        book = OpeningBook("book-8x8.bin")
+        side = BLACK if game.curr_player == 1 else RED
+        move = book.choose(game.engine, side)
+"""
+
+import mmap
+import random
+import struct
+import time
+
+import click
+
+from bitboard import BLACK, RED
+from checkers import Checkers
+from search import Search, DRAW_MOVES, CAPTURED
+
+# bytes: First bytes of every book file
+MAGIC = b"CKBK"
+
+# int: Version of the file format
+VERSION = 1
+
+# struct.Struct: File header: magic, version, board dimensions and number of
+# records
+HEADER = struct.Struct("<4sHHQ")
+
+# struct.Struct: A record: position hash, move (start and end squares) and
+# weight
+RECORD = struct.Struct("<QII")
+
+# int: Mask of the start and end squares of an encoded move
+MOVE_MASK = (1 << CAPTURED) - 1
+
+
+def position_key(engine, side):
+    """
+    Gets the hash a position is stored under in a book
+
+    Args:
+        engine (BitboardEngine): engine with the position
+        side (int): side to move (BLACK or RED)
+
+    Returns:
+        The hash (int)
+    """
+    return engine.key ^ engine.zobrist_side if side == RED else engine.key
+
+
+class OpeningBook:
+    """
+    Class for reading a book file. The file is memory-mapped, so nothing is
+    read until a position is looked up.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor
+
+        Args:
+            path (str): Path of the book file
+
+        Raises:
+            ValueError: if the file is not a book
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, dims, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or \
+            len(self._map) != HEADER.size + RECORD.size * count:
+            self.close()
+            raise ValueError(f"{path} is not a book file")
+        self.dims = dims
+        self._count = count
+
+
+    def __len__(self):
+        """
+        Gets the number of records (position and move pairs) in the book
+
+        Returns:
+            Number of records (int)
+        """
+        return self._count
+
+
+    def __getstate__(self):
+        """
+        Pickles only the path, so a book can be sent to another process
+        (which maps the file again)
+        """
+        return self.path
+
+
+    def __setstate__(self, path):
+        """
+        Maps the file again after unpickling
+        """
+        self.__init__(path)
+
+
+    def close(self):
+        """
+        Unmaps and closes the file
+
+        Args:
+            None
+
+        Returns None
+        """
+        self._map.close()
+        self._file.close()
+
+
+    def _key_at(self, i):
+        """
+        Gets the position hash of a record
+
+        Args:
+            i (int): index of the record
+
+        Returns:
+            The hash (int)
+        """
+        return struct.unpack_from("<Q", self._map,
+                                  HEADER.size + RECORD.size * i)[0]
+
+
+    def moves(self, key):
+        """
+        Looks up the book moves of a position
+
+        Args:
+            key (int): hash of the position (see position_key())
+
+        Returns:
+            The moves (start and end squares) and their weights
+            (list[tuple(int, int)])
+        """
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        while lo < self._count:
+            record_key, move, weight = RECORD.unpack_from(
+                self._map, HEADER.size + RECORD.size * lo)
+            if record_key != key:
+                break
+            found.append((move, weight))
+            lo += 1
+        return found
+
+
+    def choose(self, engine, side, rng=random):
+        """
+        Picks a book move for a position, at random in proportion to the
+        weights of the moves
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+            rng (random.Random): random number generator
+
+        Returns:
+            The encoded move (Optional[int]), or None if the position is not
+            in the book
+        """
+        if engine.dims != self.dims:
+            return None
+        found = self.moves(position_key(engine, side))
+        if not found:
+            return None
+        legal = {move & MOVE_MASK: move for move in engine.legal_moves(side)}
+        found = [(move, weight) for move, weight in found if move in legal]
+        if not found:
+            return None
+        pick = rng.randrange(sum(weight for _, weight in found))
+        for move, weight in found:
+            pick -= weight
+            if pick < 0:
+                return legal[move]
+
+
+def self_play(dims, plies, node_limit, randomness, rng):
+    """
+    Plays a game of the search bot against itself
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+        plies (int): number of plies to record
+        node_limit (int): nodes searched for each move
+        randomness (float): chance of playing a random move instead of
+        searching, in the recorded plies
+        rng (random.Random): random number generator
+
+    Returns:
+        The recorded moves, as (position hash, side, move) tuples, and the
+        winner (BLACK, RED, or None for a draw)
+        (tuple(list[tuple(int, int, int)], Optional[int]))
+    """
+    engine = Checkers(dims // 2 - 1).engine.copy()
+    search = Search(node_limit=node_limit, hash_mb=4)
+    side = BLACK
+    quiet = 0
+    played = []
+    while True:
+        moves = engine.legal_moves(side)
+        if not moves:
+            return played, 1 - side
+        if quiet >= DRAW_MOVES:
+            return played, None
+        if len(played) < plies and rng.random() < randomness:
+            move = rng.choice(moves)
+        else:
+            move = search.best_move(engine, side, quiet)
+        if len(played) < plies:
+            played.append((position_key(engine, side), side, move))
+        engine.make(move)
+        quiet = 0 if move >> CAPTURED else quiet + 1
+        side = 1 - side
+
+
+def build(dims, games, plies, node_limit, randomness, rng, progress=None):
+    """
+    Builds a book from self-play games
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+        games (int): number of games to play
+        plies (int): number of plies of each game to put in the book
+        node_limit (int): nodes searched for each move
+        randomness (float): chance of playing a random move instead of
+        searching, in the first plies
+        rng (random.Random): random number generator
+        progress (Optional[Callable[[str], None]]): called with progress
+        messages
+
+    Returns:
+        Weight of each (position hash, move) pair (dict[tuple(int, int),
+        int])
+    """
+    weights = {}
+    for game in range(games):
+        played, winner = self_play(dims, plies, node_limit, randomness, rng)
+        for key, side, move in played:
+            points = 1 if winner is None else 2 * (winner == side)
+            record = (key, move & MOVE_MASK)
+            weights[record] = weights.get(record, 0) + points
+        if progress is not None:
+            progress(f"Game {game + 1}: " +
+                     ("draw" if winner is None else
+                      "black won" if winner == BLACK else "red won"))
+    return {record: weight for record, weight in weights.items() if weight}
+
+
+def save(path, dims, weights):
+    """
+    Writes a book file
+
+    Args:
+        path (str): Path of the file
+        dims (int): Number of rows (and columns) of the board
+        weights (dict[tuple(int, int), int]): weights returned by build()
+
+    Returns None
+    """
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, dims, len(weights)))
+        for (key, move), weight in sorted(weights.items()):
+            f.write(RECORD.pack(key, move, weight))
+
+
+@click.command(name="checkers-book")
+@click.option('--size', type=click.INT, default=3)
+@click.option('-n', '--num-games', type=click.INT, default=50)
+@click.option('--plies', type=click.INT, default=12)
+@click.option('--search-nodes', type=click.INT, default=1000)
+@click.option('--randomness', type=click.FLOAT, default=0.2)
+@click.option('--seed', type=click.INT, default=None)
+@click.option('-o', '--output', type=click.Path(), required=True)
+def cmd(size, num_games, plies, search_nodes, randomness, seed, output):
+    """
+    Builds an opening book from self-play games of the search bot
+    """
+    start = time.perf_counter()
+    dims = size * 2 + 2
+    weights = build(dims, num_games, plies, search_nodes, randomness,
+                    random.Random(seed), print)
+    save(output, dims, weights)
+    positions = len({key for key, _ in weights})
+    print(f"{len(weights)} moves in {positions} positions, in "
+          f"{time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    cmd()
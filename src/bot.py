@@ -1,4 +1,15 @@
 from checkers import Piece, Checkers, PieceType, PieceColor
+from bitboard import BLACK, RED
+from parallel import ParallelSearch
+from tablebase import Tablebase, WIN, LOSS
+from solve import Solution, solve
+from book import OpeningBook
+from mcts import MCTS
+from groups import PieceGroups
+from evaluate import WEIGHTS, load_weights
+from records import GameRecorder
+from ponder import Ponderer
+from search import CAPTURED
 import random
 import click
 
@@ -62,18 +73,26 @@ class SmartBot:
     _game: Checkers
     _color: str
 
-    def __init__(self, game: Checkers, color: PieceColor):
+    def __init__(self, game: Checkers, color: PieceColor,
+                 book: OpeningBook = None):
         """
         Constructor
 
         Args:
             game: (Checkers) Game the bot will play on
             color: Color that the bot will play as
+            book: (OpeningBook) Opening book to play from while the game is
+            in it (None for no book)
         """
         assert type(color) == PieceColor
         
         self._game = game
         self._color = color
+        self._book = book
+
+        # Analysis of the current turn, shared by every priority (filled by
+        # _suggest_safe_move and _opponent_moves, emptied every turn)
+        self._turn_cache = {}
 
 
     def suggest_move(self, botvbot=False) -> tuple((Piece, list((int, int)))):
@@ -84,6 +103,14 @@ class SmartBot:
             tuple(Piece, list((tuple(int, int)))
              - Suggested move by the bot
         """
+        # Play from the opening book while the game is in it
+        if self._book is not None:
+            side = BLACK if self._color == self._game.p1_color else RED
+            move = self._book.choose(self._game.engine, side)
+            if move is not None:
+                return self._game.decode_move(move)
+
+        self._turn_cache = {}
         all_possible_moves = []
         all_moves = self._game.player_legal_moves(self._color)
         for piece, moves in all_moves:
@@ -341,22 +368,9 @@ class SmartBot:
         if safe_moves is None:
             return
         
-        opp_moves = []
-        if self._color == PieceColor.BLACK:
-            all_opp_moves = self._game.player_legal_moves(PieceColor.RED)
-        if self._color == PieceColor.RED:
-            all_opp_moves = self._game.player_legal_moves(PieceColor.BLACK)
-        
         # Try to stop the opponent's move that takes most of the bot's pieces.
-        for piece, moves in all_opp_moves:
-            for move in moves:
-                if len(move) > 0:
-                    opp_moves.append((piece, move))
-        if len(opp_moves) == 0:
-            return
-        opp_move_1 = opp_moves[0]
-
-        if abs(opp_move_1[1][0][0] - opp_move_1[0].row) > 1:
+        if self._game.hanging(self._color):
+            opp_moves = self._opponent_moves()
             max = 0
             move_most_takes = None
             for piece, moves in opp_moves:
@@ -391,22 +405,16 @@ class SmartBot:
         if safe_moves is None:
             return
 
-        if self._color == PieceColor.BLACK:
-            pieces = self._game.p1
-        if self._color == PieceColor.RED:
-            pieces = self._game.p2
-        
-        max = self._calculate_consolid(pieces)
+        # Groups of the bot's pieces, and how moves change them
+        engine = self._game.engine
+        side = BLACK if self._color == self._game.p1_color else RED
+        groups = PieceGroups(engine, side)
+        max = groups.largest
 
         possible_congl_moves = []
-        piece, move = safe_moves[0]
         for piece, move in safe_moves:
-            orig_loc = (piece.row, piece.col)
-            move_loc = move[-1]
-            piece._temporary_step(move_loc)
-            
-            congl = self._calculate_consolid(pieces)
-            piece._temporary_step(orig_loc)
+            congl = groups.largest_after_move(
+                engine.square(piece.row, piece.col), engine.square(*move[-1]))
 
             if congl > max:
                 max = congl
@@ -418,64 +426,44 @@ class SmartBot:
             return random.choice(possible_congl_moves)
 
 
-    def _calculate_consolid(self, pieces):
+    def _opp_side(self):
         """
-        Calculates the maximum of number of connected pieces.
+        Gets the engine side (BLACK or RED) of the bot's opponent
 
-        Inputs:
-            piece: (Piece)
-             - Starting piece for calculating consolidation factor
-        
         Outputs: (int)
-             - Number of pieces connected to the given piece
-        """   
-        visited = set()
-        max = 0
-        for piece in pieces:
-            if piece in visited:
-                continue
-            
-            visited, curr = self._consolid_dft(set(), piece)
-            if curr > max:
-                max = curr
-        return max
-            
+             - Side of the opponent
+        """
+        return RED if self._color == self._game.p1_color else BLACK
+
 
-    def _consolid_dft(self, visited, piece):
+    def _opponent_moves(self):
         """
-        Helper DFT function for _calculate_consolid()
+        Gets the opponent's legal moves in the current position, as a flat
+        list. They are computed once per turn.
 
-        Inputs:
-            visited: (set)
-             - Set of visited pieces
-            piece: (Piece)
-             - Current piece in DFT
-        
-        Outputs: (int)
-             - Number of non-visited pieces connected to the given piece
-        """   
-        dirs = [(1, -1), (-1, -1), (-1, 1), (1, 1)]
-        color = piece.color
-        visited.add(piece)
-        consolid = 1
-        for dir in dirs:
-            try:
-                new_r = piece.row + dir[0]
-                new_c = piece.col + dir[1]
-                if new_r < 0 or new_c < 0:
-                    continue
-                p = self._game.board.board[new_r][new_c]
-                if p is not None and p.color == color and p not in visited:
-                    consolid += self._consolid_dft(visited, p)[1]
-            except IndexError:
-                continue
-        
-        return visited, consolid
+        Outputs:
+            list(tuple(Piece, list(tuple(int, int))))
+             - Opponent's legal moves
+        """
+        if "opp_moves" not in self._turn_cache:
+            opp_moves = []
+            if self._color == PieceColor.BLACK:
+                all_opp_moves = self._game.player_legal_moves(PieceColor.RED)
+            if self._color == PieceColor.RED:
+                all_opp_moves = self._game.player_legal_moves(PieceColor.BLACK)
+
+            for piece, moves in all_opp_moves:
+                for move in moves:
+                    if len(move) > 0:
+                        opp_moves.append((piece, move))
+            self._turn_cache["opp_moves"] = opp_moves
+        return self._turn_cache["opp_moves"]
 
 
     def _suggest_safe_move(self, possible_moves):
         """
         Suggests "safe" moves that don't let opponent capture on the next turn.
+        They are computed once per turn, and shared by every priority.
 
         Returns None if no such moves are possible.
 
@@ -487,29 +475,43 @@ class SmartBot:
             Optional[list(tuple(Piece, list(tuple(int, int))))]
              - Suggested safe moves by the bot
         """
+        if "safe_moves" not in self._turn_cache:
+            self._turn_cache["safe_moves"] = \
+                self._find_safe_moves(possible_moves)
+        return self._turn_cache["safe_moves"]
+
+
+    def _find_safe_moves(self, possible_moves):
+        """
+        Finds the "safe" moves for _suggest_safe_move(), by trying every move
+        and looking up the opponent's answers in the engine's masks (a move is
+        safe if it leaves nothing hanging).
+
+        Inputs:
+            possible_moves: list[tuple(Piece, list(list(tuple(int, int))))]
+             - List of legal moves for the bot
+        
+        Outputs:
+            Optional[list(tuple(Piece, list(tuple(int, int))))]
+             - Safe moves
+        """
         safe_moves = []
+        engine = self._game.engine
+        opp_side = self._opp_side()
         for piece, moves in possible_moves:
             for move in moves:
                 orig_loc = (piece.row, piece.col)
                 move_loc = move[-1]
                 piece._temporary_step(move_loc)
-                    
-                if self._color == PieceColor.BLACK:
-                    all_opp_moves = self._game.player_legal_moves(PieceColor.RED)
-                if self._color == PieceColor.RED:
-                    all_opp_moves = self._game.player_legal_moves(PieceColor.BLACK)
-                
-                new_opp_moves = []
-                for opp_piece, opp_moves in all_opp_moves:
-                    for opp_move in opp_moves:
-                        if len(opp_move) > 0:
-                            new_opp_moves.append((opp_piece, opp_move))
+
+                # Look the opponent's answers up in the masks
+                opp_can_move = engine.has_moves(opp_side)
+                hanging = self._game.hanging(self._color)
                 piece._temporary_step(orig_loc)
-                if len(new_opp_moves) == 0:
+                if not opp_can_move:
                     return [(piece, move)]
 
-                opp_piece_1, opp_move_1 = new_opp_moves[0]
-                if abs(opp_piece_1.row - opp_move_1[0][0]) <= 1:
+                if not hanging:
                     if abs(orig_loc[0] - move_loc[0]) < 2:
                         safe_moves.append((piece, move))
             
@@ -531,24 +533,9 @@ class SmartBot:
             Optional[tuple(Piece, list(tuple(int, int)))]
              - Suggested move by the bot
         """
-        opp_moves = []
-        if self._color == PieceColor.BLACK:
-            all_opp_moves = self._game.player_legal_moves(PieceColor.RED)
-        if self._color == PieceColor.RED:
-            all_opp_moves = self._game.player_legal_moves(PieceColor.BLACK)
-        
-        for piece, moves in all_opp_moves:
-            for move in moves:
-                if len(move) > 0:
-                    opp_moves.append((piece, move))
-
-        if len(opp_moves) == 0:
-            return 
-        
-        opp_move_1 = opp_moves[0]
-
         # If Opponent can take...
-        if abs(opp_move_1[1][0][0] - opp_move_1[0].row) > 1:
+        if self._game.hanging(self._color):
+            opp_move_1 = self._opponent_moves()[0]
             possible_runs = []
 
             # Try and move the piece being taken.
@@ -560,16 +547,14 @@ class SmartBot:
             for move in run_moves:
                 end_loc = move[-1]
                 run_piece._temporary_step(end_loc)
-                if self._color == PieceColor.BLACK:
-                    new_opp_moves = self._game.player_legal_moves(PieceColor.RED)
-                if self._color == PieceColor.RED:
-                    new_opp_moves = self._game.player_legal_moves(PieceColor.BLACK)
-                
+
+                # The move is added once for each of the opponent's steps,
+                # if the opponent can't take anything after it
+                steps = 0
+                if not self._game.hanging(self._color):
+                    steps = self._game.engine.count_steps(self._opp_side())
                 run_piece._temporary_step(start_loc)
-                for piece, opp_moves in new_opp_moves:
-                    for opp_move in opp_moves:
-                        if abs(opp_move[0][0] - piece.row) < 2:
-                            possible_runs.append((run_piece, move))
+                possible_runs.extend([(run_piece, move)] * steps)
 
             if len(possible_runs) > 0:
                 return random.choice(possible_runs)
@@ -633,7 +618,337 @@ class SmartBot:
                     return random.choice(attack_moves)
 
 
-def _simulate(black, red, scores, size, n=100) -> None:
+class SearchBot:
+    """
+    Bot that looks ahead by searching the game tree: negamax with alpha-beta
+    pruning, deepening one ply at a time until its time (or node) budget
+    for the move runs out. The more time it is given, the deeper it looks.
+    With several workers, the moves are searched on several processes (see
+    parallel.py). With one, it can ponder: search in the background while
+    waiting (see ponder.py and ponder()).
+    """
+
+    _game: Checkers
+    _color: str
+
+    def __init__(self, game: Checkers, color: PieceColor,
+                 time_limit: float = 1.0, node_limit: int = None,
+                 max_depth: int = None, hash_mb: float = 16,
+                 tablebase: Tablebase = None, book: OpeningBook = None,
+                 workers: int = 1, weights: tuple = WEIGHTS):
+        """
+        Constructor
+
+        Args:
+            game: (Checkers) Game the bot will play on
+            color: Color that the bot will play as
+            time_limit: (float) Seconds to think about each move
+            node_limit: (int) Positions to search for each move (no limit
+            if None)
+            max_depth: (int) Deepest search, in plies (no limit if None)
+            hash_mb: (float) Memory for remembering positions already
+            searched, in MiB. It is kept for the whole game.
+            tablebase: (Tablebase) Endgame tablebase for playing endings
+            perfectly (None to search them like any other position)
+            book: (OpeningBook) Opening book to play from, without
+            searching, while the game is in it (None for no book)
+            workers: (int) Processes to search on (1 to search in this
+            process)
+            weights: (tuple(int)) Evaluation weights (see evaluate.py, and
+            tune.py for fitting them to self-play games)
+        """
+        assert type(color) == PieceColor
+
+        self._game = game
+        self._color = color
+        self._search = ParallelSearch(workers, time_limit, node_limit,
+                                      max_depth, weights, hash_mb=hash_mb,
+                                      tablebase=tablebase)
+        self._book = book
+        self._time_limit = time_limit
+        # Searches in several processes can't be stopped halfway, so only
+        # a search in this process ponders
+        self._ponderer = Ponderer() if workers == 1 else None
+
+
+    def _think(self, engine, side, draw_counter, stop):
+        """
+        Searches a position in the background, without a time limit, until
+        stop is set (see ponder.py)
+
+        Args:
+            engine: (BitboardEngine) Engine with the position
+            side: (int) Side to move (BLACK or RED)
+            draw_counter: (int) Moves already played without a capture
+            stop: (threading.Event) Event that stops the search
+
+        Returns: (int) The best move found
+        """
+        self._search.time_limit = None
+        self._search.stop_event = stop
+        try:
+            return self._search.best_move(engine, side, draw_counter)
+        finally:
+            self._search.time_limit = self._time_limit
+            self._search.stop_event = None
+
+
+    def ponder(self) -> None:
+        """
+        Starts searching in the background, to answer sooner: on the board's
+        position if it is the bot's turn (e.g. during the bot delay), or
+        else on the position after the reply the bot expects from its
+        opponent. suggest_move() uses the search if the game reaches its
+        position, and stops it otherwise.
+
+        Returns: None
+        """
+        if self._ponderer is None or self._game.is_done():
+            return
+        side = BLACK if self._color == self._game.p1_color else RED
+        turn = BLACK if self._game.curr_player == 1 else RED
+        engine = self._game.engine
+        draw_counter = self._game.draw_counter
+        if turn != side:
+            # The table can't be used while a search is running
+            self._ponderer.stop()
+            reply = self._search.expected_move(engine, turn)
+            if reply is not None:
+                engine = engine.copy()
+                engine.make(reply)
+                draw_counter = 0 if reply >> CAPTURED else draw_counter + 1
+                turn = side
+        # Without an expected reply, searching the opponent's position
+        # still fills the table with the bot's answers to each reply
+        self._ponderer.start(self._think, engine, turn, draw_counter)
+
+
+    def stop_pondering(self) -> None:
+        """
+        Stops the search started by ponder(), if it is still running
+
+        Returns: None
+        """
+        if self._ponderer is not None:
+            self._ponderer.stop()
+
+
+    def suggest_move(self, botvbot=False) -> tuple((Piece, list((int, int)))):
+        """
+        Suggests the best move found by the search
+
+        Returns: (Piece, list((int, int))): The Piece moved, and the sequence
+        of moves suggested by bot
+        """
+        side = BLACK if self._color == self._game.p1_color else RED
+        engine = self._game.engine
+        move = None
+        if self._book is not None:
+            move = self._book.choose(engine, side)
+        if self._ponderer is not None:
+            if move is None and self._ponderer.thinking_about(
+                engine, side, self._game.draw_counter):
+                move = self._ponderer.finish(self._time_limit)
+            else:
+                self._ponderer.stop()
+        if move is None:
+            move = self._search.best_move(engine, side,
+                                          self._game.draw_counter)
+        return self._game.decode_move(move)
+
+
+class MCTSBot:
+    """
+    Bot that plays by Monte-Carlo tree search (see mcts.py): it finishes the
+    game many times with random moves, like RandomBot, and plays the move
+    that did best, looking deeper into the moves that look promising. It
+    keeps its tree between turns, and can run the random games in several
+    processes, so it gets stronger with more time and more cores. With one
+    process, it can ponder: grow its tree in the background while waiting
+    (see ponder.py and ponder()).
+    """
+
+    _game: Checkers
+    _color: str
+
+    def __init__(self, game: Checkers, color: PieceColor,
+                 time_limit: float = 1.0, workers: int = 1):
+        """
+        Constructor
+
+        Args:
+            game: (Checkers) Game the bot will play on
+            color: Color that the bot will play as
+            time_limit: (float) Seconds to think about each move
+            workers: (int) Processes playing out random games (1 to play
+            them in this process)
+        """
+        assert type(color) == PieceColor
+
+        self._game = game
+        self._color = color
+        self._time_limit = time_limit
+        self._tree = MCTS(workers)
+        # Playouts in several processes can't be stopped halfway, so only
+        # a search in this process ponders
+        self._ponderer = Ponderer() if workers == 1 else None
+
+
+    def _think(self, engine, side, draw_counter, stop):
+        """
+        Searches a position in the background until stop is set, and
+        chooses a move if it is the bot's turn (see ponder.py)
+
+        Args:
+            engine: (BitboardEngine) Engine with the position
+            side: (int) Side to move (BLACK or RED)
+            draw_counter: (int) Moves already played without a capture
+            stop: (threading.Event) Event that stops the search
+
+        Returns: (int) The most visited move, or None if it is the
+        opponent's turn
+        """
+        self._tree.stop_event = stop
+        try:
+            if side == (BLACK if self._color == self._game.p1_color
+                        else RED):
+                return self._tree.best_move(engine, side, draw_counter, None)
+            # On the opponent's turn, grow the tree under every reply, so
+            # whichever one is played has been searched
+            self._tree.grow(engine, side, draw_counter)
+            return None
+        finally:
+            self._tree.stop_event = None
+
+
+    def ponder(self) -> None:
+        """
+        Starts searching the board's position in the background: on the
+        bot's turn (e.g. during the bot delay), suggest_move() lets the
+        search run until the time for the move is up, and on the opponent's
+        turn the tree grows under every reply, for the next search to use.
+
+        Returns: None
+        """
+        if self._ponderer is None or self._game.is_done():
+            return
+        turn = BLACK if self._game.curr_player == 1 else RED
+        self._ponderer.start(self._think, self._game.engine, turn,
+                             self._game.draw_counter)
+
+
+    def stop_pondering(self) -> None:
+        """
+        Stops the search started by ponder(), if it is still running
+
+        Returns: None
+        """
+        if self._ponderer is not None:
+            self._ponderer.stop()
+
+
+    def suggest_move(self, botvbot=False) -> tuple((Piece, list((int, int)))):
+        """
+        Suggests the most visited move of the search
+
+        Returns: (Piece, list((int, int))): The Piece moved, and the sequence
+        of moves suggested by bot
+        """
+        side = BLACK if self._color == self._game.p1_color else RED
+        move = None
+        if self._ponderer is not None:
+            if self._ponderer.thinking_about(self._game.engine, side,
+                                             self._game.draw_counter):
+                move = self._ponderer.finish(self._time_limit)
+            else:
+                self._ponderer.stop()
+        if move is None:
+            move = self._tree.best_move(self._game.engine, side,
+                                        self._game.draw_counter,
+                                        self._time_limit)
+        return self._game.decode_move(move)
+
+
+class PerfectBot:
+    """
+    Bot that plays perfectly, by looking up the result of every move in the
+    solution of the board (see solve.py). It only works on boards small
+    enough to solve, which in practice means the 4x4 board: it is solved
+    when the bot is created (or loaded from a table saved by solve.py).
+    """
+
+    _game: Checkers
+    _color: str
+
+    def __init__(self, game: Checkers, color: PieceColor,
+                 solution: Solution = None):
+        """
+        Constructor
+
+        Args:
+            game: (Checkers) Game the bot will play on
+            color: Color that the bot will play as
+            solution: (Solution) Solution of the board (solved on the spot
+            if None, which is only allowed on the 4x4 board)
+
+        Raises:
+            ValueError: if there is no solution for the board
+        """
+        assert type(color) == PieceColor
+
+        if solution is None:
+            if game.dims > 4:
+                raise ValueError("perfect-bot needs a solution for boards "
+                                 "bigger than 4x4 (see solve.py)")
+            solution = solve(game.dims)
+        if solution.dims != game.dims:
+            raise ValueError(f"the solution is for {solution.dims}x"
+                             f"{solution.dims} boards")
+
+        self._game = game
+        self._color = color
+        self._solution = solution
+
+
+    def suggest_move(self, botvbot=False) -> tuple((Piece, list((int, int)))):
+        """
+        Suggests a move: the quickest win if there is one, otherwise a draw,
+        otherwise the slowest loss (picking at random between equally good
+        moves)
+
+        Returns: (Piece, list((int, int))): The Piece moved, and the sequence
+        of moves suggested by bot
+        """
+        side = BLACK if self._color == self._game.p1_color else RED
+        engine = self._game.engine.copy()
+        best_moves = []
+        best_rank = None
+        for move in engine.legal_moves(side):
+            record = engine.make(move)
+            entry = self._solution.probe(engine, 1 - side)
+            engine.unmake(record)
+
+            # Rank the move by the result for the opponent
+            if entry is None:
+                rank = (1, -1)
+            elif entry[0] == LOSS:
+                rank = (2, -entry[1])
+            elif entry[0] == WIN:
+                rank = (0, entry[1])
+            else:
+                rank = (1, 0)
+
+            if best_rank is None or rank > best_rank:
+                best_rank = rank
+                best_moves = [move]
+            elif rank == best_rank:
+                best_moves.append(move)
+        return self._game.decode_move(random.choice(best_moves))
+
+
+def _simulate(black, red, scores, size, n=100, search_time=1.0,
+              hash_mb=16, tablebase=None, solution=None, book=None,
+              workers=1, weights=WEIGHTS, recorder=None) -> None:
     """
     Simulates n games between two bots
 
@@ -643,24 +958,61 @@ def _simulate(black, red, scores, size, n=100) -> None:
         scores: (dict) Dictionary mapping colors to wins
         size: (int) Size of board for bots to play on
         n (int): Number of games to simulate, default is 100
+        search_time (float): Seconds a search-bot or mcts-bot thinks about
+        each move
+        hash_mb (float): MiB of transposition table for each search-bot
+        tablebase (Tablebase): Endgame tablebase for the search-bots (None
+        for no tablebase)
+        solution (Solution): Solution of the board for the perfect-bots
+        (if None, 4x4 boards are solved once for all the games)
+        book (OpeningBook): Opening book for the smart-bots and search-bots
+        (None for no book)
+        workers (int): Processes each search-bot searches on, and each
+        mcts-bot plays out random games on
+        weights (tuple(int)): Evaluation weights of the search-bots
+        recorder (GameRecorder): Recorder the positions and results of the
+        games are written to, for tuning the evaluation (None to not record
+        them)
 
     Returns: None
     """
+    if solution is None and size == 1 and 'perfect-bot' in (black, red):
+        solution = solve(size * 2 + 2)
+
     for _ in range(n):
         game = Checkers(size)
         if black == 'random-bot':
             bot1 = RandomBot(game, PieceColor.BLACK)
         elif black == 'smart-bot':
-            bot1 = SmartBot(game, PieceColor.BLACK)
+            bot1 = SmartBot(game, PieceColor.BLACK, book)
+        elif black == 'search-bot':
+            bot1 = SearchBot(game, PieceColor.BLACK, search_time,
+                             hash_mb=hash_mb, tablebase=tablebase, book=book,
+                             workers=workers, weights=weights)
+        elif black == 'mcts-bot':
+            bot1 = MCTSBot(game, PieceColor.BLACK, search_time, workers)
+        elif black == 'perfect-bot':
+            bot1 = PerfectBot(game, PieceColor.BLACK, solution)
         if red == 'random-bot':
             bot2 = RandomBot(game, PieceColor.RED)
         elif red == 'smart-bot':
-            bot2 = SmartBot(game, PieceColor.RED)
+            bot2 = SmartBot(game, PieceColor.RED, book)
+        elif red == 'search-bot':
+            bot2 = SearchBot(game, PieceColor.RED, search_time,
+                             hash_mb=hash_mb, tablebase=tablebase, book=book,
+                             workers=workers, weights=weights)
+        elif red == 'mcts-bot':
+            bot2 = MCTSBot(game, PieceColor.RED, search_time, workers)
+        elif red == 'perfect-bot':
+            bot2 = PerfectBot(game, PieceColor.RED, solution)
 
         current = bot1
 
         # While the game isn't over, make a move
         while not game.is_done(): 
+            if recorder is not None:
+                recorder.add(game.engine, BLACK if current._color ==
+                             PieceColor.BLACK else RED)
             Piece, moves = current.suggest_move(True)
             Piece.move(moves)
 
@@ -675,25 +1027,63 @@ def _simulate(black, red, scores, size, n=100) -> None:
         winner = game.get_winner()
         if winner is not None and winner != "It's a draw!":
             scores[winner] += 1
+        if recorder is not None:
+            recorder.finish(BLACK if winner == "Black has won!" else
+                            RED if winner == "Red has won!" else None)
         
     return scores["Black has won!"], scores["Red has won!"]
 
 
 @click.command(name="checkers-bot")
 @click.option('-n', '--num-games',  type=click.INT, default=100)
-@click.option('--black', type=click.Choice(['random-bot', 'smart-bot'], \
-                case_sensitive=False),default="random-bot")
-@click.option('--red', type=click.Choice(['random-bot', 'smart-bot'], \
-                case_sensitive=False), default="random-bot")
+@click.option('--black', type=click.Choice(['random-bot', 'smart-bot',
+                'search-bot', 'mcts-bot', 'perfect-bot'],
+                case_sensitive=False),
+                default="random-bot")
+@click.option('--red', type=click.Choice(['random-bot', 'smart-bot',
+                'search-bot', 'mcts-bot', 'perfect-bot'],
+                case_sensitive=False),
+                default="random-bot")
 @click.option('--size', type=click.INT, default=3)
-
-
-def cmd(num_games, black, red, size):
+@click.option('--search-time', type=click.FLOAT, default=0.1)
+@click.option('--hash-mb', type=click.FLOAT, default=16)
+@click.option('--tablebase', type=click.Path(exists=True, dir_okay=False),
+              default=None)
+@click.option('--solution', type=click.Path(exists=True, dir_okay=False),
+              default=None)
+@click.option('--book', type=click.Path(exists=True, dir_okay=False),
+              default=None)
+@click.option('--workers', type=click.INT, default=1)
+@click.option('--weights', type=click.Path(exists=True, dir_okay=False),
+              default=None)
+@click.option('--record', type=click.Path(dir_okay=False), default=None)
+
+
+def cmd(num_games, black, red, size, search_time, hash_mb, tablebase,
+        solution, book, workers, weights, record):
+    if tablebase is not None:
+        tablebase = Tablebase(tablebase)
+    if solution is not None:
+        solution = Solution.load(solution)
+    if book is not None:
+        book = OpeningBook(book)
+    weights = WEIGHTS if weights is None else load_weights(weights)
+    recorder = None
+    if record is not None:
+        recorder = GameRecorder(record, size * 2 + 2)
     scores = {"Black has won!": 0, "Red has won!": 0}
-    black_wins, red_wins = _simulate(black, red, scores, size, num_games)
-
-    assert black == 'random-bot' or black == 'smart-bot'
-    assert red == 'random-bot' or red == 'smart-bot'
+    black_wins, red_wins = _simulate(black, red, scores, size, num_games,
+                                     search_time, hash_mb, tablebase,
+                                     solution, book, workers, weights,
+                                     recorder)
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.count} positions to {record}")
+
+    assert black in ('random-bot', 'smart-bot', 'search-bot', 'mcts-bot',
+                     'perfect-bot')
+    assert red in ('random-bot', 'smart-bot', 'search-bot', 'mcts-bot',
+                   'perfect-bot')
 
     ties = num_games - (black_wins + red_wins)
 
@@ -19,11 +19,26 @@ Examples:
 
     5) Check whether there is a winner and, if so, who the winner is.
 	    b1.get_winner()
+
+    6) Try a move and take it back (e.g. to look ahead in a bot)::
+        record = b1.make_move(piece1, [(2,3)])
+        b1.unmake_move(record)
+
+    7) Get the legal moves of a player as compact ints, and play one::
+        move = b1.legal_move_codes(PieceColor.BLACK)[0]
+        piece, path = b1.decode_move(move)
+        b1.make_move(None, move)
+
+    8) Check whether a piece could be captured on the opponent's next move::
+        sq = b1.engine.square(piece1.row, piece1.col)
+        b1.hanging(PieceColor.BLACK) >> sq & 1
 """
 
 import copy
 from enum import Enum
 
+from bitboard import BitboardEngine, BLACK, RED, decode_move
+
 PieceColor = Enum("PieceColor", ["BLACK", "RED"])
 PieceType = Enum("PieceType", ["PIECE", "KING"])
 
@@ -58,6 +73,18 @@ class Board:
             in the list will be None (no piece), or Piece.
         """
         return copy.deepcopy(self.board)
+
+
+    def snapshot(self):
+        """ Returns a read-only snapshot of the board
+
+        Unlike to_piece_grid(), this does not copy any Piece (or the game
+        they belong to), so it is O(rows * cols) and cheap to keep.
+
+        Returns:
+            BoardSnapshot: the color and type of the piece on each square
+        """
+        return BoardSnapshot.from_grid(self.board)
         
 
     def get_piece(self, coordinates):
@@ -77,11 +104,222 @@ class Board:
         r, c = coordinates
         if r >= self.rows or c >= self.cols:
             raise ValueError("Coordinates not on board!")
-        if self.board[r][c] is None:
+        piece = self.board[r][c]
+        if piece is None:
             raise ValueError("No piece here!")
         else:
-            return self.board[r][c]
-        
+            return piece
+
+
+class SquareView:
+    """
+    Class for representing what is on a square of a BoardSnapshot. Has the
+    same color and type attributes as a Piece, so it can be drawn the same
+    way. There is only one (shared) SquareView for each color and type.
+    """
+
+    __slots__ = ("color", "type")
+
+    def __init__(self, color, type):
+        """
+        Constructor
+
+        Args:
+            color (PieceColor): Color of the piece on the square
+            type (PieceType): Type of the piece on the square
+        """
+        self.color = color
+        self.type = type
+
+
+    def __repr__(self):
+        return f'{self.color}, {self.type}'
+
+
+class BoardSnapshot:
+    """
+    Class for representing a read-only copy of what is on each square of a
+    board. The board is packed into bytes (one byte per square), so
+    snapshots are cheap to take, compare, hash and keep around.
+    """
+
+    __slots__ = ("rows", "cols", "data")
+
+    # list[Optional[SquareView]]: What each byte value stands for
+    VIEWS = [None,
+             SquareView(PieceColor.BLACK, PieceType.PIECE),
+             SquareView(PieceColor.BLACK, PieceType.KING),
+             SquareView(PieceColor.RED, PieceType.PIECE),
+             SquareView(PieceColor.RED, PieceType.KING)]
+
+    def __init__(self, rows, cols, data):
+        """
+        Constructor
+
+        Args:
+            rows (int): Number of rows on the board
+            cols (int): Number of columns on the board
+            data (bytes): One byte per square, in row-major order: 0 if the
+                square is empty, or the index of its SquareView in VIEWS
+        """
+        self.rows = rows
+        self.cols = cols
+        self.data = bytes(data)
+
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Takes a snapshot of a grid of pieces
+
+        Args:
+            grid (list[list[Optional[Piece]]]): the grid of the board
+
+        Returns:
+            The snapshot (BoardSnapshot)
+        """
+        data = bytearray()
+        for row in grid:
+            for piece in row:
+                if piece is None:
+                    data.append(0)
+                else:
+                    code = 1 if piece.color == PieceColor.BLACK else 3
+                    if piece.type == PieceType.KING:
+                        code += 1
+                    data.append(code)
+        return cls(len(grid), len(data) // max(len(grid), 1), data)
+
+
+    def __eq__(self, other):
+        return isinstance(other, BoardSnapshot) and \
+            (self.rows, self.cols, self.data) == \
+            (other.rows, other.cols, other.data)
+
+
+    def __hash__(self):
+        return hash((self.rows, self.cols, self.data))
+
+
+    def get(self, coordinates):
+        """
+        Gets what is on a square
+
+        Args:
+            coordinates (tuple(int)): Location on board (row_idx, col_idx)
+
+        Returns:
+            Optional[SquareView]: what is on the square (None if empty)
+        """
+        r, c = coordinates
+        return self.VIEWS[self.data[r * self.cols + c]]
+
+
+    def to_grid(self):
+        """
+        Returns the snapshot as a list of lists, like Board.to_piece_grid(),
+        but with shared SquareViews instead of copies of the Pieces
+
+        Returns:
+            list[list[Optional[SquareView]]]: the squares of the board
+        """
+        views = self.VIEWS
+        cols = self.cols
+        return [[views[code] for code in self.data[r * cols:(r + 1) * cols]]
+                for r in range(self.rows)]
+
+
+class Roster:
+    """
+    Class for representing the list of a player's pieces.
+
+    Behaves like a list (iteration, len, in, append, remove), but each piece
+    remembers its index, so removing a piece is O(1). A removed piece leaves
+    a hole instead of shifting the others, so it can be put back in exactly
+    the same place with restore().
+    """
+
+    __slots__ = ("_pieces", "_count")
+
+    def __init__(self, pieces=()):
+        """
+        Constructor
+
+        Args:
+            pieces (iterable[Piece]): Initial pieces, in order
+        """
+        # list[Optional[Piece]]: The pieces, with None where one was removed
+        self._pieces = []
+
+        # int: Number of pieces currently in the roster
+        self._count = 0
+
+        for piece in pieces:
+            self.append(piece)
+
+
+    def __len__(self):
+        return self._count
+
+
+    def __iter__(self):
+        return (piece for piece in self._pieces if piece is not None)
+
+
+    def __contains__(self, piece):
+        index = getattr(piece, "_index", None)
+        return index is not None and index < len(self._pieces) and \
+            self._pieces[index] is piece
+
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+    def append(self, piece):
+        """
+        Adds a piece at the end of the roster
+
+        Args:
+            piece (Piece): the piece to add
+
+        Returns None
+        """
+        piece._index = len(self._pieces)
+        self._pieces.append(piece)
+        self._count += 1
+
+
+    def remove(self, piece):
+        """
+        Removes a piece in O(1)
+
+        Args:
+            piece (Piece): the piece to remove
+
+        Raises:
+            ValueError: if the piece is not in the roster
+
+        Returns None
+        """
+        if piece not in self:
+            raise ValueError("Piece not in roster!")
+        self._pieces[piece._index] = None
+        self._count -= 1
+
+
+    def restore(self, piece):
+        """
+        Puts a removed piece back in the place it was removed from
+
+        Args:
+            piece (Piece): a piece previously removed from this roster
+
+        Returns None
+        """
+        self._pieces[piece._index] = piece
+        self._count += 1
+
 
 class Checkers:
     """
@@ -108,12 +346,22 @@ class Checkers:
         # Creates grid attribute to access the board conveniently
         self.grid = self.board.board
 
+        # BitboardEngine: Bitboard copy of the position, used to generate
+        # legal moves. Kept in sync with the grid by Piece.
+        self.engine = BitboardEngine(self.dims)
+
+        # dict: Legal moves of the current position, keyed by PieceColor
+        # (for player_legal_moves) or by (row, col) (for get_legal_moves).
+        # Only valid while the engine is at version _cache_version.
+        self._legal_cache = {}
+        self._cache_version = -1
+
         # PieceColor: the color of each player on the board
         self.p1_color = PieceColor.BLACK
         self.p2_color = PieceColor.RED
 
         # Initializes Pieces onto the board in-place
-        # Lists of Pieces corresponding to each player
+        # Rosters of Pieces corresponding to each player
         self.p1, self.p2 = self._init_pieces()
 
         # int: Integer corresponding to the player identifier
@@ -141,10 +389,10 @@ class Checkers:
             (None)
 
         Returns: 
-            Initialised Piece objects (Tuple([List[Piece], List[Piece]]))
+            Initialised Piece objects (Tuple([Roster, Roster]))
         """
-        p1_pieces = []
-        p2_pieces = []
+        p1_pieces = Roster()
+        p2_pieces = Roster()
         #player 1
         for row in range((self.dims - 2)//2):
             curr_row = self.dims - 1 - row
@@ -153,6 +401,7 @@ class Checkers:
                     piece = Piece(PieceColor.BLACK, curr_row, col, self)
                     p1_pieces.append(piece)
                     self.grid[curr_row][col] = piece
+                    self.engine.add(self.engine.square(curr_row, col), BLACK)
         #player 2
         for row in range((self.dims - 2)//2):
             for col in range(self.dims):
@@ -160,6 +409,7 @@ class Checkers:
                     piece = Piece(PieceColor.RED, row, col, self)
                     p2_pieces.append(piece)
                     self.grid[row][col] = piece
+                    self.engine.add(self.engine.square(row, col), RED)
         return (p1_pieces, p2_pieces)
     
 
@@ -218,6 +468,110 @@ class Checkers:
         return only_jumps
 
 
+    def _to_coords(self, paths):
+        """
+        Converts move sequences from the engine's bit indices to board
+        coordinates
+
+        Args:
+            paths (list(list(int))): move sequences as bit indices
+
+        Returns:
+            Move sequences as coordinates (list(list(tuple(int, int))))
+        """
+        coords = self.engine.coords
+        return [[coords[sq] for sq in path] for path in paths]
+
+
+    def _position_cache(self):
+        """
+        Gets the legal move cache of the current position, emptying it first
+        if the position has changed since it was filled
+
+        Args:
+            None
+
+        Returns:
+            The cache (dict)
+        """
+        if self._cache_version != self.engine.version:
+            self._legal_cache = {}
+            self._cache_version = self.engine.version
+        return self._legal_cache
+
+
+    def _piece_moves(self, piece):
+        """
+        Gets the (cached) legal moves of a single piece. Used by
+        Piece.get_legal_moves
+
+        Args:
+            piece (Piece): the piece
+
+        Returns:
+            List of legal move locations, including intermediates
+            (list(list(tuple(int, int)))
+        """
+        cache = self._position_cache()
+        key = (piece.row, piece.col)
+        if key not in cache:
+            cache[key] = self._to_coords(
+                self.engine.piece_paths(self.engine.square(*key)))
+        return cache[key]
+
+
+    def _side(self, piece):
+        """
+        Gets the engine side (BLACK or RED) of a piece
+
+        Args:
+            piece (Piece): the piece
+
+        Returns:
+            Side of the piece in the engine (int)
+        """
+        return BLACK if piece.color == self.p1_color else RED
+
+
+    def _player_moves(self, color):
+        """
+        Gets the cached legal moves of the given player color, which must
+        not be modified (see player_legal_moves())
+
+        Args:
+            color (PieceColor): Color of player (PieceColor.BLACK or
+            PieceColor.RED)
+
+        Returns:
+            The cached moves (list[tuple(Piece, list(list(tuple(int, int))))])
+        """
+        cache = self._position_cache()
+        if color in cache:
+            return cache[color]
+
+        legal_moves = []
+        if color == self.p1_color:
+            side, pieces = BLACK, self.p1
+        elif color == self.p2_color:
+            side, pieces = RED, self.p2
+        else:
+            return legal_moves
+
+        # Moves are generated by the engine, then matched back to the Pieces
+        # in the order of the player's list of pieces
+        paths = self.engine.player_paths(side)
+        coords = self.engine.coords
+        stride = self.dims + 1
+        for piece in pieces:
+            sq = (piece.row * stride + piece.col) // 2
+            if sq in paths:
+                legal_moves.append((piece, [[coords[s] for s in path]
+                                            for path in paths[sq]]))
+
+        cache[color] = legal_moves
+        return legal_moves
+
+
     #
     #PUBLIC METHODS
     #
@@ -261,22 +615,192 @@ class Checkers:
         Returns:
             A list of tuples. In each tuple, the first element is the piece to 
             move, and the second element is a list containing the move sequences 
-            (list[tuple(Piece, list(list(tuple(int, int))))])
+            (list[tuple(Piece, list(list(tuple(int, int))))]). The moves
+            are cached until the board changes; this is a copy, so callers
+            can modify it.
         """
-        legal_moves = []
+        return [(piece, [list(path) for path in paths])
+                for piece, paths in self._player_moves(color)]
+
+
+    def iter_legal_moves(self, color):
+        """
+        Generates the legal moves of the given player color one piece at a
+        time, in the same order as player_legal_moves(), so that callers that
+        only need the first few moves don't pay for the rest. The board must
+        not change while the generator is in use.
+
+        Args:
+            color (PieceColor): Color of player (PieceColor.BLACK or
+            PieceColor.RED)
+
+        Yields:
+            Tuples of a piece and its move sequences
+            (tuple(Piece, list(list(tuple(int, int)))))
+        """
+        cache = self._position_cache()
+        if color in cache:
+            for piece, paths in cache[color]:
+                yield piece, [list(path) for path in paths]
+            return
+
         if color == self.p1_color:
-            for piece in self.p1: 
-                if piece.get_legal_moves() != []:
-                    legal_moves.append((piece, piece.get_legal_moves()))
+            side, pieces = BLACK, self.p1
         elif color == self.p2_color:
-            for piece in self.p2:
-                if piece.get_legal_moves() != []:
-                    legal_moves.append((piece, piece.get_legal_moves()))
-        
-        if self._player_has_jump(legal_moves):
-            legal_moves = self._only_jumps(legal_moves)
+            side, pieces = RED, self.p2
+        else:
+            return
 
-        return legal_moves
+        # Only the pieces in the mask have legal moves: the pieces that can
+        # jump if there are any, and the pieces that can step otherwise
+        engine = self.engine
+        empty = engine.empty()
+        mask = engine.jumpers(side, empty) or engine.movers(side, empty)
+        stride = self.dims + 1
+        for piece in pieces:
+            if mask >> ((piece.row * stride + piece.col) // 2) & 1:
+                yield piece, [list(path) for path in self._piece_moves(piece)]
+
+
+    def has_legal_move(self, color):
+        """
+        Checks whether the given player color has any legal move. This only
+        looks at the engine's masks, so no moves are generated.
+
+        Args:
+            color (PieceColor): Color of player (PieceColor.BLACK or
+            PieceColor.RED)
+
+        Returns:
+            Whether the player can move (bool)
+        """
+        if color == self.p1_color:
+            return self.engine.has_moves(BLACK)
+        elif color == self.p2_color:
+            return self.engine.has_moves(RED)
+        return False
+
+
+    def attack_map(self, color):
+        """
+        Gets the attack map of the given player color: the squares of the
+        opponent's pieces it could capture on its next move. The map is
+        cached until the board changes, so checking whether a square is
+        attacked is a mask lookup.
+
+        Args:
+            color (PieceColor): Color of player (PieceColor.BLACK or
+            PieceColor.RED)
+
+        Returns:
+            Mask of the attacked squares, by engine bit index (see
+            BitboardEngine.square()) (int)
+        """
+        cache = self._position_cache()
+        key = ("attacks", color)
+        if key not in cache:
+            if color == self.p1_color:
+                cache[key] = self.engine.attacks(BLACK)
+            elif color == self.p2_color:
+                cache[key] = self.engine.attacks(RED)
+            else:
+                cache[key] = 0
+        return cache[key]
+
+
+    def hanging(self, color):
+        """
+        Gets the pieces of the given player color that the opponent could
+        capture on its next move
+
+        Args:
+            color (PieceColor): Color of player (PieceColor.BLACK or
+            PieceColor.RED)
+
+        Returns:
+            Mask of the hanging pieces, by engine bit index (see
+            BitboardEngine.square()) (int)
+        """
+        if color == self.p1_color:
+            return self.attack_map(self.p2_color)
+        elif color == self.p2_color:
+            return self.attack_map(self.p1_color)
+        return 0
+
+
+    def legal_move_codes(self, color):
+        """
+        Gets all the legal moves of the given player color as encoded moves
+        (see encode_move()). Capture sequences that start and end on the same
+        squares and capture the same pieces share an encoding, so there can
+        be fewer of these than moves in player_legal_moves().
+
+        Args:
+            color (PieceColor): Color of player (PieceColor.BLACK or
+            PieceColor.RED)
+
+        Returns:
+            Encoded moves, in the order of the player's pieces (list[int]).
+            The moves are cached until the board changes; this is a copy, so
+            callers can modify it.
+        """
+        cache = self._position_cache()
+        key = ("codes", color)
+        if key in cache:
+            return list(cache[key])
+
+        codes = []
+        if color == self.p1_color:
+            side, pieces = BLACK, self.p1
+        elif color == self.p2_color:
+            side, pieces = RED, self.p2
+        else:
+            return codes
+
+        moves = self.engine.player_moves(side)
+        stride = self.dims + 1
+        for piece in pieces:
+            sq = (piece.row * stride + piece.col) // 2
+            if sq in moves:
+                codes.extend(moves[sq])
+
+        cache[key] = codes
+        return list(codes)
+
+
+    def encode_move(self, piece, path):
+        """
+        Encodes a move as a single int holding the square the piece starts
+        on, the square it ends on and the mask of the captured pieces
+
+        Args:
+            piece (Piece): The piece to move
+            path (list(tuple(int, int))): Coordinates of steps in move
+
+        Returns:
+            The encoded move (int)
+        """
+        engine = self.engine
+        return engine.path_to_move(engine.square(piece.row, piece.col),
+                                   [engine.square(r, c) for r, c in path])
+
+
+    def decode_move(self, move):
+        """
+        Expands an encoded move back into the piece to move and its path. The
+        move must be legal in the current position.
+
+        Args:
+            move (int): The encoded move
+
+        Returns:
+            The piece to move and the coordinates of the steps in the move
+            (tuple(Piece, list(tuple(int, int))))
+        """
+        coords = self.engine.coords
+        row, col = coords[decode_move(move)[0]]
+        return self.grid[row][col], [coords[sq] for sq in
+                                     self.engine.move_to_path(move)]
 
 
     def get_winner(self):
@@ -292,10 +816,10 @@ class Checkers:
         Returns:
             Winner name (str)
         """ 
-        if not self.player_legal_moves(self.p1_color) and self.curr_player == 1:
+        if self.curr_player == 1 and not self.has_legal_move(self.p1_color):
             return "Red has won!"
-        elif not self.player_legal_moves(self.p2_color) and self.curr_player \
-        == 2:
+        elif self.curr_player == 2 and \
+            not self.has_legal_move(self.p2_color):
             return "Black has won!"
         elif self.draw_counter >= 79:
             return "It's a draw!"
@@ -322,11 +846,136 @@ class Checkers:
         return True
 
 
+    def zobrist_key(self):
+        """
+        Gets the 64-bit Zobrist hash of the position (pieces and side to
+        move). The engine updates it every time a piece moves, is captured or
+        is promoted, so this is O(1).
+
+        Args:
+            None
+
+        Returns:
+            Hash of the position (int)
+        """
+        if self.curr_player == 2:
+            return self.engine.key ^ self.engine.zobrist_side
+        return self.engine.key
+
+
+    def compute_zobrist_key(self):
+        """
+        Computes the Zobrist hash of the position from scratch, by going
+        through the whole grid. Should always be equal to zobrist_key().
+
+        Args:
+            None
+
+        Returns:
+            Hash of the position (int)
+        """
+        keys = self.engine.zobrist
+        key = 0
+        for row in self.grid:
+            for piece in row:
+                if piece is not None:
+                    sq = self.engine.square(piece.row, piece.col)
+                    kind = 2 * self._side(piece) + \
+                        (piece.type == PieceType.KING)
+                    key ^= keys[sq][kind]
+        if self.curr_player == 2:
+            key ^= self.engine.zobrist_side
+        return key
+
+
+    def make_move(self, piece, path):
+        """
+        Makes a move on the board (capturing and promoting as needed, and
+        passing the turn), and returns a record that unmake_move() can use
+        to take it back.
+
+        Args:
+            piece (Piece): The piece to move (can be None if path is an
+            encoded move)
+            path (list(tuple(int, int)) or int): Coordinates of steps in move,
+            or the encoded move (see encode_move())
+
+        Returns:
+            Undo record of the move (tuple)
+        """
+        if isinstance(path, int):
+            piece, path = self.decode_move(path)
+
+        captured = []
+        record = (piece, piece.row, piece.col, piece.type, captured,
+                  self.curr_player, self.draw_counter, self.move_counter)
+
+        #move the piece, remembering the captured pieces
+        for loc in path:
+            if piece._is_jump(loc):
+                captured.append(self.grid[(piece.row + loc[0]) // 2]
+                                [(piece.col + loc[1]) // 2])
+            piece._step(loc)
+
+        # change the turn
+        if piece.color == self.p1_color:
+            self.curr_player = 2
+        else:
+            self.curr_player = 1
+        if captured:
+            self.draw_counter = 0
+        else:
+            self.draw_counter += 1
+
+        #add to move counter
+        self.move_counter += 1
+        return record
+
+
+    def unmake_move(self, record):
+        """
+        Takes back a move made with make_move(). Moves must be taken back in
+        the reverse order they were made.
+
+        Args:
+            record (tuple): Undo record returned by make_move()
+
+        Returns None
+        """
+        piece, row, col, piece_type, captured, curr_player, draw_counter, \
+            move_counter = record
+        engine = self.engine
+
+        #put the piece back where it started, as it was
+        self.grid[piece.row][piece.col] = None
+        engine.remove(engine.square(piece.row, piece.col))
+        piece.row = row
+        piece.col = col
+        piece.type = piece_type
+        self.grid[row][col] = piece
+        engine.add(engine.square(row, col), self._side(piece),
+                   piece_type == PieceType.KING)
+
+        #put back the captured pieces, in their original place in the rosters
+        for victim in reversed(captured):
+            pieces = self.p1 if victim.color == self.p1_color else self.p2
+            pieces.restore(victim)
+            self.grid[victim.row][victim.col] = victim
+            engine.add(engine.square(victim.row, victim.col),
+                       self._side(victim), victim.type == PieceType.KING)
+
+        self.curr_player = curr_player
+        self.draw_counter = draw_counter
+        self.move_counter = move_counter
+
+
 class Piece:
     """
     Class for representing a Piece
     """
 
+    __slots__ = ("color", "col", "row", "type", "game", "_index")
+
     def __init__(self, color, row, col, game, type = PieceType.PIECE):
         """
         Constructor
@@ -350,9 +999,12 @@ class Piece:
         #PieceType: The type of piece it is
         self.type = type
 
-        #list[list[Optional[Piece]]]: The board itself
+        #Checkers: The game the piece belongs to
         self.game = game
 
+        #Optional[int]: Index of the piece in its player's Roster
+        self._index = None
+
 
     def __repr__(self):
         """
@@ -378,27 +1030,13 @@ class Piece:
         Returns None
         """
         self.game.grid[self.row][self.col] = None
-        if self in self.game.p1: 
+        self.game.engine.remove(self.game.engine.square(self.row, self.col))
+        if self.color == self.game.p1_color:
             self.game.p1.remove(self)
         else:
             self.game.p2.remove(self)
     
     
-    def _phantom_step(self, location):
-        """
-        Used purely in DFS, to change the coordinates and type without 
-        affecting the main board.
-
-        Args:
-            location: location to move to (tuple(int, int))
-        
-        returns None
-        """
-        r, c = location
-        self.row = r
-        self.col = c
-    
-
     def _temporary_step(self, location):
         """
         Used purely in DFS, to change the coordinates and type that does 
@@ -410,9 +1048,11 @@ class Piece:
         returns None
         """
         r, c = location
+        engine = self.game.engine
 
         self.game.board.board[r][c] = self
         self.game.board.board[self.row][self.col] = None
+        engine.relocate(engine.square(self.row, self.col), engine.square(r, c))
 
         self.row = r
         self.col = c
@@ -436,6 +1076,8 @@ class Piece:
             piece._remove_piece()
         #remove old location
         self.game.grid[self.row][self.col] = None
+        engine = self.game.engine
+        engine.relocate(engine.square(self.row, self.col), engine.square(r, c))
         #change within board 
         self.row = r
         self.col = c
@@ -444,6 +1086,7 @@ class Piece:
         #change to king type once it reaches the ends of the board
         if r == 0 or r == self.game.dims - 1:
             self.type = PieceType.KING
+            engine.crown(engine.square(r, c))
     
 
     def _is_jump(self, location):
@@ -469,7 +1112,8 @@ class Piece:
         and updates information on board
 
         Args:
-            location (List(tuple(int,int))): Coordinates of steps in move
+            location (List(tuple(int,int)) or int): Coordinates of steps in
+            move, or the encoded move (see Checkers.encode_move())
             color (PieceColor): The color making the move
 
         Raise:
@@ -478,164 +1122,46 @@ class Piece:
 
         Returns None
         """  
-        total_p1_pieces = len(self.game.p1)
-        total_p2_pieces = len(self.game.p2)
-        
-        #move the piece, removing pieces along the way
-        for loc in location:
-            self._step(loc) 
-          
-        # change the turn 
-        if self.color == PieceColor.BLACK:
-            self.game.curr_player = 2
-            if len(self.game.p2) < total_p2_pieces:
-                self.game.draw_counter = 0
-            else:
-                self.game.draw_counter += 1
-
-        if self.color == PieceColor.RED:
-            self.game.curr_player = 1
-            if len(self.game.p1) < total_p1_pieces:
-                self.game.draw_counter = 0
-            else:
-                self.game.draw_counter += 1
-
-        #add to move counter
-        self.game.move_counter += 1
+        self.game.make_move(self, location)
 
 
     def get_legal_moves(self):
         """ 
         Returns list of list of tuples, representing each location that is a 
-        legal move
+        legal move. If the piece can jump, only the jump sequences are legal.
 
         Args:
-            enemies_captured (list): list of enemies captured thus far
+            None
 
         Raise:
             None
 
         Returns: 
             List of legal move locations, including intermediates
-            (list(list(tuple(int, int)))
+            (list(list(tuple(int, int))). The moves are cached until the
+            board changes; this is a copy, so callers can modify it.
         """
-        movable_loc = []
-        contains_jump = False
-        if self.type == PieceType.PIECE:
-            if self.color == PieceColor.BLACK:
-                direction = [(-1, -1), (-1, 1)]
-            if self.color == PieceColor.RED:
-                direction = [(1, -1), (1, 1)]
-        else:
-            direction = [(1, -1), (1, 1), (-1, -1), (-1, 1)]
-
-        for dir in direction:
-            dr, dc = dir
-            neighbor_c = self.col + dc
-            neighbor_r = self.row + dr
-            
-            #if "neighbor" is out of board, skip to next direction
-            if (neighbor_c >= self.game.dims or neighbor_c < 0) or \
-                (neighbor_r >= self.game.dims or neighbor_r < 0):
-                continue
-            neighbor = self.game.grid[neighbor_r][neighbor_c]
-
-            #if neighbor is enemy tile 
-            if neighbor is not None and neighbor.color != self.color:
-                #if next tile is within board
-                if (neighbor_c + dc >= self.game.dims or neighbor_c + dc < 0) \
-                or (neighbor_r + dr >= self.game.dims or neighbor_r + dr < 0):
-                    continue
-                next_tile = self.game.grid[neighbor_r + dr][neighbor_c + dc]  
-                #recursive case: enemy neighbor + empty tile in that direction, initialise jump
-                if next_tile is None:
-                    contains_jump = True
-                    for move in self.legal_move_dfs(direction, set()):
-                        movable_loc.append(move)
-            elif neighbor is None:
-                movable_loc.append([(neighbor_r, neighbor_c)])
-        
-        if contains_jump:
-            movable_loc = self.only_jumps(movable_loc)
-
-        return movable_loc
+        return [list(path) for path in self.game._piece_moves(self)]
     
     
-    def legal_move_dfs(self, direction, enemies_captured = set()):
+    def capture_tree(self):
         """
-        DFS to find the jumps in a jump sequence
+        Gets every capture sequence of the piece as a tree, without moving
+        anything on the board. See BitboardEngine.capture_tree() for the
+        format; squares are engine bit indices (game.engine.coords maps them
+        back to coordinates), and bitboard.flatten_captures() lists the
+        sequences.
 
         Args:
-            direction(list)
+            None
 
         Returns:
-            List of movable locations from the piece's current location
-            (list(list(tuple(int, int)))
-
+            Root node of the capture tree, empty if the piece cannot capture
+            (tuple)
         """
-        og_c = self.col
-        og_r = self.row
-        movable_loc = []
-
-        #begin DFS
-        for dir in direction:
-            dr, dc = dir
-            neighbor_c = self.col + dc
-            neighbor_r = self.row + dr
-
-            #if "neighbor" is out of board, skip to next direction
-            if (neighbor_c >= self.game.dims or neighbor_c < 0) or \
-                (neighbor_r >= self.game.dims or neighbor_r < 0):
-                continue
-            neighbor = self.game.grid[neighbor_r][neighbor_c]
-
-            #case 1: enemy neighbor
-            if neighbor is not None and neighbor.color != self.color:
-                if (neighbor_c + dc >= self.game.dims or neighbor_c + dc < 0) or \
-                (neighbor_r + dr >= self.game.dims or neighbor_r + dr < 0):
-                    continue
-                next_tile = self.game.grid[neighbor_r + dr][neighbor_c + dc]  
-
-                #case 1b: enemy neighbor + empty tile in that direction, (phantom) jump!
-                if next_tile is None and neighbor not in enemies_captured:
-                    enemies_captured.add(neighbor)
-
-                    #self phantom steps there, then recurse
-                    self._phantom_step((neighbor_r + dr, neighbor_c + dc))
-                    to_add = [(neighbor_r + dr, neighbor_c + dc)]
-                    e_c2 = enemies_captured
-                    curr_len = len(movable_loc)
-                    for move in self.legal_move_dfs(direction, e_c2):
-                        movable_loc.append(to_add + move)
-                    if curr_len == len(movable_loc):
-                        movable_loc.append(to_add)
-                    self.col = og_c
-                    self.row = og_r
-
-            #case 2: no way to move/no more jumps, skip that neighbor
-        return movable_loc
-    
-
-    def only_jumps(self, movable_loc):
-        """
-        Removes all non jumps from a list of moves
-        
-        Args:
-            movable_loc: List(List(tuple): List of legal move locations, 
-            including intermediates
+        engine = self.game.engine
+        return engine.capture_tree(engine.square(self.row, self.col))
 
-        Returns: 
-            List of legal move locations, including intermediates, without jumps
-            (list(list(tuple(int, int)))
-        """
-
-        new_list = []
-        for move in movable_loc:
-            r, c = move[0]
-            if abs(self.row - r) > 1 and abs(self.col - c) > 1:
-                new_list.append(move)
-        return new_list
-    
 
     def is_legal_move(self, move): 
         """ 
@@ -648,4 +1174,4 @@ class Piece:
         Returns:
             If the move is legal (bool)
         """
-        return move in self.get_legal_moves()
+        return move in self.game._piece_moves(self)
@@ -0,0 +1,164 @@
+"""
+Static evaluation of Checkers positions, for the search bots.
+
+A position is scored as a weighted sum of features, each one the difference
+between the side to move and its opponent, so that a positive score means
+the side to move is ahead. Mobility counts the steps (not captures) a side
+could play.
+
+batch_eval.py scores whole batches of positions at once with NumPy, with the
+same features and weights.
+
+Weights can be saved to a weights file (a small JSON object mapping each
+feature's name to its weight), which is what tune.py writes after fitting
+them to self-play games, and the search bots load.
+
+Examples:
+    1) Score a game's position for the player whose turn it is::
+        side = BLACK if game.curr_player == 1 else RED
+        evaluate(game.engine, side)
+
+    2) Get the features the score is made of::
+        features(game.engine, side)
+
+    3) Score with the weights of a weights file::
+        evaluate(game.engine, side, load_weights("weights.json"))
+"""
+
+import json
+
+# tuple(str): Names of the features, in the order features() returns them
+FEATURES = ("men", "kings", "back_row", "center", "advance", "mobility")
+
+# tuple(int): Default weight of each feature, in centi-men
+WEIGHTS = (100, 150, 8, 6, 2, 1)
+
+# dict[int, tuple]: Evaluation masks for each board dimension (see
+# eval_masks())
+_MASKS = {}
+
+
+def eval_masks(dims):
+    """
+    Gets the masks used by the evaluation for a board size. They are built
+    once per board size and shared.
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+
+    Returns:
+        Tuple of the back row mask of each side (list[int]), the center mask
+        (int), and the rows a man of each side on each row has advanced, as a
+        list of (mask, rows) pairs for each side
+        (tuple(list[int], int, list[list[tuple(int, int)]]))
+    """
+    if dims not in _MASKS:
+        rows = [0] * dims
+        center = 0
+        margin = dims // 4
+        for r in range(dims):
+            for c in range(dims):
+                if (r + c) % 2 != 0:
+                    bit = 1 << ((r * (dims + 1) + c) // 2)
+                    rows[r] |= bit
+                    if margin <= r < dims - margin and \
+                        margin <= c < dims - margin:
+                        center |= bit
+        # Black starts at the bottom of the board and moves up
+        back = [rows[dims - 1], rows[0]]
+        advance = [[(rows[r], dims - 1 - r) for r in range(dims - 1)],
+                   [(rows[r], r) for r in range(1, dims)]]
+        _MASKS[dims] = (back, center, advance)
+    return _MASKS[dims]
+
+
+def side_features(engine, side):
+    """
+    Counts the features of one side
+
+    Args:
+        engine (BitboardEngine): engine with the position
+        side (int): BLACK or RED
+
+    Returns:
+        Value of each feature in FEATURES for that side (list[int])
+    """
+    back, center, advance = eval_masks(engine.dims)
+    pieces = engine.pieces[side]
+    kings = pieces & engine.kings
+    men = pieces & ~kings
+    advanced = 0
+    for mask, rows in advance[side]:
+        if men & mask:
+            advanced += (men & mask).bit_count() * rows
+    return [men.bit_count(), kings.bit_count(), (men & back[side]).bit_count(),
+            (pieces & center).bit_count(), advanced, engine.count_steps(side)]
+
+
+def features(engine, side):
+    """
+    Gets the features of a position from the point of view of one side
+
+    Args:
+        engine (BitboardEngine): engine with the position
+        side (int): BLACK or RED
+
+    Returns:
+        Difference between the side's and its opponent's value of each
+        feature in FEATURES (list[int])
+    """
+    own = side_features(engine, side)
+    other = side_features(engine, 1 - side)
+    return [a - b for a, b in zip(own, other)]
+
+
+def evaluate(engine, side, weights=WEIGHTS):
+    """
+    Scores a position from the point of view of one side
+
+    Args:
+        engine (BitboardEngine): engine with the position
+        side (int): BLACK or RED
+        weights (tuple(int)): weight of each feature in FEATURES
+
+    Returns:
+        The score, positive if the side is ahead (int)
+    """
+    return sum(w * f for w, f in zip(weights, features(engine, side)))
+
+
+def load_weights(path):
+    """
+    Reads a weights file
+
+    Args:
+        path (str): Path of the weights file
+
+    Returns:
+        Weight of each feature in FEATURES (tuple(int))
+
+    Raises:
+        ValueError: if the file doesn't have exactly the features in FEATURES
+    """
+    with open(path) as f:
+        named = json.load(f)
+    if not isinstance(named, dict) or set(named) != set(FEATURES):
+        raise ValueError(f"{path} should have a weight for each of "
+                         f"{', '.join(FEATURES)}")
+    return tuple(int(named[name]) for name in FEATURES)
+
+
+def save_weights(path, weights):
+    """
+    Writes a weights file
+
+    Args:
+        path (str): Path of the weights file
+        weights (tuple(int)): weight of each feature in FEATURES
+
+    Returns None
+    """
+    with open(path, "w") as f:
+        json.dump(dict(zip(FEATURES, (int(w) for w in weights))), f,
+                  indent=4)
+        f.write("\n")
@@ -0,0 +1,186 @@
+"""
+Connected groups of pieces, for the bots.
+
+Two pieces of the same side are connected if they stand on diagonally
+neighbouring squares, and a group is a set of pieces connected to each other
+through pieces of the group. PieceGroups finds the groups of a side with one
+depth-first search (without recursion, so big boards are fine), and keeps
+enough of it to say how big the groups would be after any move without
+looking at the whole board again.
+
+When a piece leaves its square, its group splits along the search tree: each
+child of the piece in the tree that has no link above the piece (its "low"
+number is not smaller than the piece's number) takes its subtree away as a
+group of its own, and the rest of the group stays together. Subtrees are
+ranges of numbers in a depth-first search, so finding which part a
+neighbouring piece ends up in is a comparison.
+
+Examples:
+    1) Size of the biggest group of black pieces::
+        PieceGroups(game.engine, BLACK).largest
+
+    2) Size of the biggest group after moving the black piece on square frm
+    to square to::
+        PieceGroups(game.engine, BLACK).largest_after_move(frm, to)
+"""
+
+from bitboard import KING, bits
+
+
+class PieceGroups:
+    """
+    Class for the connected groups of a side's pieces
+    """
+
+    def __init__(self, engine, side):
+        """
+        Constructor
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): BLACK or RED
+        """
+        n = len(engine.coords)
+        neighbours = engine.steps[KING]
+        own = engine.pieces[side]
+        self._neighbours = neighbours
+        self._own = own
+
+        # list[int]: For each piece's square, its group, its number in the
+        # search, the lowest number it links to through its subtree, the
+        # size of its subtree and its parent in the search tree (-1 if none)
+        group = self._group = [-1] * n
+        order = self._order = [-1] * n
+        low = self._low = [0] * n
+        subtree = self._subtree = [0] * n
+        parent = self._parent = [-1] * n
+
+        # list[int]: Size of each group
+        self.sizes = []
+
+        count = 0
+        for root in bits(own):
+            if order[root] >= 0:
+                continue
+            g = len(self.sizes)
+            group[root] = g
+            order[root] = low[root] = count
+            count += 1
+            stack = [(root, iter(neighbours[root]))]
+            while stack:
+                sq, todo = stack[-1]
+                for other in todo:
+                    if not own >> other & 1:
+                        continue
+                    if order[other] < 0:
+                        group[other] = g
+                        order[other] = low[other] = count
+                        count += 1
+                        parent[other] = sq
+                        stack.append((other, iter(neighbours[other])))
+                        break
+                    if other != parent[sq] and order[other] < low[sq]:
+                        low[sq] = order[other]
+                else:
+                    stack.pop()
+                    subtree[sq] += 1
+                    up = parent[sq]
+                    if up >= 0:
+                        subtree[up] += subtree[sq]
+                        if low[sq] < low[up]:
+                            low[up] = low[sq]
+            self.sizes.append(subtree[root])
+
+        # int: Size of the biggest group
+        self.largest = max(self.sizes, default=0)
+
+        # list[int]: The two biggest groups (-1 if there aren't that many)
+        ranked = sorted(range(len(self.sizes)), key=self.sizes.__getitem__,
+                        reverse=True)
+        self._top = (ranked + [-1, -1])[:2]
+
+
+    #
+    #PRIVATE METHODS
+    #
+    def _split(self, sq):
+        """
+        Gets the parts a piece's group splits into when the piece leaves
+
+        Args:
+            sq (int): bit index of the piece
+
+        Returns:
+            The parts cut off with a subtree, as (first number, size) pairs,
+            and the size of the rest of the group
+            (tuple(list[tuple(int, int)], int))
+        """
+        order = self._order
+        parts = []
+        for other in self._neighbours[sq]:
+            if self._own >> other & 1 and self._parent[other] == sq and \
+                self._low[other] >= order[sq]:
+                parts.append((order[other], self._subtree[other]))
+        rest = self.sizes[self._group[sq]] - 1 - \
+            sum(size for _, size in parts)
+        return parts, rest
+
+
+    #
+    #PUBLIC METHODS
+    #
+    def group_size(self, sq):
+        """
+        Gets the size of a piece's group
+
+        Args:
+            sq (int): bit index of the piece
+
+        Returns:
+            Number of pieces in the group (int)
+        """
+        return self.sizes[self._group[sq]]
+
+
+    def largest_after_move(self, frm, to):
+        """
+        Gets the size of the biggest group there would be after a piece
+        moves (nothing else on the board changes)
+
+        Args:
+            frm (int): bit index of the piece
+            to (int): bit index of the square it moves to (empty, or frm)
+
+        Returns:
+            Size of the biggest group (int)
+        """
+        g = self._group[frm]
+        parts, rest = self._split(frm)
+
+        # The biggest group left behind: another group, or a part of this one
+        first, second = self._top
+        other = second if first == g else first
+        best = self.sizes[other] if other >= 0 else 0
+        best = max([best, rest] + [size for _, size in parts])
+
+        # The groups the piece joins on its new square
+        joined = set()
+        size = 1
+        for other in self._neighbours[to]:
+            if not self._own >> other & 1 or other == frm:
+                continue
+            if self._group[other] != g:
+                key = self._group[other]
+                part_size = self.sizes[key]
+            else:
+                key = -1
+                part_size = rest
+                for i, (start, length) in enumerate(parts):
+                    if start <= self._order[other] < start + length:
+                        key = -2 - i
+                        part_size = length
+                        break
+            if key not in joined:
+                joined.add(key)
+                size += part_size
+        return max(best, size)
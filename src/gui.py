@@ -23,7 +23,8 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame
 import click
 
-from bot import RandomBot, SmartBot
+from bot import RandomBot, SmartBot, SearchBot, MCTSBot
+from evaluate import WEIGHTS, load_weights
 from mocks import PieceColor, PieceType, CheckersMock, CheckersStub
 from checkers import Checkers
 
@@ -52,19 +53,31 @@ class GUIPlayer:
     """
 
     name: str
-    bot: Union[None, RandomBot, SmartBot]
+    bot: Union[None, RandomBot, SmartBot, SearchBot, MCTSBot]
     board: CheckersType
     color: PieceColor
 
     def __init__(self, n: int, player_type: str, board: CheckersType,
-                 color: PieceColor) -> None:
+                 color: PieceColor, search_time: float = 1.0,
+                 workers: int = 1, weights: tuple = WEIGHTS,
+                 ponder: bool = True) -> None:
         """ Constructor
 
         Args:
             n: int: The player's number (1 or 2)
-            player_type: str: "human", "random-bot", or "smart-bot"
+            player_type: str: "human", "random-bot", "smart-bot",
+              "search-bot" or "mcts-bot"
             board: CheckersType: The Checkers board
             color: PieceColor: The player's color
+            search_time: float: When playing as a search-bot or mcts-bot,
+              the time (in seconds) the bot thinks about each move
+            workers: int: When playing as a search-bot or mcts-bot, the
+              number of processes the bot thinks on
+            weights: tuple: When playing as a search-bot, the weights of
+              its evaluation (see evaluate.py)
+            ponder: bool: When playing as a search-bot or mcts-bot, whether
+              the bot thinks in the background while it waits (during the
+              bot delay, and while a human player thinks)
         """
         player_color = {1: PieceColor.BLACK, 2: PieceColor.RED}
 
@@ -77,8 +90,16 @@ class GUIPlayer:
         elif player_type == "smart-bot":
             self.name = f"Smart Bot {n}"
             self.bot = SmartBot(board, player_color[n])
+        elif player_type == "search-bot":
+            self.name = f"Search Bot {n}"
+            self.bot = SearchBot(board, player_color[n], search_time,
+                                 workers=workers, weights=weights)
+        elif player_type == "mcts-bot":
+            self.name = f"MCTS Bot {n}"
+            self.bot = MCTSBot(board, player_color[n], search_time, workers)
         self.board = board
         self.color = color
+        self.ponder = ponder and player_type in ("search-bot", "mcts-bot")
 
 
 class GameInterface:
@@ -381,6 +402,15 @@ def checkers(Checkers_board: CheckersType, players: Dict[tuple, GUIPlayer],
         if current.bot is not None:
             piece, moves = current.bot.suggest_move()
             Game.select_move((piece.row, piece.col), current, moves)
+
+            # Think in the background during the bot delay: the next player
+            # if it is a bot, or else this bot while the human thinks
+            other = players[PieceColor.RED if current.color == \
+                PieceColor.BLACK else PieceColor.BLACK]
+            if other.ponder:
+                other.bot.ponder()
+            elif current.ponder and other.bot is None:
+                current.bot.ponder()
         
         move_made = Game.update()
 
@@ -391,6 +421,10 @@ def checkers(Checkers_board: CheckersType, players: Dict[tuple, GUIPlayer],
             elif current.color == PieceColor.RED:
                 current = players[PieceColor.BLACK]
     
+    for player in players.values():
+        if player.ponder:
+            player.bot.stop_pondering()
+
     # Print the winner (on the terminal)
     winner = Checkers_board.get_winner()
     print(winner)
@@ -407,17 +441,29 @@ def checkers(Checkers_board: CheckersType, players: Dict[tuple, GUIPlayer],
 @click.option('--board-size', type = click.INT, default=3)
 
 @click.option('--player1',
-                type=click.Choice(['human', 'random-bot', 'smart-bot'], \
-                case_sensitive=False), default="human")
+                type=click.Choice(['human', 'random-bot', 'smart-bot', \
+                'search-bot', 'mcts-bot'], case_sensitive=False),
+                default="human")
 
 @click.option('--player2',
-                type=click.Choice(['human', 'random-bot', 'smart-bot'], \
-                case_sensitive=False), default="human")
+                type=click.Choice(['human', 'random-bot', 'smart-bot', \
+                'search-bot', 'mcts-bot'], case_sensitive=False),
+                default="human")
 
 @click.option('--bot-delay', type=click.FLOAT, default=0.5)
 
+@click.option('--search-time', type=click.FLOAT, default=1.0)
+
+@click.option('--workers', type=click.INT, default=1)
+
+@click.option('--weights', type=click.Path(exists=True, dir_okay=False),
+              default=None)
+
+@click.option('--ponder/--no-ponder', default=True)
+
 
-def cmd(mode, board_size, player1, player2, bot_delay):
+def cmd(mode, board_size, player1, player2, bot_delay, search_time, workers,
+        weights, ponder):
     if mode == "real": 
         Checkers_board = Checkers(board_size)
     elif mode == "stub":
@@ -425,8 +471,11 @@ def cmd(mode, board_size, player1, player2, bot_delay):
     elif mode == "mock":
         Checkers_board = CheckersMock(board_size)
 
-    player1 = GUIPlayer(1, player1, Checkers_board, PieceColor.BLACK)
-    player2 = GUIPlayer(2, player2, Checkers_board, PieceColor.RED)
+    weights = WEIGHTS if weights is None else load_weights(weights)
+    player1 = GUIPlayer(1, player1, Checkers_board, PieceColor.BLACK,
+                        search_time, workers, weights, ponder)
+    player2 = GUIPlayer(2, player2, Checkers_board, PieceColor.RED,
+                        search_time, workers, weights, ponder)
 
     players = {PieceColor.BLACK: player1, PieceColor.RED: player2}
 
@@ -0,0 +1,392 @@
+"""
+Monte-Carlo tree search for the Checkers bots.
+
+The search grows a game tree one node at a time: it walks down the tree
+choosing moves with UCT (the upper confidence bound of each move's win
+rate), adds a node for one move that hasn't been tried yet, and finishes
+the game from there with random moves (a playout, like RandomBot). The
+result of the playout is then added to every node on the way back up. After
+the time for the move runs out, the most visited move is played.
+
+Playouts can run in a pool of worker processes (shared with the parallel
+search, see parallel.py): a batch of leaves is picked at once (each pick
+counts as a lost visit until its playouts come back, so that the picks
+spread out over the tree), their positions are sent to the workers as plain
+masks, and the results are added to the tree when they come back.
+
+The tree is kept between turns: when the opponent's reply was already in
+the tree, its node becomes the new root. grow() adds to the tree without
+choosing a move, e.g. while the opponent thinks (see ponder.py), and a
+search can be stopped from another thread by setting its stop_event. The
+tree stops growing once it has max_nodes nodes (each takes about 750
+bytes), so a search with no time limit can't run out of memory.
+
+Examples:
+    1) Search a game's position for one second, with 4 worker processes::
+        tree = MCTS(workers=4)
+        side = BLACK if game.curr_player == 1 else RED
+        move = tree.best_move(game.engine, side, game.draw_counter, 1.0)
+"""
+
+import math
+import random
+import time
+
+from bitboard import BLACK, RED
+from parallel import get_pool, get_engine
+from search import DRAW_MOVES, CAPTURED
+
+# int: Playouts longer than this many plies are scored as draws
+MAX_PLAYOUT = 500
+
+# float: Default UCT exploration constant
+EXPLORATION = 1.4
+
+# int: Default most nodes in a tree (about 150 MB)
+MAX_NODES = 200000
+
+def playout(engine, side, quiet, rng):
+    """
+    Finishes a game with random moves
+
+    Args:
+        engine (BitboardEngine): engine with the position. It is changed.
+        side (int): side to move (BLACK or RED)
+        quiet (int): moves already played without a capture
+        rng (random.Random): random number generator
+
+    Returns:
+        The winner (BLACK or RED), or None for a draw (Optional[int])
+    """
+    for _ in range(MAX_PLAYOUT):
+        moves = engine.legal_moves(side)
+        if not moves:
+            return 1 - side
+        if quiet >= DRAW_MOVES:
+            return None
+        move = rng.choice(moves)
+        engine.make(move)
+        quiet = 0 if move >> CAPTURED else quiet + 1
+        side = 1 - side
+    return None
+
+
+def _playouts(dims, state, n, seed):
+    """
+    Runs playouts from a position, in a worker process
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+        state (tuple(int, int, int, int, int)): the black pieces, red pieces
+        and kings masks, the side to move and the moves played without a
+        capture
+        n (int): number of playouts
+        seed (int): seed of the random number generator
+
+    Returns:
+        Black wins, red wins and draws (tuple(int, int, int))
+    """
+    black, red, kings, side, quiet = state
+    rng = random.Random(seed)
+    results = [0, 0, 0]
+    for _ in range(n):
+        engine = get_engine(dims, black, red, kings)
+        winner = playout(engine, side, quiet, rng)
+        results[2 if winner is None else winner] += 1
+    return tuple(results)
+
+
+class Node:
+    """
+    Class for a node of the search tree: a position, reached by a move
+    """
+
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins",
+                 "side", "quiet", "key", "winner", "size")
+
+    def __init__(self, move, parent, engine, side, quiet):
+        """
+        Constructor
+
+        Args:
+            move (Optional[int]): encoded move leading to the node (None for
+            the root)
+            parent (Optional[Node]): parent node
+            engine (BitboardEngine): engine with the node's position
+            side (int): side to move
+            quiet (int): moves played without a capture
+        """
+        self.move = move
+        self.parent = parent
+        # dict[int, Node]: Children of the node, by move
+        self.children = {}
+        self.side = side
+        self.quiet = quiet
+        # int: Hash of the position (with the side to move)
+        self.key = engine.key ^ engine.zobrist_side if side == RED \
+            else engine.key
+        # int: Number of playouts through the node
+        self.visits = 0
+        # float: Playouts won by the side that moved into the node (draws
+        # count as half a win)
+        self.wins = 0.0
+        # Optional[int]: The winner if the game is over at the node (None
+        # for a draw), or -1 if it is not over
+        self.winner = -1
+        # int: Number of nodes in the node's subtree (itself included)
+        self.size = 1
+
+        # list[int]: Moves that have no node yet
+        self.untried = engine.legal_moves(side)
+        if not self.untried:
+            self.winner = 1 - side
+        elif quiet >= DRAW_MOVES:
+            self.untried = []
+            self.winner = None
+
+
+    def select(self, exploration):
+        """
+        Picks the child with the highest UCT score
+
+        Args:
+            exploration (float): UCT exploration constant
+
+        Returns:
+            The child (Node)
+        """
+        log_visits = math.log(self.visits)
+        best = None
+        best_score = -1.0
+        for child in self.children.values():
+            score = child.wins / child.visits + \
+                exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+
+class MCTS:
+    """
+    Class for Monte-Carlo tree searches. An MCTS object keeps its tree
+    between moves, so it should be reused for every move of a game.
+    """
+
+    def __init__(self, workers=1, exploration=EXPLORATION, batch_playouts=4,
+                 seed=None, max_nodes=MAX_NODES):
+        """
+        Constructor
+
+        Args:
+            workers (int): number of worker processes running playouts (1 to
+            run them in this process)
+            exploration (float): UCT exploration constant
+            batch_playouts (int): playouts run for each leaf sent to a worker
+            seed (Optional[int]): seed of the random number generator
+            max_nodes (int): most nodes in the tree: searches stop once the
+            tree under the root has this many
+        """
+        self.workers = workers
+        self.exploration = exploration
+        self.batch_playouts = batch_playouts
+        self.rng = random.Random(seed)
+        self.max_nodes = max_nodes
+
+        # Optional[Node]: Root of the tree
+        self.root = None
+
+        # int: Playouts run by the last search
+        self.playouts = 0
+
+        # Optional[threading.Event]: Stops the search when it is set (from
+        # another thread, see ponder.py)
+        self.stop_event = None
+
+
+    #
+    #PRIVATE METHODS
+    #
+    def _set_root(self, engine, side, quiet):
+        """
+        Makes the node of a position the root of the tree, reusing the
+        current tree if the position is the root or one of its children
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move
+            quiet (int): moves played without a capture
+
+        Returns None
+        """
+        key = engine.key ^ engine.zobrist_side if side == RED else engine.key
+        root = self.root
+        if root is not None and not (root.key == key and root.side == side):
+            root = next((child for child in root.children.values()
+                         if child.key == key and child.side == side), None)
+        if root is None:
+            root = Node(None, None, engine, side, quiet)
+        root.parent = None
+        root.move = None
+        self.root = root
+
+
+    def _descend(self, engine):
+        """
+        Walks down the tree from the root with UCT, and adds a node for an
+        untried move. Every node on the way gets a (virtual) lost visit,
+        which _backpropagate() turns into the real result.
+
+        Args:
+            engine (BitboardEngine): engine with the root's position. The
+            moves on the way are played on it.
+
+        Returns:
+            The new leaf (or a node where the game is over) (Node)
+        """
+        node = self.root
+        node.visits += 1
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+            engine.make(node.move)
+            node.visits += 1
+        if node.untried:
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            engine.make(move)
+            child = Node(move, node, engine, 1 - node.side,
+                         0 if move >> CAPTURED else node.quiet + 1)
+            node.children[move] = child
+            parent = node
+            while parent is not None:
+                parent.size += 1
+                parent = parent.parent
+            node = child
+            node.visits += 1
+        return node
+
+
+    def _backpropagate(self, node, results):
+        """
+        Adds playout results to a leaf and every node above it
+
+        Args:
+            node (Node): the leaf
+            results (tuple(int, int, int)): black wins, red wins and draws
+
+        Returns None
+        """
+        n = sum(results)
+        self.playouts += n
+        while node is not None:
+            node.visits += n - 1
+            node.wins += results[1 - node.side] + 0.5 * results[2]
+            node = node.parent
+
+
+    def _leaf_results(self, node, n):
+        """
+        Gets the results of a node where the game is over, as if n playouts
+        had been run from it
+
+        Args:
+            node (Node): the node
+            n (int): number of playouts
+
+        Returns:
+            Black wins, red wins and draws (tuple(int, int, int))
+        """
+        results = [0, 0, 0]
+        results[2 if node.winner is None else node.winner] = n
+        return tuple(results)
+
+
+    #
+    #PUBLIC METHODS
+    #
+    def grow(self, engine, side, draw_counter, time_limit=None):
+        """
+        Adds to the tree of a position until the time runs out, the stop
+        event is set or the tree is full (see max_nodes), without choosing a
+        move
+
+        Args:
+            engine (BitboardEngine): engine with the position (it is not
+            changed)
+            side (int): side to move (BLACK or RED)
+            draw_counter (int): moves already played without a capture
+            time_limit (Optional[float]): seconds to search for (None to
+            search until the stop event is set)
+
+        Returns None
+        """
+        self._set_root(engine, side, draw_counter)
+        self.playouts = 0
+        deadline = None if time_limit is None else \
+            time.perf_counter() + time_limit
+        stop = self.stop_event
+        pool = get_pool(self.workers) if self.workers > 1 else None
+        while (deadline is None or time.perf_counter() < deadline) and \
+            not (stop is not None and stop.is_set()) and \
+            self.root.size < self.max_nodes:
+            if pool is None:
+                work = engine.copy()
+                node = self._descend(work)
+                if node.winner != -1:
+                    self._backpropagate(node, self._leaf_results(node, 1))
+                else:
+                    winner = playout(work, node.side, node.quiet, self.rng)
+                    results = [0, 0, 0]
+                    results[2 if winner is None else winner] = 1
+                    self._backpropagate(node, tuple(results))
+                continue
+
+            # Send one leaf to each worker, and wait for all of them
+            jobs = []
+            for worker in pool:
+                work = engine.copy()
+                node = self._descend(work)
+                if node.winner != -1:
+                    self._backpropagate(node, self._leaf_results(
+                        node, self.batch_playouts))
+                    continue
+                state = (work.pieces[BLACK], work.pieces[RED], work.kings,
+                         node.side, node.quiet)
+                jobs.append((node, worker.submit(
+                    _playouts, engine.dims, state, self.batch_playouts,
+                    self.rng.getrandbits(32))))
+            for node, job in jobs:
+                self._backpropagate(node, job.result())
+
+
+    def best_move(self, engine, side, draw_counter, time_limit):
+        """
+        Searches a position until the time runs out (or the stop event is
+        set, or the tree is full), and moves the root of the tree to the
+        chosen move
+
+        Args:
+            engine (BitboardEngine): engine with the position (it is not
+            changed)
+            side (int): side to move (BLACK or RED)
+            draw_counter (int): moves already played without a capture
+            time_limit (Optional[float]): seconds to search for (None to
+            search until the stop event is set)
+
+        Returns:
+            The most visited move (Optional[int]), or None if there are no
+            legal moves
+        """
+        self._set_root(engine, side, draw_counter)
+        root = self.root
+        self.playouts = 0
+        moves = list(root.children) + root.untried
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        self.grow(engine, side, draw_counter, time_limit)
+        if not root.children:
+            return moves[0]
+        best = max(root.children.values(), key=lambda child: child.visits)
+        best.parent = None
+        self.root = best
+        return best.move
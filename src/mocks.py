@@ -3,7 +3,7 @@ Final stub and mock implementation of Checkers Board.
 """
 
 import copy
-from checkers import PieceColor, PieceType
+from checkers import BoardSnapshot, PieceColor, PieceType
 
 class BoardStub:
     """
@@ -19,6 +19,10 @@ class BoardStub:
         #only for TUI
         return copy.deepcopy(self.board)
 
+    def snapshot(self):
+        #only for TUI
+        return BoardSnapshot.from_grid(self.board)
+
     def get_piece(self, coordinates):
         row, col = coordinates
         return self.board[row][col]
@@ -154,6 +158,10 @@ class BoardMock:
         #only for TUI
         return copy.deepcopy(self.board)
 
+    def snapshot(self):
+        #only for TUI
+        return BoardSnapshot.from_grid(self.board)
+
     def get_piece(self, coordinates):
         r, c = coordinates
         if r >= self.rows or c >= self.cols:
@@ -0,0 +1,135 @@
+"""
+Move ordering for the search.
+
+Alpha-beta pruning cuts off the most when the best move is searched first,
+so the moves of each position are sorted before they are searched:
+
+    1) The best move stored in the transposition table
+    2) Captures, by the material they win: 3 for each man and 5 for each
+    king captured (the same scoring as SmartBot._suggest_capture())
+    3) Killer moves: quiet moves that caused a cutoff at the same ply
+    4) Other quiet moves, by their history score (how often, and how deep,
+    they have caused a cutoff anywhere in the search)
+
+Captures are mandatory, so a position's moves are either all captures or
+all quiet moves.
+
+Examples:
+    1) Sort the moves of a position, and report a cutoff::
+        orderer = MoveOrderer()
+        orderer.order(engine, moves, ply, tt_move)
+        orderer.cutoff(moves[0], ply, depth)
+"""
+
+from bitboard import SQUARE_BITS
+
+# int: Shift of the captured pieces mask in an encoded move
+CAPTURED = 2 * SQUARE_BITS
+
+# int: Mask of the start and end squares of an encoded move (what the
+# transposition table, killers and history store)
+SQUARES = (1 << CAPTURED) - 1
+
+# int: Number of killer moves kept for each ply
+KILLERS = 2
+
+# int: Sort scores of the moves from the transposition table and of the
+# killer moves (history scores are kept below KILLER_SCORE)
+TT_SCORE = 1 << 62
+KILLER_SCORE = 1 << 61
+
+
+class MoveOrderer:
+    """
+    Class for sorting moves in the search. It keeps the killer moves and
+    history scores, so a search should use the same MoveOrderer for every
+    position.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # list[list[int]]: Killer moves of each ply, newest first
+        self.killers = []
+
+        # dict[int, int]: History score of each move (by start and end
+        # squares)
+        self.history = {}
+
+
+    def new_search(self):
+        """
+        Starts a new search: forgets the killer moves, and halves the history
+        scores so that older searches count for less
+
+        Args:
+            None
+
+        Returns None
+        """
+        self.killers = []
+        self.history = {move: score // 2 for move, score in
+                        self.history.items() if score > 1}
+
+
+    def order(self, engine, moves, ply, tt_move=0):
+        """
+        Sorts the moves of a position, best first
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            moves (list[int]): encoded moves to sort, in place
+            ply (int): distance of the position from the root
+            tt_move (int): start and end squares of the move from the
+            transposition table (0 if there is none)
+
+        Returns None
+        """
+        scores = {}
+        if moves[0] >> CAPTURED:
+            kings = engine.kings
+            for move in moves:
+                captured = move >> CAPTURED
+                scores[move] = 3 * captured.bit_count() + \
+                    2 * (captured & kings).bit_count()
+        else:
+            history = self.history
+            killers = self.killers[ply] if ply < len(self.killers) else ()
+            for move in moves:
+                squares = move & SQUARES
+                if squares in killers:
+                    scores[move] = KILLER_SCORE - killers.index(squares)
+                else:
+                    scores[move] = history.get(squares, 0)
+        if tt_move:
+            for move in moves:
+                if move & SQUARES == tt_move:
+                    scores[move] = TT_SCORE
+                    break
+        moves.sort(key=scores.__getitem__, reverse=True)
+
+
+    def cutoff(self, move, ply, depth):
+        """
+        Records a move that caused a beta cutoff. Only quiet moves are
+        recorded, since captures are already searched first.
+
+        Args:
+            move (int): the encoded move
+            ply (int): distance of the position from the root
+            depth (int): remaining depth of the position, in plies
+
+        Returns None
+        """
+        if move >> CAPTURED:
+            return
+        squares = move & SQUARES
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if squares in killers:
+            killers.remove(squares)
+        killers.insert(0, squares)
+        del killers[KILLERS:]
+        self.history[squares] = self.history.get(squares, 0) + depth * depth
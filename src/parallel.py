@@ -0,0 +1,292 @@
+"""
+Parallel search for the Checkers bots, on several processes.
+
+ParallelSearch deepens iteratively like Search, and splits each iteration
+between worker processes the "young brothers wait" way: the first (best)
+root move is searched on its own, then the other moves are dealt out in
+turn to the workers, best first, and searched in parallel with the first
+move's score as their bound, so a move only needs searching to the end if
+it beats that score. The move with the best score wins, and ties go to the
+move that came first in the root order. If any worker runs out of time, the
+iteration is dropped, as in Search.
+
+Each worker process keeps its own Search, with its own transposition table,
+for as long as it lives, so it reuses what it found in earlier iterations
+and turns. Every worker has a process of its own, and the i-th share of the
+moves always goes to the i-th worker, so what a worker has in its table
+doesn't depend on which process happened to be free: with a node or depth
+limit, the same searches find the same moves every time, as with Search.
+
+Splitting the moves costs extra nodes, since the moves searched at the same
+time can't narrow each other's bound: at depth 8 on 10 8x8 positions
+(bench.py parallel), 2 workers search 24% more nodes than one process and
+4 workers 40% more. So the search can only be faster with that many free
+cores. No speedup has been measured: on a single core, 2 or 4 workers take
+about 1.25 times as long as one process.
+
+The workers are shared by every parallel search (and MCTS, see mcts.py) in
+the process, and started the first time they are needed.
+
+Examples:
+    1) Search a game's position for one second on 4 processes::
+        search = ParallelSearch(workers=4, time_limit=1.0)
+        side = BLACK if game.curr_player == 1 else RED
+        move = search.best_move(game.engine, side, game.draw_counter)
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import BitboardEngine, BLACK, RED
+from evaluate import WEIGHTS
+from search import Search, Q_NODE_LIMIT, WIN, MAX_PLY
+from tablebase import Tablebase
+
+# dict[int, list[ProcessPoolExecutor]]: Worker processes (one process
+# each), by number of workers
+_POOLS = {}
+
+# dict[int, BitboardEngine]: Engine for each board size, in worker processes
+_ENGINES = {}
+
+# dict[tuple, Search]: Search for each set of settings, in worker processes
+_SEARCHES = {}
+
+
+def get_pool(workers):
+    """
+    Gets the shared worker processes for a number of workers, starting them
+    if needed. Each worker is a pool of its own process, so work can be sent
+    to a given worker.
+
+    Args:
+        workers (int): number of worker processes
+
+    Returns:
+        The workers (list[ProcessPoolExecutor])
+    """
+    if workers not in _POOLS:
+        _POOLS[workers] = [ProcessPoolExecutor(max_workers=1)
+                           for _ in range(workers)]
+    return _POOLS[workers]
+
+
+def get_engine(dims, black, red, kings):
+    """
+    Sets up a position on the worker process's engine for a board size
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+        black (int): mask of the black pieces
+        red (int): mask of the red pieces
+        kings (int): mask of the kings
+
+    Returns:
+        The engine (BitboardEngine)
+    """
+    if dims not in _ENGINES:
+        _ENGINES[dims] = BitboardEngine(dims)
+    engine = _ENGINES[dims]
+    engine.pieces = [black, red]
+    engine.kings = kings
+    engine.key = engine.compute_key()
+    engine.version += 1
+    return engine
+
+
+def _search_chunk(settings, dims, state, side, moves, depth, draw_counter,
+                  time_limit, node_limit, alpha):
+    """
+    Searches some of the root moves for one iteration, in a worker process
+
+    Args:
+        settings (tuple): the weights, hash_mb, ordering, q_node_limit and
+        tablebase path of the search
+        dims (int): Number of rows (and columns) of the board
+        state (tuple(int, int, int)): the black pieces, red pieces and kings
+        masks
+        side (int): side to move (BLACK or RED)
+        moves (list[int]): root moves to search, best first
+        depth (int): depth of the iteration, in plies
+        draw_counter (int): moves already played without a capture
+        time_limit (Optional[float]): seconds left for the iteration
+        node_limit (Optional[int]): nodes left for the iteration
+        alpha (int): score a move must beat (see Search.search_moves())
+
+    Returns:
+        The best move and its score (or None if the budget ran out), and the
+        nodes, quiescence nodes, deepest ply and tablebase hits of the search
+        (tuple(Optional[tuple(int, int)], int, int, int, int))
+    """
+    search = _SEARCHES.get(settings)
+    if search is None:
+        weights, hash_mb, ordering, q_node_limit, tablebase = settings
+        if tablebase is not None:
+            tablebase = Tablebase(tablebase)
+        search = _SEARCHES[settings] = Search(
+            weights=weights, hash_mb=hash_mb, ordering=ordering,
+            q_node_limit=q_node_limit, tablebase=tablebase)
+    search.time_limit = time_limit
+    search.node_limit = node_limit
+    engine = get_engine(dims, *state)
+    result = search.search_moves(engine, side, moves, depth, draw_counter,
+                                 alpha)
+    return (result, search.nodes, search.qnodes, search.seldepth,
+            search.tb_hits)
+
+
+class ParallelSearch(Search):
+    """
+    Class for searching Checkers positions on several processes. With one
+    worker, it searches in this process, exactly like Search.
+    """
+
+    def __init__(self, workers=2, time_limit=None, node_limit=None,
+                 max_depth=None, weights=WEIGHTS, hash_mb=16, ordering=True,
+                 q_node_limit=Q_NODE_LIMIT, tablebase=None):
+        """
+        Constructor
+
+        Args:
+            workers (int): number of worker processes
+            time_limit (Optional[float]): seconds to spend on each move
+            node_limit (Optional[int]): nodes to search on each move, for
+            all the workers together
+            max_depth (Optional[int]): deepest iteration to run, in plies
+            weights (tuple(int)): evaluation weights (see evaluate.py)
+            hash_mb (float): memory budget of each worker's transposition
+            table, in MiB (0 to search without one)
+            ordering (bool): whether to sort moves with a MoveOrderer
+            q_node_limit (int): nodes each quiescence search can visit
+            tablebase (Optional[Tablebase]): endgame tablebase to score
+            positions with few pieces
+        """
+        # The table is only used when searching in this process
+        super().__init__(time_limit, node_limit, max_depth, weights,
+                         hash_mb if workers == 1 else 0, ordering,
+                         q_node_limit, tablebase)
+        self.workers = workers
+
+        # tuple: Settings of the workers' searches (workers with the same
+        # settings share their Search)
+        self._settings = (tuple(weights), hash_mb, ordering, q_node_limit,
+                          None if tablebase is None else tablebase.path)
+
+
+    #
+    #PRIVATE METHODS
+    #
+    def _collect(self, job):
+        """
+        Waits for a worker's search and adds up its statistics
+
+        Args:
+            job (concurrent.futures.Future): the worker's search (see
+            _search_chunk())
+
+        Returns:
+            The best move and its score found by the worker
+            (Optional[tuple(int, int)]), or None if it ran out of budget
+        """
+        result, nodes, qnodes, seldepth, tb_hits = job.result()
+        self.nodes += nodes
+        self.qnodes += qnodes
+        self.seldepth = max(self.seldepth, seldepth)
+        self.tb_hits += tb_hits
+        return result
+
+
+    #
+    #PUBLIC METHODS
+    #
+    def best_move(self, engine, side, draw_counter=0):
+        """
+        Searches a position for the best move, deepening until the time or
+        node budget runs out (or max_depth is reached)
+
+        Args:
+            engine (BitboardEngine): engine with the position (it is not
+            changed)
+            side (int): side to move (BLACK or RED)
+            draw_counter (int): moves already played without a capture
+
+        Returns:
+            The best move found (Optional[int]), or None if there are no
+            legal moves
+        """
+        if self.workers == 1:
+            return super().best_move(engine, side, draw_counter)
+
+        engine = engine.copy()
+        moves = engine.legal_moves(side)
+        if self.orderer is not None:
+            self.orderer.new_search()
+            if moves:
+                self.orderer.order(engine, moves, 0)
+        self.nodes = self.qnodes = self.seldepth = self.q_limit_hits = 0
+        self.tb_hits = 0
+        self.depth = 0
+        self.score = None
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return moves[0]
+
+        workers = get_pool(self.workers)
+        state = (engine.pieces[BLACK], engine.pieces[RED], engine.kings)
+        deadline = None
+        if self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
+
+        best = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            time_left = node_left = None
+            if deadline is not None:
+                time_left = deadline - time.perf_counter()
+                if time_left <= 0:
+                    break
+            if self.node_limit is not None:
+                node_left = self.node_limit - self.nodes
+                if node_left <= 0:
+                    break
+
+            # Search the first move on its own, for a bound
+            job = workers[0].submit(
+                _search_chunk, self._settings, engine.dims, state, side,
+                moves[:1], depth, draw_counter, time_left, node_left,
+                -WIN - 1)
+            results = [self._collect(job)]
+            if results[0] is None:
+                break
+            bound = results[0][1]
+
+            # Deal the other moves out to the workers, best first
+            if deadline is not None:
+                time_left = deadline - time.perf_counter()
+            if node_left is not None:
+                node_left = (self.node_limit - self.nodes) // self.workers
+            rest = moves[1:]
+            jobs = [workers[i].submit(
+                _search_chunk, self._settings, engine.dims, state, side,
+                rest[i::self.workers], depth, draw_counter, time_left,
+                node_left, bound)
+                    for i in range(min(self.workers, len(rest)))]
+            results.extend(self._collect(job) for job in jobs)
+            if None in results:
+                break
+
+            # The best score wins, and ties go to the move searched first (a
+            # move that only ties with the first move's score is reported
+            # with the bound, so it never beats it)
+            move, score = max(results, key=lambda result:
+                              (result[1], -moves.index(result[0])))
+            best, self.score, self.depth = move, score, depth
+
+            # Search the best move first in the next iteration
+            moves.remove(move)
+            moves.insert(0, move)
+
+            # Stop once a forced win or loss has been found
+            if abs(score) >= WIN - MAX_PLY:
+                break
+        return best
@@ -0,0 +1,166 @@
+"""
+Pondering: thinking in the background while waiting, for the bots.
+
+A Ponderer runs a bot's search in a background thread while the bot would
+otherwise sit idle: during the opponent's turn (on the position the bot
+expects after the opponent's reply), and during the bot's own turn while
+the TUI or GUI waits out its bot delay. The search is stopped cleanly with
+a threading.Event, which Search and MCTS check as they go.
+
+When it is the bot's turn and the ponderer is thinking about the position
+on the board (a hit), the search is left to run until the bot's time for
+the move, counted from when the search started, is up. The time spent while
+waiting is saved, so the bot answers sooner with the same search.
+Otherwise (a miss) the search is stopped and its move thrown away, but what
+it left in the bot's transposition table or tree still helps the next
+search.
+
+Python runs one thread at a time, so the background search only gets the
+CPU while the program is waiting: for a human's input, or sleeping through
+a bot delay.
+
+Examples:
+    1) Ponder a search while waiting, and use it if the game reaches that
+    position::
+        ponderer = Ponderer()
+        ponderer.start(think, engine, side, draw_counter)
+        ...
+        if ponderer.thinking_about(game.engine, side, game.draw_counter):
+            move = ponderer.finish(time_limit)
+        else:
+            ponderer.stop()
+"""
+
+import threading
+import time
+
+
+class Ponderer:
+    """
+    Class for running one search at a time in a background thread
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Optional[threading.Thread]: Thread running the search, if any
+        self._thread = None
+
+        # Optional[threading.Event]: Event that stops the search
+        self._stop = None
+
+        # Optional[tuple(int, int, int)]: Position being searched (engine
+        # key, side to move and moves played without a capture)
+        self._position = None
+
+        # float: When the search started (time.perf_counter())
+        self._start = 0.0
+
+        # Optional[int]: Move returned by the search, once it is done
+        self._result = None
+
+
+    #
+    #PRIVATE METHODS
+    #
+    def _run(self, think, engine, side, draw_counter):
+        """
+        Runs the search, in the background thread
+
+        Args:
+            think (Callable): the search (see start())
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+            draw_counter (int): moves already played without a capture
+
+        Returns None
+        """
+        self._result = think(engine, side, draw_counter, self._stop)
+
+
+    #
+    #PUBLIC METHODS
+    #
+    def start(self, think, engine, side, draw_counter):
+        """
+        Starts searching a position in the background, unless it is already
+        being searched. Any other search is stopped first.
+
+        Args:
+            think (Callable[[BitboardEngine, int, int, threading.Event],
+            Optional[int]]): the search: it is given the position and an
+            event, and should return a move soon after the event is set
+            engine (BitboardEngine): engine with the position (it is copied)
+            side (int): side to move (BLACK or RED)
+            draw_counter (int): moves already played without a capture
+
+        Returns None
+        """
+        position = (engine.key, side, draw_counter)
+        if self._thread is not None and self._position == position:
+            return
+        self.stop()
+        self._position = position
+        self._stop = threading.Event()
+        self._result = None
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, args=(think, engine.copy(), side, draw_counter),
+            daemon=True)
+        self._thread.start()
+
+
+    def thinking_about(self, engine, side, draw_counter):
+        """
+        Checks whether a position is the one being searched
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+            draw_counter (int): moves already played without a capture
+
+        Returns:
+            True if it is (bool)
+        """
+        return self._thread is not None and \
+            self._position == (engine.key, side, draw_counter)
+
+
+    def finish(self, time_limit):
+        """
+        Lets the search run until time_limit seconds after it started (or
+        until it is done), then stops it
+
+        Args:
+            time_limit (Optional[float]): seconds the search can take in
+            all (None to wait until it is done)
+
+        Returns:
+            The move it found (Optional[int])
+        """
+        if time_limit is None:
+            self._thread.join()
+        else:
+            left = self._start + time_limit - time.perf_counter()
+            if left > 0:
+                self._thread.join(left)
+        self.stop()
+        return self._result
+
+
+    def stop(self):
+        """
+        Stops the search, if there is one, and waits for its thread to end
+
+        Args:
+            None
+
+        Returns None
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._position = None
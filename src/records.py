@@ -0,0 +1,179 @@
+"""
+Records of self-play positions and their results, for tuning the evaluation.
+
+The simulator (bot.py --record) writes the positions of every game it plays
+to a record file, each with the result the game went on to have, and tune.py
+fits the evaluation weights to them. Only quiet positions (where the side to
+move has no capture) are recorded, since the search never scores the others
+with the evaluation (it keeps following the captures first).
+
+A record file is a header followed by fixed-size records: the black pieces,
+red pieces and kings masks (each as many little-endian bytes as the board
+needs), the side to move and the points black scored (2 for a win, 1 for a
+draw). Records are appended a game at a time, so a file can grow over
+several runs of the simulator, and it can be read in chunks without loading
+the whole file.
+
+Examples:
+    1) Record the positions of a game::
+        recorder = GameRecorder("records-8x8.bin", 8)
+        ...
+        recorder.add(game.engine, side)    # before every move
+        ...
+        recorder.finish(winner)            # BLACK, RED or None for a draw
+        recorder.close()
+"""
+
+import os
+import struct
+
+from bitboard import BitboardEngine, BLACK, RED
+
+# bytes: First bytes of every record file
+MAGIC = b"CKRC"
+
+# int: Version of the file format
+VERSION = 1
+
+# struct.Struct: File header: magic, version and board dimensions
+HEADER = struct.Struct("<4sHH")
+
+
+def mask_bytes(dims):
+    """
+    Gets the number of bytes each mask of a record takes
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+
+    Returns:
+        Number of bytes (int)
+    """
+    return (len(BitboardEngine(dims).coords) + 7) // 8
+
+
+def record_struct(dims):
+    """
+    Gets the layout of a record for a board size
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+
+    Returns:
+        The layout: black, red and kings masks, side to move and black's
+        points (struct.Struct)
+    """
+    n = mask_bytes(dims)
+    return struct.Struct(f"<{n}s{n}s{n}sBB")
+
+
+def read_header(path):
+    """
+    Reads the header of a record file
+
+    Args:
+        path (str): Path of the file
+
+    Returns:
+        Board dimensions and number of records (tuple(int, int))
+
+    Raises:
+        ValueError: if the file is not a record file
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    size = os.path.getsize(path)
+    if len(header) == HEADER.size:
+        magic, version, dims = HEADER.unpack(header)
+        if magic == MAGIC and version == VERSION:
+            record = record_struct(dims)
+            if (size - HEADER.size) % record.size == 0:
+                return dims, (size - HEADER.size) // record.size
+    raise ValueError(f"{path} is not a record file")
+
+
+class GameRecorder:
+    """
+    Class for appending the positions of games to a record file
+    """
+
+    def __init__(self, path, dims):
+        """
+        Constructor
+
+        Args:
+            path (str): Path of the file. If it already has records, new
+            ones are added after them.
+            dims (int): Number of rows (and columns) of the board
+
+        Raises:
+            ValueError: if the file exists but is not a record file for the
+            same board size
+        """
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            if read_header(path)[0] != dims:
+                raise ValueError(f"{path} has records for another board size")
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(HEADER.pack(MAGIC, VERSION, dims))
+        self.path = path
+        self._nbytes = mask_bytes(dims)
+        self._record = record_struct(dims)
+
+        # list[tuple(int, int, int, int)]: Positions of the game being
+        # played (masks and side to move), until its result is known
+        self._positions = []
+
+        # int: Number of records written
+        self.count = 0
+
+
+    def add(self, engine, side):
+        """
+        Remembers a position of the game being played, unless the side to
+        move has a capture
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+
+        Returns None
+        """
+        if not engine.jumpers(side):
+            self._positions.append((engine.pieces[BLACK],
+                                    engine.pieces[RED], engine.kings,
+                                    side))
+
+
+    def finish(self, winner):
+        """
+        Writes the positions of the game that just ended, with its result
+
+        Args:
+            winner (Optional[int]): BLACK or RED, or None for a draw
+
+        Returns None
+        """
+        points = 1 if winner is None else 2 if winner == BLACK else 0
+        n = self._nbytes
+        for black, red, kings, side in self._positions:
+            self._file.write(self._record.pack(
+                black.to_bytes(n, "little"), red.to_bytes(n, "little"),
+                kings.to_bytes(n, "little"), side, points))
+        self.count += len(self._positions)
+        self._positions = []
+        self._file.flush()
+
+
+    def close(self):
+        """
+        Closes the file. Positions of an unfinished game are dropped.
+
+        Args:
+            None
+
+        Returns None
+        """
+        self._positions = []
+        self._file.close()
@@ -0,0 +1,526 @@
+"""
+Game tree search for the Checkers bots.
+
+The search runs negamax with alpha-beta pruning on a copy of the game's
+bitboard engine, using encoded moves (see bitboard.encode_move()), and
+deepens iteratively until it runs out of time or nodes. The best move of
+the last completed iteration is returned, so a search can be stopped at any
+time and still give a sensible answer.
+
+When the depth runs out in the middle of a capture exchange, the search
+carries on with a quiescence search, which follows only the forced jumps
+until a position where the side to move can't capture, so leaves are never
+scored halfway through an exchange. Each quiescence search has its own
+node limit, after which the position is scored as it is.
+
+With a tablebase (see tablebase.py), positions with few enough pieces are
+scored exactly from it instead of being searched.
+
+Moves are searched in the order given by ordering.py (best move from the
+transposition table, captures, killer moves, then history scores).
+
+Results are kept in a transposition table (see transposition.py) that lives
+as long as the Search object, so they are reused by later iterations and
+later turns. The table ignores how many moves were played without a
+capture, so scores near the draw limit can be slightly off.
+
+A search can be stopped from another thread by setting its stop_event (see
+ponder.py), which ends it like running out of time.
+
+Examples:
+    1) Search the position of a game for one second::
+        search = Search(time_limit=1.0)
+        side = BLACK if game.curr_player == 1 else RED
+        move = search.best_move(game.engine, side, game.draw_counter)
+        game.make_move(None, move)
+
+    2) Search to a fixed depth, whatever the time it takes::
+        Search(max_depth=6).best_move(game.engine, side)
+"""
+
+import time
+
+from bitboard import RED, SQUARE_BITS
+from evaluate import WEIGHTS, evaluate
+from ordering import MoveOrderer
+from tablebase import WIN as TB_WIN, LOSS as TB_LOSS
+from transposition import (TranspositionTable, EXACT, LOWER, UPPER,
+                           MOVE_MASK)
+
+# int: Score of a won position. Wins found closer to the root score higher
+WIN = 1000000
+
+# int: Deepest search allowed, in plies
+MAX_PLY = 128
+
+# int: A draw is declared once this many moves are played in a row without a
+# capture (see Checkers.get_winner())
+DRAW_MOVES = 79
+
+# int: Shift of the captured pieces mask in an encoded move
+CAPTURED = 2 * SQUARE_BITS
+
+# int: Default node limit of each quiescence search
+Q_NODE_LIMIT = 2000
+
+# int: How many nodes are searched between checks of the time budget
+CHECK_EVERY = 1024
+
+
+def _to_table(score, ply):
+    """
+    Converts a score for storing in the transposition table: wins and losses
+    are stored as a distance from the position instead of from the root
+
+    Args:
+        score (int): score of a position
+        ply (int): distance of the position from the root
+
+    Returns:
+        The score to store (int)
+    """
+    if score >= WIN - MAX_PLY:
+        return score + ply
+    if score <= -WIN + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    """
+    Converts a score read from the transposition table back (see
+    _to_table())
+
+    Args:
+        score (int): score read from the table
+        ply (int): distance of the position from the root
+
+    Returns:
+        The score of the position (int)
+    """
+    if score >= WIN - MAX_PLY:
+        return score - ply
+    if score <= -WIN + MAX_PLY:
+        return score + ply
+    return score
+
+
+def _move_to_front(moves, tt_move):
+    """
+    Moves the move matching a move from the transposition table (which only
+    has the start and end squares) to the front of a list of moves
+
+    Args:
+        moves (list[int]): encoded moves
+        tt_move (int): start and end squares of the move
+
+    Returns None
+    """
+    for i, move in enumerate(moves):
+        if move & MOVE_MASK == tt_move:
+            if i:
+                moves.insert(0, moves.pop(i))
+            return
+
+
+class _OutOfBudget(Exception):
+    """
+    Raised inside the search when the time or node budget runs out
+    """
+
+
+class Search:
+    """
+    Class for searching Checkers positions. A Search object can be reused
+    for every move of a game.
+    """
+
+    def __init__(self, time_limit=None, node_limit=None, max_depth=None,
+                 weights=WEIGHTS, hash_mb=16, ordering=True,
+                 q_node_limit=Q_NODE_LIMIT, tablebase=None):
+        """
+        Constructor
+
+        Args:
+            time_limit (Optional[float]): seconds to spend on each move
+            node_limit (Optional[int]): nodes to search on each move
+            max_depth (Optional[int]): deepest iteration to run, in plies
+            weights (tuple(int)): evaluation weights (see evaluate.py)
+            hash_mb (float): memory budget of the transposition table, in
+            MiB (0 to search without one)
+            ordering (bool): whether to sort moves with a MoveOrderer (if
+            not, only the transposition table's move is moved first)
+            q_node_limit (int): nodes each quiescence search can visit (0 to
+            score leaves without one)
+            tablebase (Optional[Tablebase]): endgame tablebase to score
+            positions with few pieces
+        """
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = min(max_depth or MAX_PLY, MAX_PLY - 1)
+        self.weights = weights
+
+        # Optional[TranspositionTable]: Results of earlier searches
+        self.table = TranspositionTable(hash_mb) if hash_mb else None
+
+        # Optional[MoveOrderer]: Sorts the moves of each position
+        self.orderer = MoveOrderer() if ordering else None
+
+        self.q_node_limit = q_node_limit
+        self.tablebase = tablebase
+
+        # int: Positions scored from the tablebase by the last search
+        self.tb_hits = 0
+
+        # int: Nodes searched by the last call to best_move()
+        self.nodes = 0
+
+        # int: How many of those nodes were searched by quiescence searches
+        self.qnodes = 0
+
+        # int: Deepest ply reached by the last search (including quiescence)
+        self.seldepth = 0
+
+        # int: Quiescence searches of the last search that ran out of nodes
+        self.q_limit_hits = 0
+
+        # int: Depth of the last completed iteration of the last search
+        self.depth = 0
+
+        # Optional[int]: Score of the move returned by the last search
+        self.score = None
+
+        # Optional[threading.Event]: Stops the search when it is set (from
+        # another thread, see ponder.py), as if its budget had run out
+        self.stop_event = None
+
+        self._deadline = None
+        self._next_check = CHECK_EVERY
+        self._q_left = 0
+
+
+    #
+    #PRIVATE METHODS
+    #
+    def _check_budget(self):
+        """
+        Stops the search if the time or node budget has run out, or the
+        stop event is set
+
+        Args:
+            None
+
+        Raises:
+            _OutOfBudget: if the budget has run out
+
+        Returns None
+        """
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise _OutOfBudget
+        self._next_check = self.nodes + CHECK_EVERY
+        if self.node_limit is not None:
+            if self.nodes >= self.node_limit:
+                raise _OutOfBudget
+            self._next_check = min(self._next_check, self.node_limit)
+        if self._deadline is not None and \
+            time.perf_counter() >= self._deadline:
+            raise _OutOfBudget
+
+
+    def _negamax(self, engine, side, depth, alpha, beta, ply, quiet):
+        """
+        Searches a position with alpha-beta pruning
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+            depth (int): remaining depth, in plies
+            alpha (int): lower bound of the search window
+            beta (int): upper bound of the search window
+            ply (int): distance from the root, in plies
+            quiet (int): moves played in a row without a capture
+
+        Returns:
+            Score of the position for the side to move (int)
+        """
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+
+        if quiet >= DRAW_MOVES:
+            return 0 if engine.has_moves(side) else -WIN + ply
+        if self.tablebase is not None:
+            entry = self.tablebase.probe(engine, side)
+            if entry is not None:
+                self.tb_hits += 1
+                result, distance = entry
+                if result == TB_WIN:
+                    return WIN - ply - distance
+                if result == TB_LOSS:
+                    return -WIN + ply + distance
+                return 0
+        if depth <= 0 or ply >= MAX_PLY:
+            self._q_left = self.q_node_limit
+            return self._quiesce(engine, side, alpha, beta, ply)
+
+        table = self.table
+        tt_move = 0
+        if table is not None:
+            key = engine.key ^ engine.zobrist_side if side == RED \
+                else engine.key
+            entry = table.probe(key)
+            if entry is not None:
+                tt_move, tt_depth, bound, score = entry
+                if tt_depth >= depth:
+                    score = _from_table(score, ply)
+                    if bound == EXACT or \
+                        (bound == LOWER and score >= beta) or \
+                        (bound == UPPER and score <= alpha):
+                        return score
+
+        moves = engine.legal_moves(side)
+        if not moves:
+            return -WIN + ply
+        orderer = self.orderer
+        if orderer is not None:
+            orderer.order(engine, moves, ply, tt_move)
+        elif tt_move:
+            _move_to_front(moves, tt_move)
+
+        alpha_start = alpha
+        best = -WIN
+        best_move = 0
+        for move in moves:
+            record = engine.make(move)
+            score = -self._negamax(engine, 1 - side, depth - 1, -beta, -alpha,
+                                   ply + 1,
+                                   0 if move >> CAPTURED else quiet + 1)
+            engine.unmake(record)
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if orderer is not None:
+                            orderer.cutoff(move, ply, depth)
+                        break
+
+        if table is not None:
+            if best >= beta:
+                bound = LOWER
+            elif best > alpha_start:
+                bound = EXACT
+            else:
+                bound = UPPER
+            table.store(key, depth, bound, _to_table(best, ply), best_move)
+        return best
+
+
+    def _quiesce(self, engine, side, alpha, beta, ply):
+        """
+        Searches only the forced jumps of a position, until the side to move
+        can't capture. Since captures are mandatory there is no "standing
+        pat": a side that can capture has to.
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+            alpha (int): lower bound of the search window
+            beta (int): upper bound of the search window
+            ply (int): distance from the root, in plies
+
+        Returns:
+            Score of the position for the side to move (int)
+        """
+        if ply > self.seldepth:
+            self.seldepth = ply
+        empty = engine.empty()
+        if not engine.jumpers(side, empty):
+            if not engine.movers(side, empty):
+                return -WIN + ply
+            return evaluate(engine, side, self.weights)
+        if self._q_left <= 0 or ply >= MAX_PLY:
+            # Without a limit, leaves are scored without a quiescence search
+            if self._q_left <= 0 and self.q_node_limit:
+                self.q_limit_hits += 1
+            return evaluate(engine, side, self.weights)
+
+        moves = engine.legal_moves(side)
+        if self.orderer is not None:
+            self.orderer.order(engine, moves, ply)
+        best = -WIN
+        for move in moves:
+            self.nodes += 1
+            self.qnodes += 1
+            self._q_left -= 1
+            if self.nodes >= self._next_check:
+                self._check_budget()
+            record = engine.make(move)
+            score = -self._quiesce(engine, 1 - side, -beta, -alpha, ply + 1)
+            engine.unmake(record)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+
+    def _search_root(self, engine, side, moves, depth, quiet, alpha=-WIN - 1):
+        """
+        Runs one iteration of the search at the root
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+            moves (list[int]): legal moves, best first
+            depth (int): depth of the iteration, in plies
+            quiet (int): moves played in a row without a capture
+            alpha (int): score a move must beat (by default, any move does)
+
+        Returns:
+            The best move and its score (tuple(int, int)), or the first move
+            and alpha if no move scores more than alpha
+        """
+        best = moves[0]
+        for move in moves:
+            record = engine.make(move)
+            score = -self._negamax(engine, 1 - side, depth - 1, -WIN - 1,
+                                   -alpha, 1,
+                                   0 if move >> CAPTURED else quiet + 1)
+            engine.unmake(record)
+            if score > alpha:
+                alpha = score
+                best = move
+        return best, alpha
+
+
+    #
+    #PUBLIC METHODS
+    #
+    def search_moves(self, engine, side, moves, depth, draw_counter=0,
+                     alpha=-WIN - 1):
+        """
+        Runs a single iteration of the search on some of the root moves,
+        within the time and node budget. This is the work a ParallelSearch
+        (see parallel.py) gives each of its workers. The first iteration of
+        a move (depth 1) starts a new search for the table and move orderer.
+
+        Args:
+            engine (BitboardEngine): engine with the position. It is left
+            in the middle of the search if the budget runs out.
+            side (int): side to move (BLACK or RED)
+            moves (list[int]): root moves to search, best first
+            depth (int): depth of the iteration, in plies
+            draw_counter (int): moves already played without a capture
+            alpha (int): score a move must beat, e.g. the score of a move
+            searched elsewhere (by default, any move does)
+
+        Returns:
+            The best of the moves and its score (Optional[tuple(int, int)]),
+            or None if the budget ran out before the iteration finished. If
+            no move scores more than alpha, the first move and alpha are
+            returned.
+        """
+        if depth == 1:
+            if self.table is not None:
+                self.table.new_search()
+            if self.orderer is not None:
+                self.orderer.new_search()
+        self.nodes = self.qnodes = self.seldepth = self.q_limit_hits = 0
+        self.tb_hits = 0
+        if self.time_limit is not None:
+            self._deadline = time.perf_counter() + self.time_limit
+        else:
+            self._deadline = None
+        self._next_check = 0
+        try:
+            return self._search_root(engine, side, moves, depth,
+                                     draw_counter, alpha)
+        except _OutOfBudget:
+            return None
+
+
+    def expected_move(self, engine, side):
+        """
+        Gets the move the transposition table has as best in a position:
+        after the search's own move, the reply it expects
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+
+        Returns:
+            The move (Optional[int]), or None if the position is not in the
+            table
+        """
+        if self.table is None:
+            return None
+        key = engine.key ^ engine.zobrist_side if side == RED else engine.key
+        entry = self.table.probe(key)
+        if entry is None or not entry[0]:
+            return None
+        for move in engine.legal_moves(side):
+            if move & MOVE_MASK == entry[0]:
+                return move
+        return None
+
+
+    def best_move(self, engine, side, draw_counter=0):
+        """
+        Searches a position for the best move, deepening until the time or
+        node budget runs out (or max_depth is reached)
+
+        Args:
+            engine (BitboardEngine): engine with the position. It is copied,
+            so the caller's engine is never changed
+            side (int): side to move (BLACK or RED)
+            draw_counter (int): moves already played without a capture
+
+        Returns:
+            The best move found (Optional[int]), or None if there are no
+            legal moves
+        """
+        engine = engine.copy()
+        moves = engine.legal_moves(side)
+        if self.table is not None:
+            self.table.new_search()
+        if self.orderer is not None:
+            self.orderer.new_search()
+            if moves:
+                self.orderer.order(engine, moves, 0)
+        self.nodes = self.qnodes = self.seldepth = self.q_limit_hits = 0
+        self.tb_hits = 0
+        self.depth = 0
+        self.score = None
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return moves[0]
+
+        start = time.perf_counter()
+        if self.time_limit is not None:
+            self._deadline = start + self.time_limit
+        else:
+            self._deadline = None
+        self._next_check = 0
+
+        best = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                move, score = self._search_root(engine, side, moves, depth,
+                                                draw_counter)
+            except _OutOfBudget:
+                break
+            best, self.score, self.depth = move, score, depth
+
+            # Search the best move first in the next iteration
+            moves.remove(move)
+            moves.insert(0, move)
+
+            # Stop once a forced win or loss has been found
+            if abs(score) >= WIN - MAX_PLY:
+                break
+        return best
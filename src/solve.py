@@ -0,0 +1,523 @@
+"""
+Perfect-play solver for small Checkers boards.
+
+The solver enumerates every position reachable from the starting position
+of a board size (as set up by Checkers._init_pieces()), and solves them all
+by retrograde analysis (see tablebase.retrograde()). The result is a packed
+table: the positions' keys, sorted, followed by their results (win, loss or
+draw for the side to move, and how many plies it takes, packed as in a
+tablebase entry). Looking a position up is a binary search on the keys,
+which are read through mmap when the table is loaded from a file.
+
+A key packs a position in a single 64-bit int: the side to move, then the
+black pieces, the red pieces and the kings, each with one bit per dark
+square. The 79 move draw rule is not taken into account.
+
+The 4x4 board (size 1) has 2409 reachable positions and is solved in a
+fraction of a second. The 6x6 board (size 2) is out of reach: the positions
+with all 12 pieces still on the board alone number over 99 million (found
+in 43 minutes, taking 2.5 GB, and still growing by 13 million a step when
+the run was stopped), and there are more with fewer pieces.
+
+Examples:
+    1) Solve the 4x4 board and look up the starting position::
+        solution = solve(4)
+        solution.probe(Checkers(1).engine, BLACK)
+
+    2) Solve the 4x4 board and save the table::
+        python3 src/solve.py --size 1 -o solve-4x4.bin
+
+    3) Load a saved table::
+        solution = Solution.load("solve-4x4.bin")
+"""
+
+import mmap
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from heapq import merge
+
+import click
+
+from bitboard import BitboardEngine, BLACK, RED, SQUARE_BITS, SQUARE_MASK, \
+    bits
+from checkers import Checkers
+from tablebase import retrograde, DRAW, WIN, LOSS
+
+# bytes: First bytes of every solution file
+MAGIC = b"CKSV"
+
+# int: Version of the file format
+VERSION = 1
+
+# struct.Struct: File header: magic, version, board dimensions and number of
+# positions
+HEADER = struct.Struct("<4sHHQ")
+
+
+class StatePacker:
+    """
+    Class for packing positions into keys, by dropping the ghost bits of the
+    engine's masks (a byte at a time, with lookup tables)
+    """
+
+    def __init__(self, dims):
+        """
+        Constructor
+
+        Args:
+            dims (int): Number of rows (and columns) of the board
+        """
+        engine = BitboardEngine(dims)
+        squares = list(bits(engine.valid))
+
+        # int: Number of dark squares
+        self.n = len(squares)
+        if 3 * self.n + 1 > 64:
+            raise ValueError(f"a {dims}x{dims} position doesn't fit in a key")
+
+        # list[list[int]]: For each byte of a mask, the packed bits of every
+        # value of that byte
+        self._tables = []
+        for chunk in range(0, len(engine.coords), 8):
+            table = [0] * 256
+            for value in range(256):
+                for bit in range(8):
+                    sq = chunk + bit
+                    if value >> bit & 1 and engine.valid >> sq & 1:
+                        table[value] |= 1 << squares.index(sq)
+            self._tables.append(table)
+
+        # list[list[int]]: For each byte of a packed mask, the engine mask
+        # of every value of that byte
+        self._expand = []
+        for chunk in range(0, self.n, 8):
+            table = [0] * 256
+            for value in range(256):
+                for bit in range(8):
+                    if value >> bit & 1 and chunk + bit < self.n:
+                        table[value] |= 1 << squares[chunk + bit]
+            self._expand.append(table)
+
+        # int: Mask of the n bits of a packed mask
+        self._mask = (1 << self.n) - 1
+
+
+    def compress(self, mask):
+        """
+        Drops the ghost bits of a mask
+
+        Args:
+            mask (int): mask of squares, by bit index
+
+        Returns:
+            The mask with one bit per dark square (int)
+        """
+        packed = 0
+        for table in self._tables:
+            packed |= table[mask & 255]
+            mask >>= 8
+        return packed
+
+
+    def pack(self, black, red, kings, side):
+        """
+        Packs a position into a key
+
+        Args:
+            black (int): mask of the black pieces
+            red (int): mask of the red pieces
+            kings (int): mask of the kings
+            side (int): side to move (BLACK or RED)
+
+        Returns:
+            The key (int)
+        """
+        n = self.n
+        return side | self.compress(black) << 1 | \
+            self.compress(red) << (n + 1) | self.compress(kings) << (2 * n + 1)
+
+
+    def expand(self, packed):
+        """
+        Puts the ghost bits back into a mask (the inverse of compress())
+
+        Args:
+            packed (int): mask with one bit per dark square
+
+        Returns:
+            The mask of squares, by bit index (int)
+        """
+        mask = 0
+        for table in self._expand:
+            mask |= table[packed & 255]
+            packed >>= 8
+        return mask
+
+
+    def unpack(self, key):
+        """
+        Unpacks a key (the inverse of pack())
+
+        Args:
+            key (int): the key
+
+        Returns:
+            The black pieces, red pieces and kings masks, and the side to
+            move (tuple(int, int, int, int))
+        """
+        n = self.n
+        return (self.expand(key >> 1 & self._mask),
+                self.expand(key >> (n + 1) & self._mask),
+                self.expand(key >> (2 * n + 1)), key & 1)
+
+
+class Solution:
+    """
+    Class for a solved board: a packed table of positions and their results
+    """
+
+    def __init__(self, dims, keys, values):
+        """
+        Constructor
+
+        Args:
+            dims (int): Number of rows (and columns) of the board
+            keys (Sequence[int]): keys of the positions, sorted
+            values (Sequence[int]): result of each position (packed as in a
+            tablebase entry)
+        """
+        self.dims = dims
+        self.keys = keys
+        self.values = values
+        self._packer = StatePacker(dims)
+
+
+    def __len__(self):
+        """
+        Gets the number of positions in the table
+
+        Returns:
+            Number of positions (int)
+        """
+        return len(self.keys)
+
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a table saved with save(). The file is memory-mapped, so only
+        the parts of the table that are looked up are read.
+
+        Args:
+            path (str): Path of the file
+
+        Raises:
+            ValueError: if the file is not a solution
+
+        Returns:
+            The solution (Solution)
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, dims, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a solution file")
+        start = HEADER.size
+        keys = memoryview(data)[start:start + 8 * count]
+        values = memoryview(data)[start + 8 * count:start + 10 * count]
+        if sys.byteorder == "little":
+            return cls(dims, keys.cast("Q"), values.cast("H"))
+        keys = array("Q", keys)
+        values = array("H", values)
+        keys.byteswap()
+        values.byteswap()
+        return cls(dims, keys, values)
+
+
+    def save(self, path):
+        """
+        Saves the table to a file
+
+        Args:
+            path (str): Path of the file
+
+        Returns None
+        """
+        keys = array("Q", self.keys)
+        values = array("H", self.values)
+        if sys.byteorder != "little":
+            keys.byteswap()
+            values.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.dims, len(keys)))
+            f.write(keys.tobytes())
+            f.write(values.tobytes())
+
+
+    def probe_key(self, key):
+        """
+        Looks up a position by its key
+
+        Args:
+            key (int): key of the position (see StatePacker.pack())
+
+        Returns:
+            The result for the side to move (DRAW, WIN or LOSS) and the plies
+            it takes (tuple(int, int)), or None if the position is not in
+            the table
+        """
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        value = self.values[i]
+        return value & 3, value >> 2
+
+
+    def probe(self, engine, side):
+        """
+        Looks up an engine's position
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+
+        Returns:
+            The result for the side to move (DRAW, WIN or LOSS) and the plies
+            it takes (tuple(int, int)), or None if the position is not in
+            the table
+        """
+        if engine.dims != self.dims:
+            return None
+        return self.probe_key(self._packer.pack(
+            engine.pieces[BLACK], engine.pieces[RED], engine.kings, side))
+
+
+def _children(engine, packer, key):
+    """
+    Gets the positions reached by every legal move of a position
+
+    Args:
+        engine (BitboardEngine): engine to generate the moves on (its
+        position is replaced)
+        packer (StatePacker): packer for the board size
+        key (int): key of the position
+
+    Returns:
+        The key of each position reached and the number of pieces the move
+        captures (list[tuple(int, int)])
+    """
+    black, red, kings, side = packer.unpack(key)
+    engine.pieces = [black, red]
+    engine.kings = kings
+    engine.version += 1
+    crown_rows = engine.crown_rows
+    children = []
+    for move in engine.legal_moves(side):
+        frm = move & SQUARE_MASK
+        to = move >> SQUARE_BITS & SQUARE_MASK
+        captured = move >> 2 * SQUARE_BITS
+        moved = (1 << frm) | (1 << to)
+        new_kings = kings & ~captured
+        if kings >> frm & 1 or crown_rows >> to & 1:
+            new_kings = (new_kings & ~(1 << frm)) | (1 << to)
+        if side == BLACK:
+            child = packer.pack(black ^ moved, red & ~captured, new_kings, RED)
+        else:
+            child = packer.pack(black & ~captured, red ^ moved, new_kings,
+                                BLACK)
+        children.append((child, captured.bit_count()))
+    return children
+
+
+def _contains(keys, key):
+    """
+    Checks whether a sorted array holds a key
+
+    Args:
+        keys (array('Q')): sorted keys
+        key (int): key to look for
+
+    Returns:
+        True if it does (bool)
+    """
+    i = bisect_left(keys, key)
+    return i < len(keys) and keys[i] == key
+
+
+def _enumerate(engine, packer, start, progress=None):
+    """
+    Finds every position reachable from a starting position, a layer (number
+    of pieces) at a time. Moves that don't capture stay in their layer and
+    captures lead to smaller ones, so each layer is complete once the layers
+    above it are, and it is explored breadth-first on its own.
+
+    Args:
+        engine (BitboardEngine): engine to generate the moves on
+        packer (StatePacker): packer for the board size
+        start (int): key of the starting position
+        progress (Optional[Callable[[str], None]]): called with progress
+        messages
+
+    Returns:
+        The sorted keys of the positions with each number of pieces (dict[int,
+        array('Q')])
+    """
+    top = packer.unpack(start)
+    pieces = (top[0] | top[1]).bit_count()
+
+    # Keys found in each smaller layer by captures, with repeats
+    pending = {k: array("Q") for k in range(pieces)}
+    pending[pieces] = array("Q", [start])
+    layers = {}
+    for k in range(pieces, 0, -1):
+        layer = array("Q", sorted(set(pending.pop(k))))
+        frontier = layer
+        while frontier:
+            found = set()
+            for key in frontier:
+                for child, taken in _children(engine, packer, key):
+                    if taken:
+                        pending[k - taken].append(child)
+                    elif not _contains(layer, child):
+                        found.add(child)
+            frontier = array("Q", sorted(found))
+            del found
+            layer = array("Q", merge(layer, frontier))
+            if progress is not None and frontier:
+                progress(f"{len(layer)} positions with {k} pieces so far")
+
+        # Drop the repeats of the layers below before they grow further
+        for j in pending:
+            pending[j] = array("Q", sorted(set(pending[j])))
+        layers[k] = layer
+        if progress is not None:
+            progress(f"{len(layer)} positions with {k} pieces in all")
+    return layers
+
+
+def _solve_layer(engine, packer, layers, values, k):
+    """
+    Solves the positions of a layer by retrograde analysis (see
+    tablebase.retrograde()), the layers below it being solved already.
+
+    Captures leave the layer, and the positions they reach have known
+    results. Each result is stood in for by a chain of extra nodes where
+    the last one has no moves: the node d moves from its end is a loss in
+    d plies if d is even and a win if it is odd, as in any solved graph. A
+    draw is stood in for by a node whose only move leads back to itself.
+
+    Args:
+        engine (BitboardEngine): engine to generate the moves on
+        packer (StatePacker): packer for the board size
+        layers (dict[int, array('Q')]): sorted keys of each layer
+        values (dict[int, array('H')]): results of the layers below
+        k (int): number of pieces of the layer
+
+    Returns:
+        The results of the layer's positions, packed as in a tablebase entry
+        (array('H'))
+    """
+    keys = layers[k]
+    n = len(keys)
+    longest = max((max(values[j], default=0) >> 2 for j in values),
+                  default=0)
+    draw = n + longest + 1
+
+    degree = array("i")
+    sources = array("i")
+    targets = array("i")
+    for i, key in enumerate(keys):
+        children = _children(engine, packer, key)
+        degree.append(len(children))
+        for child, taken in children:
+            if taken:
+                below = layers[k - taken]
+                value = values[k - taken][bisect_left(below, child)]
+                j = n + (value >> 2) if value & 3 else draw
+            else:
+                j = bisect_left(keys, child)
+            sources.append(i)
+            targets.append(j)
+
+    # The chain of results and the draw node
+    degree.append(0)
+    for d in range(1, longest + 1):
+        degree.append(1)
+        sources.append(n + d)
+        targets.append(n + d - 1)
+    degree.append(1)
+    sources.append(draw)
+    targets.append(draw)
+    return retrograde(degree, sources, targets)[:n]
+
+
+def solve(dims, progress=None):
+    """
+    Solves a board: enumerates every position reachable from the starting
+    position and solves them by retrograde analysis.
+
+    The positions are kept as sorted arrays of keys, one for each number of
+    pieces, and a position's node is its index in its array (8 bytes for
+    each position, and the moves of only one layer at a time). The layers
+    are solved from the fewest pieces up.
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+        progress (Optional[Callable[[str], None]]): called with progress
+        messages
+
+    Returns:
+        The solution (Solution)
+    """
+    packer = StatePacker(dims)
+    engine = Checkers(dims // 2 - 1).engine.copy()
+    start = packer.pack(engine.pieces[BLACK], engine.pieces[RED],
+                        engine.kings, BLACK)
+    layers = _enumerate(engine, packer, start, progress)
+
+    values = {}
+    for k in sorted(layers):
+        if progress is not None:
+            progress(f"Solving the positions with {k} pieces")
+        values[k] = _solve_layer(engine, packer, layers, values, k)
+
+    # Merge the layers into one table sorted by key
+    keys = array("Q")
+    table = array("H")
+    for key, value in merge(*(zip(layers[k], values[k]) for k in layers)):
+        keys.append(key)
+        table.append(value)
+    return Solution(dims, keys, table)
+
+
+@click.command(name="checkers-solve")
+@click.option('--size', type=click.INT, default=1)
+@click.option('-o', '--output', type=click.Path(), required=True)
+def cmd(size, output):
+    """
+    Solves a board and saves the table
+    """
+    start = time.perf_counter()
+    solution = solve(size * 2 + 2, print)
+    solution.save(output)
+
+    counts = [0, 0, 0]
+    for value in solution.values:
+        counts[value & 3] += 1
+    print(f"{len(solution)} positions ({counts[WIN]} wins, {counts[LOSS]} "
+          f"losses, {counts[DRAW]} draws), in "
+          f"{time.perf_counter() - start:.1f}s")
+
+    result, distance = solution.probe(Checkers(size).engine, BLACK)
+    if result == DRAW:
+        print("With perfect play, the game is a draw")
+    else:
+        winner = "Black" if result == WIN else "Red"
+        print(f"With perfect play, {winner} wins in {distance} plies")
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,433 @@
+"""
+Endgame tablebases for Checkers.
+
+A tablebase holds the game-theoretic value (win, loss or draw for the side
+to move, and how many plies the win or loss takes with best play) of every
+position with up to a given number of pieces on one board size. It is
+generated offline by retrograde analysis, and saved as a flat file of
+16-bit entries that is read through mmap, so looking up a position is a
+single indexed read with no load step.
+
+Positions are indexed by their number of pieces k, the set of squares the
+pieces are on (ranked in colexicographic order among the dark squares), the
+kind of each piece (BLACK/RED man/king, as in BitboardEngine.kind()) and the
+side to move. Entries hold the result in their two low bits (DRAW, WIN or
+LOSS) and the distance above them. The 79 move draw rule is not taken into
+account, so a very long win can be a draw in a real game.
+
+Examples:
+    1) Generate the tablebase of every 8x8 position with up to 3 pieces::
+        python3 src/tablebase.py --size 3 --pieces 3 -o tb-8x8-3.bin
+
+    2) Look up a game's position::
+        tb = Tablebase("tb-8x8-3.bin")
+        side = BLACK if game.curr_player == 1 else RED
+        tb.probe(game.engine, side)
+"""
+
+import mmap
+import struct
+import sys
+import time
+from array import array
+from itertools import combinations, product
+from math import comb
+
+import click
+
+from bitboard import BitboardEngine, BLACK, RED, SQUARE_BITS, SQUARE_MASK, \
+    bits
+
+# bytes: First bytes of every tablebase file
+MAGIC = b"CKTB"
+
+# int: Version of the file format
+VERSION = 1
+
+# struct.Struct: File header: magic, version, board dimensions and maximum
+# number of pieces
+HEADER = struct.Struct("<4sHHH")
+
+# int: Results stored in the tablebase, for the side to move
+DRAW = 0
+WIN = 1
+LOSS = 2
+
+
+class TablebaseIndex:
+    """
+    Class for mapping positions to their index in a tablebase
+    """
+
+    def __init__(self, dims, max_pieces):
+        """
+        Constructor
+
+        Args:
+            dims (int): Number of rows (and columns) of the board
+            max_pieces (int): Most pieces in a position of the tablebase
+        """
+        engine = BitboardEngine(dims)
+        self.dims = dims
+        self.max_pieces = max_pieces
+
+        # list[int]: Bit index of each dark square, in order
+        self.squares = list(bits(engine.valid))
+
+        # list[int]: Position of each bit index in squares (-1 for ghosts)
+        self.dense = [-1] * len(engine.coords)
+        for i, sq in enumerate(self.squares):
+            self.dense[sq] = i
+
+        # list[list[int]]: Binomial coefficients comb(n, r)
+        n = len(self.squares)
+        self.comb = [[comb(i, r) for r in range(max_pieces + 1)]
+                     for i in range(n + 1)]
+
+        # list[int]: First index (without the side to move) of the positions
+        # with each number of pieces
+        self.offsets = []
+        total = 0
+        for k in range(max_pieces + 1):
+            self.offsets.append(total)
+            total += comb(n, k) * 4 ** k
+
+        # int: Number of entries in the tablebase
+        self.size = 2 * total
+
+
+    def index_of(self, black, red, kings, side):
+        """
+        Gets the index of a position given as masks
+
+        Args:
+            black (int): mask of the black pieces
+            red (int): mask of the red pieces
+            kings (int): mask of the kings
+            side (int): side to move (BLACK or RED)
+
+        Returns:
+            The index (Optional[int]), or None if the position has too many
+            pieces
+        """
+        occupied = black | red
+        k = occupied.bit_count()
+        if k > self.max_pieces:
+            return None
+        dense = self.dense
+        table = self.comb
+        rank = 0
+        kinds = 0
+        i = 0
+        for sq in bits(occupied):
+            i += 1
+            rank += table[dense[sq]][i]
+            kinds = 4 * kinds + 2 * (red >> sq & 1) + (kings >> sq & 1)
+        return 2 * (self.offsets[k] + (rank << 2 * k) + kinds) + side
+
+
+    def index(self, engine, side):
+        """
+        Gets the index of an engine's position
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+
+        Returns:
+            The index (Optional[int]), or None if the position has too many
+            pieces
+        """
+        return self.index_of(engine.pieces[BLACK], engine.pieces[RED],
+                             engine.kings, side)
+
+
+class Tablebase:
+    """
+    Class for reading a tablebase file. The file is memory-mapped, so
+    nothing is read until a position is looked up.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor
+
+        Args:
+            path (str): Path of the tablebase file
+
+        Raises:
+            ValueError: if the file is not a tablebase
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, dims, max_pieces = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a tablebase file")
+        self.dims = dims
+        self.max_pieces = max_pieces
+        self._index = TablebaseIndex(dims, max_pieces)
+        if len(self._map) != HEADER.size + 2 * self._index.size:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+
+    def __getstate__(self):
+        """
+        Pickles only the path, so a Tablebase can be sent to another process
+        (which maps the file again)
+        """
+        return self.path
+
+
+    def __setstate__(self, path):
+        """
+        Maps the file again after unpickling
+        """
+        self.__init__(path)
+
+
+    def close(self):
+        """
+        Unmaps and closes the file
+
+        Args:
+            None
+
+        Returns None
+        """
+        self._map.close()
+        self._file.close()
+
+
+    def probe(self, engine, side):
+        """
+        Looks up a position
+
+        Args:
+            engine (BitboardEngine): engine with the position
+            side (int): side to move (BLACK or RED)
+
+        Returns:
+            The result for the side to move (DRAW, WIN or LOSS) and the plies
+            the win or loss takes (tuple(int, int)), or None if the position
+            is not in the tablebase
+        """
+        if engine.dims != self.dims:
+            return None
+        i = self._index.index(engine, side)
+        if i is None:
+            return None
+        entry = self._map[HEADER.size + 2 * i] | \
+            self._map[HEADER.size + 2 * i + 1] << 8
+        return entry & 3, entry >> 2
+
+
+def _successors(engine, index, black, red, kings, side):
+    """
+    Gets the indices of the positions reached by every legal move
+
+    Args:
+        engine (BitboardEngine): engine set up with the position
+        index (TablebaseIndex): index of the tablebase
+        black (int): mask of the black pieces
+        red (int): mask of the red pieces
+        kings (int): mask of the kings
+        side (int): side to move (BLACK or RED)
+
+    Returns:
+        Indices of the positions (list[int])
+    """
+    crown_rows = engine.crown_rows
+    found = []
+    for move in engine.legal_moves(side):
+        frm = move & SQUARE_MASK
+        to = move >> SQUARE_BITS & SQUARE_MASK
+        captured = move >> 2 * SQUARE_BITS
+        moved = (1 << frm) | (1 << to)
+        new_kings = kings & ~captured
+        if kings >> frm & 1 or crown_rows >> to & 1:
+            new_kings = (new_kings & ~(1 << frm)) | (1 << to)
+        if side == BLACK:
+            found.append(index.index_of(black ^ moved, red & ~captured,
+                                        new_kings, RED))
+        else:
+            found.append(index.index_of(black & ~captured, red ^ moved,
+                                        new_kings, BLACK))
+    return found
+
+
+def generate(dims, max_pieces, progress=None):
+    """
+    Generates a tablebase: every position's moves are generated once to
+    build the graph of positions, which is then solved by retrograde().
+
+    Positions that can't happen in a game (men on the row where they would
+    be crowned) are left as draws.
+
+    Args:
+        dims (int): Number of rows (and columns) of the board
+        max_pieces (int): Most pieces in a position
+        progress (Optional[Callable[[str], None]]): called with progress
+        messages
+
+    Returns:
+        The entries of the tablebase (array('H'))
+    """
+    index = TablebaseIndex(dims, max_pieces)
+    engine = BitboardEngine(dims)
+    squares = index.squares
+    black_crown = red_crown = 0
+    for sq in squares:
+        if engine.coords[sq][0] == 0:
+            black_crown |= 1 << sq
+        elif engine.coords[sq][0] == dims - 1:
+            red_crown |= 1 << sq
+
+    # Out-degree of every position, and the edges of the graph
+    degree = array("i", bytes(4 * index.size))
+    sources = array("i")
+    targets = array("i")
+    valid = bytearray(index.size)
+    for k in range(max_pieces + 1):
+        if progress is not None:
+            progress(f"Generating moves of positions with {k} pieces")
+        for chosen in combinations(squares, k):
+            for kinds in product(range(4), repeat=k):
+                black = red = kings = 0
+                for sq, kind in zip(chosen, kinds):
+                    if kind >= 2:
+                        red |= 1 << sq
+                    else:
+                        black |= 1 << sq
+                    if kind & 1:
+                        kings |= 1 << sq
+                if (black & ~kings & black_crown) or \
+                    (red & ~kings & red_crown):
+                    continue
+                engine.pieces = [black, red]
+                engine.kings = kings
+                engine.version += 1
+                for side in (BLACK, RED):
+                    i = index.index_of(black, red, kings, side)
+                    valid[i] = 1
+                    found = _successors(engine, index, black, red, kings,
+                                        side)
+                    degree[i] = len(found)
+                    sources.extend([i] * len(found))
+                    targets.extend(found)
+
+    return retrograde(degree, sources, targets, valid, progress)
+
+
+def retrograde(degree, sources, targets, valid=None, progress=None):
+    """
+    Solves a graph of positions by retrograde analysis. Starting from the
+    positions where the side to move can't move (losses), results are
+    propagated backwards in order of distance: a position with a move to a
+    loss is a win, and a position whose every move leads to a win is a loss.
+    Positions that are never reached this way are draws.
+
+    Args:
+        degree (array('i')): number of moves of each position. It is used
+        as a counter, so it is changed.
+        sources (array('i')): position each move is played from
+        targets (array('i')): position each move leads to
+        valid (Optional[bytearray]): which positions can happen in a game
+        (if None, every position can)
+        progress (Optional[Callable[[str], None]]): called with progress
+        messages
+
+    Returns:
+        The result and distance of each position, packed as in a tablebase
+        entry (array('H'))
+    """
+    size = len(degree)
+
+    # Predecessors of every position, sorted by position (counting sort)
+    if progress is not None:
+        progress(f"Sorting {len(targets)} moves")
+    starts = array("i", bytes(4 * (size + 1)))
+    for t in targets:
+        starts[t + 1] += 1
+    for i in range(size):
+        starts[i + 1] += starts[i]
+    fill = array("i", starts)
+    predecessors = array("i", bytes(4 * len(targets)))
+    for s, t in zip(sources, targets):
+        predecessors[fill[t]] = s
+        fill[t] += 1
+    del fill
+
+    # Propagate the results backwards, in order of distance
+    if progress is not None:
+        progress("Propagating results")
+    values = array("H", bytes(2 * size))
+    queue = []
+    for i in range(size):
+        if degree[i] == 0 and (valid is None or valid[i]):
+            values[i] = LOSS
+            queue.append(i)
+    for i in queue:
+        result = values[i] & 3
+        distance = (values[i] >> 2) + 1
+        for j in predecessors[starts[i]:starts[i + 1]]:
+            if values[j]:
+                continue
+            if result == LOSS:
+                values[j] = WIN | distance << 2
+                queue.append(j)
+            else:
+                degree[j] -= 1
+                if degree[j] == 0:
+                    values[j] = LOSS | distance << 2
+                    queue.append(j)
+    return values
+
+
+def save(path, dims, max_pieces, values):
+    """
+    Writes a tablebase file
+
+    Args:
+        path (str): Path of the file
+        dims (int): Number of rows (and columns) of the board
+        max_pieces (int): Most pieces in a position
+        values (array('H')): entries returned by generate()
+
+    Returns None
+    """
+    if sys.byteorder != "little":
+        values = array("H", values)
+        values.byteswap()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, dims, max_pieces))
+        f.write(values.tobytes())
+
+
+@click.command(name="checkers-tablebase")
+@click.option('--size', type=click.INT, default=3)
+@click.option('--pieces', type=click.INT, default=3)
+@click.option('-o', '--output', type=click.Path(), required=True)
+def cmd(size, pieces, output):
+    """
+    Generates the tablebase of every position with up to --pieces pieces on
+    a board of the given size
+    """
+    dims = size * 2 + 2
+    start = time.perf_counter()
+    values = generate(dims, pieces, print)
+    save(output, dims, pieces, values)
+
+    counts = [0, 0, 0]
+    for value in values:
+        counts[value & 3] += 1
+    longest = max(value >> 2 for value in values)
+    print(f"{len(values)} entries ({counts[WIN]} wins, {counts[LOSS]} losses, "
+          f"{counts[DRAW]} draws or unreachable), longest win "
+          f"{longest} plies, in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    cmd()
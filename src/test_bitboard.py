@@ -0,0 +1,308 @@
+"""
+Tests for the bitboard move generation, checked against a plain
+coordinate-based move generator.
+"""
+
+import random
+
+import pytest
+
+from bitboard import (BitboardEngine, BLACK, KING, RED, bits, count_captures,
+                      decode_move, encode_move, flatten_captures)
+
+# list[tuple(int, int)]: Directions a non-king piece of each side can move
+MAN_DIRS = [[(-1, -1), (-1, 1)], [(1, -1), (1, 1)]]
+
+# list[tuple(int, int)]: Directions a king can move
+KING_DIRS = [(1, -1), (1, 1), (-1, -1), (-1, 1)]
+
+
+def _random_engine(rng, dims, density=0.4, king_rate=0.3):
+    """
+    Makes a random position: every dark square gets a piece with the given
+    probability. Non-king pieces are never put on their crowning row.
+    """
+    engine = BitboardEngine(dims)
+    for sq, coords in enumerate(engine.coords):
+        if coords is None or rng.random() >= density:
+            continue
+        side = rng.choice((BLACK, RED))
+        crowned = coords[0] == (0 if side == BLACK else dims - 1)
+        engine.add(sq, side, crowned or rng.random() < king_rate)
+    return engine
+
+
+def _grid(engine):
+    """
+    Gets the pieces of a position by coordinates: (side, king) for each
+    occupied square
+    """
+    grid = {}
+    for sq, coords in enumerate(engine.coords):
+        if coords is not None and engine.kind(sq) is not None:
+            side = BLACK if engine.pieces[BLACK] >> sq & 1 else RED
+            grid[coords] = (side, bool(engine.kings >> sq & 1))
+    return grid
+
+
+def _naive_captures(grid, dims, pos, side, dirs, jumped):
+    """
+    Lists every maximal capture sequence from pos, jumped pieces staying on
+    the board until the sequence is over
+    """
+    paths = []
+    for dr, dc in dirs:
+        over = (pos[0] + dr, pos[1] + dc)
+        land = (pos[0] + 2 * dr, pos[1] + 2 * dc)
+        if not (0 <= land[0] < dims and 0 <= land[1] < dims):
+            continue
+        if over in jumped or grid.get(over, (side,))[0] == side:
+            continue
+        if land in grid:
+            continue
+        rest = _naive_captures(grid, dims, land, side, dirs, jumped | {over})
+        paths.extend([[land] + path for path in rest] or [[land]])
+    return paths
+
+
+def naive_player_paths(engine, side):
+    """
+    Gets the legal move sequences of a side, by coordinates, one square at
+    a time
+    """
+    dims = engine.dims
+    grid = _grid(engine)
+    # As in the original Piece.legal_move_dfs(), the moving piece stays on
+    # its square until the sequence is over, so it can't land back on it
+    moves = {}
+    for pos, (owner, king) in grid.items():
+        if owner != side:
+            continue
+        dirs = KING_DIRS if king else MAN_DIRS[side]
+        captures = _naive_captures(grid, dims, pos, side, dirs, frozenset())
+        if captures:
+            moves[pos] = captures
+    if moves:
+        return moves
+
+    for pos, (owner, king) in grid.items():
+        if owner != side:
+            continue
+        steps = []
+        for dr, dc in KING_DIRS if king else MAN_DIRS[side]:
+            to = (pos[0] + dr, pos[1] + dc)
+            if 0 <= to[0] < dims and 0 <= to[1] < dims and to not in grid:
+                steps.append([to])
+        if steps:
+            moves[pos] = steps
+    return moves
+
+
+def _engine_paths(engine, side):
+    """
+    Gets the legal move sequences of a side from the engine, converted to
+    coordinates
+    """
+    return {engine.coords[sq]: [[engine.coords[to] for to in path]
+                                for path in paths]
+            for sq, paths in engine.player_paths(side).items()}
+
+
+def _sorted(moves):
+    return {pos: sorted(paths) for pos, paths in moves.items()}
+
+
+def _state(engine):
+    return (list(engine.pieces), engine.kings, engine.key)
+
+
+@pytest.mark.parametrize("dims", [4, 6, 8, 10, 20])
+def test_player_paths_match_naive_generator(dims):
+    rng = random.Random(dims)
+    for _ in range(300):
+        engine = _random_engine(rng, dims, density=rng.uniform(0.1, 0.7))
+        for side in (BLACK, RED):
+            assert _sorted(_engine_paths(engine, side)) == \
+                _sorted(naive_player_paths(engine, side))
+
+
+@pytest.mark.parametrize("dims", [4, 8, 10])
+def test_piece_paths_and_legal_moves_agree(dims):
+    rng = random.Random(100 + dims)
+    for _ in range(200):
+        engine = _random_engine(rng, dims)
+        for side in (BLACK, RED):
+            paths = engine.player_paths(side)
+            moves = engine.player_moves(side)
+            assert list(paths) == list(moves)
+            assert engine.has_moves(side) == bool(paths)
+            assert engine.legal_moves(side) == \
+                [move for codes in moves.values() for move in codes]
+            for sq, piece_paths in paths.items():
+                assert sorted(engine.piece_paths(sq)) == sorted(piece_paths)
+                # Paths with the same start, end and captures share a code
+                codes = {engine.path_to_move(sq, path) for path in piece_paths}
+                assert codes == set(moves[sq])
+
+
+def test_encode_decode_round_trip():
+    rng = random.Random(0)
+    for _ in range(1000):
+        frm = rng.randrange(1 << 16)
+        to = rng.randrange(1 << 16)
+        captured = rng.getrandbits(rng.randrange(1, 300))
+        assert decode_move(encode_move(frm, to, captured)) == \
+            (frm, to, captured)
+    assert decode_move(encode_move(3, 7)) == (3, 7, 0)
+
+
+@pytest.mark.parametrize("dims", [4, 8, 10])
+def test_move_path_round_trip(dims):
+    rng = random.Random(200 + dims)
+    for _ in range(200):
+        engine = _random_engine(rng, dims)
+        for side in (BLACK, RED):
+            for sq, paths in engine.player_paths(side).items():
+                for path in paths:
+                    move = engine.path_to_move(sq, path)
+                    expanded = engine.move_to_path(move)
+                    assert engine.path_to_move(sq, expanded) == move
+                    assert expanded[-1] == path[-1]
+
+
+@pytest.mark.parametrize("dims", [4, 8, 10])
+def test_make_unmake_round_trip(dims):
+    rng = random.Random(300 + dims)
+    for _ in range(100):
+        engine = _random_engine(rng, dims)
+        side = rng.choice((BLACK, RED))
+        records = []
+        states = []
+        for _ in range(30):
+            moves = engine.legal_moves(side)
+            if not moves:
+                break
+            states.append(_state(engine))
+            move = rng.choice(moves)
+            frm, to, captured = decode_move(move)
+            crowned = engine.kings >> frm & 1 or \
+                engine.crown_rows >> to & 1
+            records.append(engine.make(move))
+
+            assert engine.key == engine.compute_key()
+            assert engine.pieces[side] >> to & 1
+            assert not engine.pieces[side] >> frm & 1
+            assert not (engine.pieces[BLACK] | engine.pieces[RED]) & captured
+            assert bool(engine.kings >> to & 1) == bool(crowned)
+            side = 1 - side
+
+        while records:
+            version = engine.version
+            engine.unmake(records.pop())
+            assert engine.version > version
+            assert _state(engine) == states.pop()
+            assert engine.key == engine.compute_key()
+
+
+def test_make_matches_paths():
+    rng = random.Random(7)
+    for _ in range(200):
+        engine = _random_engine(rng, 8)
+        for side in (BLACK, RED):
+            for sq, paths in engine.player_paths(side).items():
+                for path in paths:
+                    after = engine.copy()
+                    after.make(engine.path_to_move(sq, path))
+                    grid = _grid(engine)
+                    owner, king = grid.pop(engine.coords[sq])
+                    prev = engine.coords[sq]
+                    for to in path:
+                        to = engine.coords[to]
+                        if abs(to[0] - prev[0]) == 2:
+                            del grid[((to[0] + prev[0]) // 2,
+                                      (to[1] + prev[1]) // 2)]
+                        prev = to
+                    king = king or prev[0] in (0, engine.dims - 1)
+                    grid[prev] = (owner, king)
+                    assert _grid(after) == grid
+
+
+
+def _naive_piece_captures(engine, sq):
+    """
+    Lists the capture sequences of the piece on a square, by coordinates
+    """
+    grid = _grid(engine)
+    pos = engine.coords[sq]
+    side, king = grid[pos]
+    dirs = KING_DIRS if king else MAN_DIRS[side]
+    return _naive_captures(grid, engine.dims, pos, side, dirs, frozenset())
+
+
+def _tree_coords(engine, tree):
+    return sorted([engine.coords[sq] for sq in path]
+                  for path in flatten_captures(tree))
+
+
+@pytest.mark.parametrize("dims", [4, 8, 10, 16])
+def test_capture_tree_matches_naive_capture_search(dims):
+    rng = random.Random(400 + dims)
+    for _ in range(300):
+        # Dense positions with many kings have long, branching captures
+        engine = _random_engine(rng, dims, density=rng.uniform(0.3, 0.8),
+                                king_rate=0.6)
+        state = _state(engine)
+        memos = {}
+        for sq in bits(engine.pieces[BLACK] | engine.pieces[RED]):
+            tree = engine.capture_tree(sq)
+            expected = sorted(_naive_piece_captures(engine, sq))
+            assert _tree_coords(engine, tree) == expected
+            assert count_captures(tree) == len(expected)
+            assert bool(tree) == bool(engine.jumpers(
+                BLACK if engine.pieces[BLACK] >> sq & 1 else RED) >> sq & 1)
+
+            # Pieces of the same side and kind can share a memo
+            side, kind = engine._kind(sq)
+            memo = memos.setdefault((side, kind == KING), {})
+            shared = engine.capture_tree(sq, memo)
+            assert _tree_coords(engine, shared) == expected
+        assert _state(engine) == state
+
+
+def _follow(engine, tree, path):
+    """
+    Gets the node of a capture tree reached by a sequence of coordinates
+    """
+    node = tree
+    for pos in path:
+        node = next(child for _, land, child in node
+                    if engine.coords[land] == pos)
+    return node
+
+
+def test_capture_tree_shares_nodes():
+    # A king enters a ring of four pieces at (4, 3) and can go round it
+    # either way, then take (3, 2): both orders reach the same state
+    engine = BitboardEngine(8)
+    engine.add(engine.square(6, 1), BLACK, king=True)
+    for r, c in [(5, 2), (3, 4), (3, 6), (5, 6), (5, 4), (3, 2)]:
+        engine.add(engine.square(r, c), RED)
+    tree = engine.capture_tree(engine.square(6, 1))
+    paths = _tree_coords(engine, tree)
+    assert paths == sorted(_naive_piece_captures(engine, engine.square(6, 1)))
+    assert count_captures(tree) == len(paths)
+
+    clockwise = [(4, 3), (2, 5), (4, 7), (6, 5), (4, 3)]
+    anticlockwise = [(4, 3), (6, 5), (4, 7), (2, 5), (4, 3)]
+    assert clockwise + [(2, 1)] in paths
+    assert anticlockwise + [(2, 1)] in paths
+    assert _follow(engine, tree, clockwise) is \
+        _follow(engine, tree, anticlockwise)
+
+
+def test_count_captures_of_empty_tree():
+    engine = BitboardEngine(8)
+    engine.add(engine.square(5, 0), BLACK)
+    assert engine.capture_tree(engine.square(5, 0)) == ()
+    assert count_captures(()) == 0
+    assert flatten_captures(()) == []
@@ -0,0 +1,51 @@
+"""
+Tests for the Checkers game logic.
+"""
+
+import random
+
+from checkers import Checkers, PieceColor
+
+
+def _snapshot(game, color):
+    """
+    Gets every kind of legal move list of a player, for comparisons
+    """
+    return ([((piece.row, piece.col), paths)
+             for piece, paths in game.player_legal_moves(color)],
+            [piece.get_legal_moves() for piece, _ in
+             game.player_legal_moves(color)],
+            game.legal_move_codes(color),
+            [((piece.row, piece.col), paths)
+             for piece, paths in game.iter_legal_moves(color)])
+
+
+def test_legal_moves_can_be_modified_without_changing_the_cache():
+    game = Checkers(3)
+    color = PieceColor.BLACK
+    expected = _snapshot(Checkers(3), color)
+
+    moves = game.player_legal_moves(color)
+    random.Random(0).shuffle(moves)
+    moves[0][1].clear()
+    moves.pop()
+    piece_moves = game.player_legal_moves(color)[0][0].get_legal_moves()
+    piece_moves[0].append((0, 0))
+    piece_moves.reverse()
+    codes = game.legal_move_codes(color)
+    codes.sort(reverse=True)
+    codes.pop()
+    for _, paths in game.iter_legal_moves(color):
+        paths.clear()
+
+    assert _snapshot(game, color) == expected
+
+
+def test_legal_moves_follow_the_position():
+    game = Checkers(3)
+    before = _snapshot(game, PieceColor.BLACK)
+    piece, paths = game.player_legal_moves(PieceColor.BLACK)[0]
+    record = game.make_move(piece, paths[0])
+    assert _snapshot(game, PieceColor.BLACK) != before
+    game.unmake_move(record)
+    assert _snapshot(game, PieceColor.BLACK) == before
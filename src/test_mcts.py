@@ -0,0 +1,33 @@
+"""
+Tests for the Monte-Carlo tree search.
+"""
+
+from bitboard import BLACK, RED
+from checkers import Checkers
+from mcts import MCTS
+
+
+def _count(node):
+    return 1 + sum(_count(child) for child in node.children.values())
+
+
+def test_grow_without_time_limit_stops_when_tree_is_full():
+    tree = MCTS(seed=0, max_nodes=300)
+    game = Checkers(3)
+    tree.grow(game.engine, BLACK, 0)
+    assert tree.root.size == _count(tree.root) == 300
+
+
+def test_tree_size_follows_the_root():
+    tree = MCTS(seed=1, max_nodes=200)
+    game = Checkers(3)
+    move = tree.best_move(game.engine, BLACK, 0, None)
+    assert tree.root.move == move
+    assert tree.root.size == _count(tree.root)
+
+    # The tree under the chosen move has room to grow again
+    engine = game.engine.copy()
+    engine.make(move)
+    size = tree.root.size
+    tree.grow(engine, RED, 1)
+    assert size < tree.root.size == _count(tree.root) == 200
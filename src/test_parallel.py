@@ -0,0 +1,62 @@
+"""
+Tests for the parallel search.
+"""
+
+import random
+
+from bitboard import BLACK
+from checkers import Checkers
+import parallel
+from parallel import ParallelSearch
+from search import Search
+
+
+def _positions(n, plies, seed):
+    """
+    Plays random moves from the start to get positions to search
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < n:
+        engine = Checkers(3).engine.copy()
+        side = BLACK
+        for _ in range(plies):
+            moves = engine.legal_moves(side)
+            if not moves:
+                break
+            engine.make(rng.choice(moves))
+            side = 1 - side
+        if len(engine.legal_moves(side)) > 2:
+            positions.append((engine, side))
+    return positions
+
+
+def test_parallel_search_matches_search():
+    # Without tables, every search scores the moves exactly, so splitting
+    # the moves must find the same move and score
+    for engine, side in _positions(6, 12, 0):
+        expected = Search(max_depth=4, hash_mb=0)
+        move = expected.best_move(engine, side)
+        for workers in (2, 3):
+            search = ParallelSearch(workers, max_depth=4, hash_mb=0)
+            assert search.best_move(engine, side) == move
+            assert search.score == expected.score
+            assert search.depth == 4
+
+
+def test_parallel_search_is_repeatable():
+    # Each worker gets the same moves every time, so the same searches from
+    # fresh workers give the same results, down to the nodes searched,
+    # whichever worker process is free first
+    positions = _positions(4, 10, 1)
+    results = []
+    for _ in range(2):
+        for worker in parallel._POOLS.pop(2, []):
+            worker.shutdown()
+        found = []
+        for engine, side in positions:
+            search = ParallelSearch(2, max_depth=5)
+            found.append((search.best_move(engine, side), search.score,
+                          search.nodes))
+        results.append(found)
+    assert results[0] == results[1]
@@ -0,0 +1,31 @@
+"""
+Tests for the alpha-beta search.
+"""
+
+from bitboard import BitboardEngine, BLACK, RED
+from search import Search
+
+
+def _exchange():
+    """
+    Makes a position where every black move leads to a run of captures
+    """
+    engine = BitboardEngine(8)
+    engine.add(engine.square(5, 2), BLACK)
+    engine.add(engine.square(6, 1), BLACK)
+    engine.add(engine.square(7, 0), BLACK)
+    engine.add(engine.square(2, 5), RED)
+    engine.add(engine.square(3, 4), RED)
+    engine.add(engine.square(1, 6), RED)
+    return engine
+
+
+def test_quiescence_limit_hits_need_a_limit():
+    search = Search(max_depth=1, hash_mb=0, q_node_limit=0)
+    search.best_move(_exchange(), BLACK)
+    assert search.qnodes == 0
+    assert search.q_limit_hits == 0
+
+    search = Search(max_depth=1, hash_mb=0, q_node_limit=1)
+    search.best_move(_exchange(), BLACK)
+    assert search.q_limit_hits > 0
@@ -0,0 +1,42 @@
+"""
+Tests for the solver of small boards.
+"""
+
+import random
+
+from bitboard import BLACK, RED
+from checkers import Checkers
+from solve import Solution, StatePacker, solve
+from tablebase import DRAW
+
+
+def test_pack_unpack_round_trip():
+    packer = StatePacker(6)
+    rng = random.Random(0)
+    squares = [sq for sq, coords in enumerate(Checkers(2).engine.coords)
+               if coords is not None]
+    for _ in range(500):
+        black = red = kings = 0
+        for sq in squares:
+            kind = rng.randrange(6)
+            if kind < 2:
+                black |= 1 << sq
+            elif kind < 4:
+                red |= 1 << sq
+            if kind in (1, 3):
+                kings |= 1 << sq
+        side = rng.choice((BLACK, RED))
+        key = packer.pack(black, red, kings, side)
+        assert packer.unpack(key) == (black, red, kings, side)
+
+
+def test_solve_4x4(tmp_path):
+    solution = solve(4)
+    assert len(solution) == 2409
+    assert solution.probe(Checkers(1).engine, BLACK)[0] == DRAW
+
+    path = str(tmp_path / "solve-4x4.bin")
+    solution.save(path)
+    loaded = Solution.load(path)
+    assert list(loaded.keys) == list(solution.keys)
+    assert list(loaded.values) == list(solution.values)
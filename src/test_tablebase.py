@@ -0,0 +1,132 @@
+"""
+Tests for the endgame tablebases.
+"""
+
+from itertools import combinations, product
+
+import pytest
+
+from bitboard import BitboardEngine, BLACK, RED
+from solve import StatePacker, solve
+from tablebase import (DRAW, LOSS, WIN, Tablebase, TablebaseIndex, generate,
+                       save)
+
+
+def _positions(index, max_pieces):
+    """
+    Lists every position with up to max_pieces pieces, as masks and side to
+    move
+    """
+    for k in range(max_pieces + 1):
+        for chosen in combinations(index.squares, k):
+            for kinds in product(range(4), repeat=k):
+                black = red = kings = 0
+                for sq, kind in zip(chosen, kinds):
+                    if kind >= 2:
+                        red |= 1 << sq
+                    else:
+                        black |= 1 << sq
+                    if kind & 1:
+                        kings |= 1 << sq
+                for side in (BLACK, RED):
+                    yield black, red, kings, side
+
+
+@pytest.mark.parametrize("dims,max_pieces", [(4, 3), (6, 2), (8, 2)])
+def test_index_is_a_bijection(dims, max_pieces):
+    index = TablebaseIndex(dims, max_pieces)
+    seen = bytearray(index.size)
+    for position in _positions(index, max_pieces):
+        i = index.index_of(*position)
+        assert 0 <= i < index.size
+        assert not seen[i]
+        seen[i] = 1
+    assert all(seen)
+
+
+def test_index_of_engine():
+    index = TablebaseIndex(8, 3)
+    engine = BitboardEngine(8)
+    engine.add(engine.square(5, 0), BLACK)
+    engine.add(engine.square(2, 3), RED, king=True)
+    for side in (BLACK, RED):
+        assert index.index(engine, side) == index.index_of(
+            engine.pieces[BLACK], engine.pieces[RED], engine.kings, side)
+    engine.add(engine.square(0, 1), RED)
+    engine.add(engine.square(7, 6), BLACK, king=True)
+    assert index.index(engine, BLACK) is None
+
+
+@pytest.fixture(scope="module")
+def tablebase_4x4(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tb") / "tb-4x4-3.bin")
+    values = generate(4, 3)
+    save(path, 4, 3, values)
+    tablebase = Tablebase(path)
+    yield values, tablebase
+    tablebase.close()
+
+
+def test_saved_tablebase_matches_generated_values(tablebase_4x4):
+    values, tablebase = tablebase_4x4
+    index = TablebaseIndex(4, 3)
+    engine = BitboardEngine(4)
+    for black, red, kings, side in _positions(index, 3):
+        engine.pieces = [black, red]
+        engine.kings = kings
+        value = values[index.index_of(black, red, kings, side)]
+        assert tablebase.probe(engine, side) == (value & 3, value >> 2)
+    squares = index.squares
+    engine.pieces = [1 << squares[0] | 1 << squares[1],
+                     1 << squares[-1] | 1 << squares[-2]]
+    engine.kings = engine.pieces[BLACK] | engine.pieces[RED]
+    assert tablebase.probe(engine, BLACK) is None
+    assert tablebase.probe(BitboardEngine(6), BLACK) is None
+
+
+def test_tablebase_agrees_with_solved_4x4(tablebase_4x4):
+    # Moves never add pieces, so the results of the positions with up to 3
+    # pieces don't depend on the rest of the game
+    _, tablebase = tablebase_4x4
+    solution = solve(4)
+    packer = StatePacker(4)
+    index = TablebaseIndex(4, 3)
+    engine = BitboardEngine(4)
+    checked = 0
+    for black, red, kings, side in _positions(index, 3):
+        found = solution.probe_key(packer.pack(black, red, kings, side))
+        if found is None:
+            continue
+        engine.pieces = [black, red]
+        engine.kings = kings
+        assert tablebase.probe(engine, side) == found
+        checked += 1
+    assert checked > 100
+
+
+def test_tablebase_results():
+    values = generate(4, 2)
+    index = TablebaseIndex(4, 2)
+    engine = BitboardEngine(4)
+
+    # No pieces: the side to move can't move
+    assert values[index.index_of(0, 0, 0, BLACK)] == LOSS
+
+    # A lone king wins at once by having the only moves
+    king = engine.square(1, 2)
+    value = values[index.index_of(1 << king, 0, 1 << king, RED)]
+    assert value == LOSS
+    value = values[index.index_of(1 << king, 0, 1 << king, BLACK)]
+    assert value & 3 == WIN
+
+    # Positions with up to two pieces have every kind of result
+    results = {values[index.index_of(*position)] & 3
+               for position in _positions(index, 2)}
+    assert results == {DRAW, WIN, LOSS}
+
+
+def test_not_a_tablebase(tmp_path):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"NOPE" + bytes(100))
+    with pytest.raises(ValueError):
+        Tablebase(str(path))
@@ -0,0 +1,77 @@
+"""
+Tests for the transposition table.
+"""
+
+import random
+
+from search import WIN
+from transposition import EXACT, LOWER, UPPER, MOVE_MASK, TranspositionTable
+
+
+def _keys(count, bucket=5):
+    """
+    Gets distinct 64-bit keys that all fall in the same bucket
+    """
+    rng = random.Random(bucket)
+    return [(rng.getrandbits(48) << 16) | bucket for _ in range(count)]
+
+
+def test_store_and_probe():
+    table = TranspositionTable(1)
+    rng = random.Random(0)
+    for _ in range(200):
+        key = rng.getrandbits(64)
+        depth = rng.randrange(128)
+        bound = rng.choice((EXACT, LOWER, UPPER))
+        score = rng.randint(-WIN, WIN)
+        move = rng.getrandbits(80)
+        table.store(key, depth, bound, score, move)
+        assert table.probe(key) == (move & MOVE_MASK, depth, bound, score)
+
+
+def test_probe_missing_position():
+    table = TranspositionTable(1)
+    first, second = _keys(2)
+    assert table.probe(first) is None
+    table.store(first, 3, EXACT, 10)
+    assert table.probe(second) is None
+    assert table.hits == 0 and table.misses == 2 and table.collisions == 1
+    assert table.probe(first) == (0, 3, EXACT, 10)
+    assert table.hits == 1
+
+
+def test_store_replaces_same_position():
+    table = TranspositionTable(1)
+    key, = _keys(1)
+    table.store(key, 8, LOWER, 50, 1)
+    table.store(key, 2, UPPER, -20, 2)
+    assert table.probe(key) == (2, 2, UPPER, -20)
+
+
+def test_deeper_result_is_kept_in_the_same_search():
+    table = TranspositionTable(1)
+    deep, first, second = _keys(3)
+    table.store(deep, 9, EXACT, 1)
+    table.store(first, 1, EXACT, 2)
+    table.store(second, 1, EXACT, 3)
+    assert table.probe(deep) == (0, 9, EXACT, 1)
+    assert table.probe(second) == (0, 1, EXACT, 3)
+    assert table.probe(first) is None
+
+
+def test_results_of_earlier_searches_can_be_replaced():
+    # An entry stays protected only during the search that stored it, even
+    # when the searches are a multiple of four apart
+    for searches in (1, 4, 5, 8, 1000):
+        table = TranspositionTable(1)
+        deep, first, second = _keys(3)
+        table.store(deep, 9, EXACT, 1)
+        for _ in range(searches):
+            table.new_search()
+        table.store(first, 1, EXACT, 2)
+        assert table.probe(deep) == (0, 9, EXACT, 1)
+        table.store(second, 1, EXACT, 3)
+        assert table.probe(deep) is None
+        assert table.probe(first) == (0, 1, EXACT, 2)
+        assert table.probe(second) == (0, 1, EXACT, 3)
+
@@ -0,0 +1,193 @@
+"""
+Fixed-size transposition table for the search.
+
+The table remembers the result of searching each position (keyed by its
+Zobrist hash), so a position reached again through a different move order,
+in a later iteration or on a later turn, doesn't need to be searched again.
+Its memory is allocated once, in a flat array of 64-bit words, and never
+grows: when it is full, old results are replaced.
+
+The table is split into buckets of two entries. The first entry of a
+bucket keeps the result of the deepest search (depth-preferred), and the
+second one always takes the newest result (always-replace). Each entry is
+two words. The first one is the position's hash, with its low 16 bits
+replaced by the generation (which search stored it): the low bits of the
+hash already pick the bucket, so few of them are lost (none once the table
+has 2**16 buckets), and the generation only comes back around after 65536
+searches. The second word is its data, packed as:
+
+    bits  0-31: best move (square it starts on and square it ends on)
+    bits 32-38: depth searched
+    bits 39-40: bound (EXACT, LOWER or UPPER; 0 if the entry is empty)
+    bits 41-63: score + SCORE_OFFSET
+
+Examples:
+    1) Create a 16 MiB table, and store and look up a result::
+        tt = TranspositionTable(16)
+        tt.store(key, depth, EXACT, score, move)
+        tt.probe(key)
+
+    2) Check how well it is working::
+        tt.hits, tt.misses, tt.collisions
+"""
+
+from array import array
+
+# int: Bound types. EXACT scores are exact, LOWER scores are lower bounds
+# (the search failed high) and UPPER scores are upper bounds (it failed low)
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# int: Added to scores so that they are stored as unsigned ints
+SCORE_OFFSET = 1 << 20
+
+# int: Mask of the part of an encoded move stored in the table
+MOVE_MASK = (1 << 32) - 1
+
+# int: Words per bucket (two entries of two words)
+BUCKET_WORDS = 4
+
+# int: Number of low bits of an entry's hash word holding its generation
+GENERATION_BITS = 16
+GENERATION_MASK = (1 << GENERATION_BITS) - 1
+
+
+class TranspositionTable:
+    """
+    Class for a fixed-size transposition table
+    """
+
+    def __init__(self, size_mb=16):
+        """
+        Constructor
+
+        Args:
+            size_mb (float): Memory budget of the table, in MiB. The number
+            of buckets is rounded down to a power of two.
+        """
+        buckets = max(1, int(size_mb * 2 ** 20) // (8 * BUCKET_WORDS))
+        # int: Number of buckets in the table
+        self.buckets = 1 << (buckets.bit_length() - 1)
+        self._mask = self.buckets - 1
+        self._words = array("Q", bytes(8 * BUCKET_WORDS * self.buckets))
+
+        # int: Generation of the current search (see new_search())
+        self.generation = 0
+
+        # int: Probes that found the position
+        self.hits = 0
+
+        # int: Probes that did not find the position
+        self.misses = 0
+
+        # int: Probes that did not find the position, in a bucket holding
+        # other positions
+        self.collisions = 0
+
+        # int: Results stored
+        self.stores = 0
+
+
+    def __len__(self):
+        """
+        Gets the number of entries the table can hold
+
+        Returns:
+            Number of entries (int)
+        """
+        return 2 * self.buckets
+
+
+    def new_search(self):
+        """
+        Starts a new search: entries stored by earlier searches are kept,
+        but the depth-preferred entries can now be replaced by any result
+
+        Args:
+            None
+
+        Returns None
+        """
+        self.generation = (self.generation + 1) & GENERATION_MASK
+
+
+    def clear(self):
+        """
+        Empties the table and resets its counters
+
+        Args:
+            None
+
+        Returns None
+        """
+        self._words = array("Q", bytes(8 * BUCKET_WORDS * self.buckets))
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+
+    def probe(self, key):
+        """
+        Looks up a position
+
+        Args:
+            key (int): Zobrist hash of the position
+
+        Returns:
+            The best move (only its start and end squares), depth, bound and
+            score stored for the position (tuple(int, int, int, int)), or
+            None if it is not in the table
+        """
+        words = self._words
+        i = (key & self._mask) * BUCKET_WORDS
+        check = key >> GENERATION_BITS
+        for j in (i, i + 2):
+            data = words[j + 1]
+            if words[j] >> GENERATION_BITS == check and data >> 39 & 3:
+                self.hits += 1
+                return (data & MOVE_MASK, data >> 32 & 127, data >> 39 & 3,
+                        (data >> 41) - SCORE_OFFSET)
+        self.misses += 1
+        if words[i + 1] or words[i + 3]:
+            self.collisions += 1
+        return None
+
+
+    def store(self, key, depth, bound, score, move=0):
+        """
+        Stores the result of searching a position
+
+        Args:
+            key (int): Zobrist hash of the position
+            depth (int): depth searched, in plies (0-127)
+            bound (int): EXACT, LOWER or UPPER
+            score (int): score found
+            move (int): best move found (encoded), or 0 if there is none
+
+        Returns None
+        """
+        self.stores += 1
+        words = self._words
+        i = (key & self._mask) * BUCKET_WORDS
+        check = key >> GENERATION_BITS
+        tag = (check << GENERATION_BITS) | self.generation
+        data = (move & MOVE_MASK) | (depth << 32) | (bound << 39) | \
+            ((score + SCORE_OFFSET) << 41)
+
+        # The new result goes in the depth-preferred entry if it was searched
+        # at least as deep as the result there, or if that result is for the
+        # same position or from an earlier search. The result it replaces
+        # moves to the always-replace entry.
+        old = words[i + 1]
+        same = words[i] >> GENERATION_BITS == check
+        if same or not old >> 39 & 3 or depth >= (old >> 32 & 127) or \
+            (words[i] & GENERATION_MASK) != self.generation:
+            if not same and old >> 39 & 3:
+                words[i + 2] = words[i]
+                words[i + 3] = old
+            elif words[i + 2] >> GENERATION_BITS == check:
+                words[i + 3] = 0
+            words[i] = tag
+            words[i + 1] = data
+        else:
+            words[i + 2] = tag
+            words[i + 3] = data
@@ -9,7 +9,8 @@ from colorama import Fore, Style
 from checkers import Board, Checkers, Piece, PieceColor, PieceType
 from mocks import BoardMock, CheckersMock, PieceMock
 
-from bot import RandomBot, SmartBot
+from bot import RandomBot, SmartBot, SearchBot, MCTSBot
+from evaluate import WEIGHTS, load_weights
 
 
 class TUIPlayer:
@@ -20,15 +21,26 @@ class TUIPlayer:
     """
 
 
-    def __init__(self, player_type, game, color, bot_delay):
+    def __init__(self, player_type, game, color, bot_delay, search_time=1.0,
+                 workers=1, weights=WEIGHTS, ponder=True):
         """ Constructor
 
         Args:
-            player_type (str): "human", "random-bot", or "smart-bot"
+            player_type (str): "human", "random-bot", "smart-bot",
+             "search-bot" or "mcts-bot"
             game (Checkers): The Checkers game
             color (PieceColor): The player's color
             bot_delay (float): When playing as a bot, an artificial delay
              (in seconds) to wait before making a move.
+            search_time (float): When playing as a search-bot or mcts-bot,
+             the time (in seconds) the bot thinks about each move.
+            workers (int): When playing as a search-bot or mcts-bot, the
+             number of processes the bot thinks on.
+            weights (tuple(int)): When playing as a search-bot, the weights
+             of its evaluation (see evaluate.py).
+            ponder (bool): When playing as a search-bot or mcts-bot, whether
+             the bot thinks in the background while it waits (during its
+             bot delay, and while a human player thinks).
         """
         self.color = color
         if self.color == PieceColor.BLACK:
@@ -41,9 +53,15 @@ class TUIPlayer:
             self.bot = RandomBot(game, self.color)
         if player_type == "smart-bot":
             self.bot = SmartBot(game, self.color)
+        if player_type == "search-bot":
+            self.bot = SearchBot(game, self.color, search_time,
+                                 workers=workers, weights=weights)
+        if player_type == "mcts-bot":
+            self.bot = MCTSBot(game, self.color, search_time, workers)
         self.game = game
         self.next = None
         self.bot_delay = bot_delay
+        self.ponder = ponder and player_type in ("search-bot", "mcts-bot")
 
 
     def piece_to_move(self):
@@ -167,7 +185,7 @@ def print_board(board):
 
         Returns: None
     """
-    grid = board.to_piece_grid()
+    grid = board.snapshot().to_grid()
     nrows = ncols = len(grid)
 
     # Col coordinate labels
@@ -243,6 +261,10 @@ def play_checkers(game, players):
         print_board(game.board)
         print()
 
+        #a bot starts thinking before its bot delay
+        if current.ponder:
+            current.bot.ponder()
+
         #get next move
         next_move = current.get_move()
 
@@ -250,10 +272,19 @@ def play_checkers(game, players):
         current.next.move(next_move)
 
         #update the player
+        previous = current
         if current.color == PieceColor.BLACK:
             current = players[PieceColor.RED]
         elif current.color == PieceColor.RED:
             current = players[PieceColor.BLACK]
+
+        #a bot keeps thinking while a human player thinks
+        if previous.ponder and current.bot is None:
+            previous.bot.ponder()
+
+    for player in players.values():
+        if player.ponder:
+            player.bot.stop_pondering()
     print()
     print_board(game.board)
 
@@ -273,23 +304,32 @@ def play_checkers(game, players):
               type=click.INT,
               default=3)
 @click.option('--black',
-              type=click.Choice(['human', 'random-bot', 'smart-bot'], 
-              case_sensitive=False),
+              type=click.Choice(['human', 'random-bot', 'smart-bot',
+              'search-bot', 'mcts-bot'], case_sensitive=False),
               default="human")
 @click.option('--red',
-              type=click.Choice(['human', 'random-bot', 'smart-bot'], 
-              case_sensitive=False),
+              type=click.Choice(['human', 'random-bot', 'smart-bot',
+              'search-bot', 'mcts-bot'], case_sensitive=False),
               default="human")
 @click.option('--bot-delay', type=click.FLOAT, default=0.5)
-
-def cmd(mode, size, black, red, bot_delay):
+@click.option('--search-time', type=click.FLOAT, default=1.0)
+@click.option('--workers', type=click.INT, default=1)
+@click.option('--weights', type=click.Path(exists=True, dir_okay=False),
+              default=None)
+@click.option('--ponder/--no-ponder', default=True)
+
+def cmd(mode, size, black, red, bot_delay, search_time, workers, weights,
+        ponder):
     if mode == "real":
         game = Checkers(size = size)
     elif mode == "mock":
         game = CheckersMock(size = size)
 
-    player1 = TUIPlayer(black, game, PieceColor.BLACK, bot_delay)
-    player2 = TUIPlayer(red, game, PieceColor.RED, bot_delay)
+    weights = WEIGHTS if weights is None else load_weights(weights)
+    player1 = TUIPlayer(black, game, PieceColor.BLACK, bot_delay, search_time,
+                        workers, weights, ponder)
+    player2 = TUIPlayer(red, game, PieceColor.RED, bot_delay, search_time,
+                        workers, weights, ponder)
     players = {PieceColor.BLACK: player1, PieceColor.RED: player2}
 
     play_checkers(game, players)
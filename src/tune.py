@@ -0,0 +1,278 @@
+"""
+Tuning of the evaluation weights to self-play games (Texel tuning).
+
+The evaluation (evaluate.py) is a weighted sum of features, so it can be
+fitted to the results of games, like a logistic regression: a position's
+score s is taken to predict that the side to move scores
+sigmoid(scale * s) points out of 1 (a win is 1 and a draw 1/2), and the
+weights are moved to make the recorded positions' predictions match their
+games' results (minimizing the log loss) by gradient descent.
+
+The scale turns centi-men into odds. As in Texel tuning, it is fitted first
+for the starting weights and then kept, so the tuned weights stay in
+centi-men.
+
+Records (see records.py, written by "bot.py --record") are streamed from
+their files chunk_size positions at a time, and each chunk is scored with
+NumPy (see batch_eval.py) and split into shuffled mini-batches for the
+gradient steps (with Adam, since the features have very different ranges),
+so files with millions of positions are tuned without loading them whole.
+
+Examples:
+    1) Record 200 games of the search bot against itself, and tune the
+    weights to them::
+        python3 src/bot.py --black search-bot --red search-bot -n 200 \\
+            --search-time 0.05 --record records-8x8.bin
+        python3 src/tune.py records-8x8.bin -o weights.json
+
+    2) Play with the tuned weights::
+        python3 src/bot.py --black search-bot --weights weights.json
+"""
+
+import random
+import time
+
+import click
+import numpy as np
+
+from batch_eval import BatchEvaluator
+from bitboard import BLACK
+from evaluate import FEATURES, WEIGHTS, load_weights, save_weights
+from records import HEADER, mask_bytes, read_header
+
+# int: Default number of positions read from a file and scored at once
+CHUNK_SIZE = 1 << 16
+
+# int: Default number of positions in each gradient step
+BATCH_SIZE = 4096
+
+
+def read_chunks(paths, chunk_size=CHUNK_SIZE):
+    """
+    Reads the records of some record files in chunks
+
+    Args:
+        paths (Sequence[str]): Paths of the files, all for the same board
+        size
+        chunk_size (int): Most records in a chunk
+
+    Yields:
+        The black pieces, red pieces and kings masks (as little-endian
+        bytes, one row per record), the sides to move, and black's points, of
+        each chunk (tuple(np.ndarray, np.ndarray, np.ndarray, np.ndarray,
+        np.ndarray))
+
+    Raises:
+        ValueError: if a file is not a record file, or the files are for
+        different board sizes
+    """
+    dims = None
+    for path in paths:
+        file_dims, count = read_header(path)
+        if dims is not None and file_dims != dims:
+            raise ValueError(f"{path} has records for another board size")
+        dims = file_dims
+        if count == 0:
+            continue
+        n = mask_bytes(dims)
+        dtype = np.dtype([("black", np.uint8, (n,)), ("red", np.uint8, (n,)),
+                          ("kings", np.uint8, (n,)), ("side", np.uint8),
+                          ("points", np.uint8)])
+        records = np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size,
+                            shape=(count,))
+        for start in range(0, count, chunk_size):
+            chunk = np.array(records[start:start + chunk_size])
+            yield (chunk["black"], chunk["red"], chunk["kings"],
+                   chunk["side"], chunk["points"])
+        del records
+
+
+def chunk_data(evaluator, chunk):
+    """
+    Gets the features and results of a chunk of records
+
+    Args:
+        evaluator (BatchEvaluator): evaluator for the board size
+        chunk (tuple): chunk returned by read_chunks()
+
+    Returns:
+        The features of each position for the side to move, one row per
+        position, and the points out of 1 the side to move went on to score
+        (tuple(np.ndarray, np.ndarray))
+    """
+    black, red, kings, sides, points = chunk
+    x = evaluator.features(evaluator.encode_packed(black, red, kings, sides))
+    y = points / 2.0
+    y = np.where(sides == BLACK, y, 1.0 - y)
+    return x.astype(np.float64), y
+
+
+def log_loss(x, y, weights, scale):
+    """
+    Gets the mean log loss of the predictions of some weights
+
+    Args:
+        x (np.ndarray): features, one row per position
+        y (np.ndarray): points out of 1 of each position
+        weights (np.ndarray): weight of each feature
+        scale (float): odds per centi-man
+
+    Returns:
+        The loss (float)
+    """
+    z = scale * (x @ weights)
+    return float(np.mean(np.logaddexp(0.0, z) - y * z))
+
+
+def fit_scale(x, y, weights, steps=60):
+    """
+    Finds the scale that best fits some weights to results, by golden
+    section search on its logarithm
+
+    Args:
+        x (np.ndarray): features, one row per position
+        y (np.ndarray): points out of 1 of each position
+        weights (np.ndarray): weight of each feature
+        steps (int): steps of the search
+
+    Returns:
+        The scale, in odds per centi-man (float)
+    """
+    ratio = (5 ** 0.5 - 1) / 2
+    low, high = -6.0, 0.0
+    for _ in range(steps):
+        a = high - ratio * (high - low)
+        b = low + ratio * (high - low)
+        if log_loss(x, y, weights, 10 ** a) < log_loss(x, y, weights, 10 ** b):
+            high = b
+        else:
+            low = a
+    return 10 ** ((low + high) / 2)
+
+
+def total_loss(paths, weights, scale, chunk_size=CHUNK_SIZE):
+    """
+    Gets the mean log loss of some weights over whole record files
+
+    Args:
+        paths (Sequence[str]): Paths of the record files
+        weights (Sequence[float]): weight of each feature in FEATURES
+        scale (float): odds per centi-man
+        chunk_size (int): Most records read at once
+
+    Returns:
+        The loss and number of positions (tuple(float, int))
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    evaluator = BatchEvaluator(read_header(paths[0])[0])
+    loss = 0.0
+    count = 0
+    for chunk in read_chunks(paths, chunk_size):
+        x, y = chunk_data(evaluator, chunk)
+        loss += log_loss(x, y, weights, scale) * len(y)
+        count += len(y)
+    return (loss / count if count else 0.0), count
+
+
+def tune(paths, weights=WEIGHTS, epochs=10, chunk_size=CHUNK_SIZE,
+         batch_size=BATCH_SIZE, learning_rate=0.5, rng=random,
+         progress=None):
+    """
+    Fits the evaluation weights to the positions of record files
+
+    Args:
+        paths (Sequence[str]): Paths of the record files, all for the same
+        board size
+        weights (tuple(int)): starting weight of each feature in FEATURES
+        epochs (int): passes over the records
+        chunk_size (int): Most records read and scored at once
+        batch_size (int): positions in each gradient step
+        learning_rate (float): size of the steps, in centi-men
+        rng (random.Random): random number generator for the shuffles
+        progress (Optional[Callable[[str], None]]): called with a line of
+        text after each epoch
+
+    Returns:
+        The tuned weights, not rounded, and the scale they were fitted with
+        (tuple(np.ndarray, float))
+
+    Raises:
+        ValueError: if there are no records
+    """
+    dims = read_header(paths[0])[0]
+    evaluator = BatchEvaluator(dims)
+    w = np.array(weights, dtype=np.float64)
+
+    # The scale is fitted to the starting weights on the first chunk
+    first = next(read_chunks(paths, chunk_size), None)
+    if first is None:
+        raise ValueError("there are no records to tune with")
+    scale = fit_scale(*chunk_data(evaluator, first), w)
+
+    # Adam's running averages of the gradient and its square
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    t = 0
+    shuffle = np.random.default_rng(rng.getrandbits(32))
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        loss = 0.0
+        count = 0
+        for chunk in read_chunks(paths, chunk_size):
+            x, y = chunk_data(evaluator, chunk)
+            order = shuffle.permutation(len(y))
+            for i in range(0, len(y), batch_size):
+                batch = order[i:i + batch_size]
+                xb = x[batch]
+                z = scale * (xb @ w)
+                p = 1.0 / (1.0 + np.exp(-z))
+                loss += float(np.sum(np.logaddexp(0.0, z) - y[batch] * z))
+                count += len(batch)
+
+                gradient = scale * (xb.T @ (p - y[batch])) / len(batch)
+                t += 1
+                m = beta1 * m + (1 - beta1) * gradient
+                v = beta2 * v + (1 - beta2) * gradient ** 2
+                m_hat = m / (1 - beta1 ** t)
+                v_hat = v / (1 - beta2 ** t)
+                w -= learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
+        if progress is not None:
+            progress(f"Epoch {epoch}: loss {loss / count:.5f} over {count} "
+                     f"positions, in {time.perf_counter() - start:.1f}s")
+    return w, scale
+
+
+@click.command(name="checkers-tune")
+@click.argument('records', nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False))
+@click.option('--weights', type=click.Path(exists=True, dir_okay=False),
+              default=None)
+@click.option('--epochs', type=click.INT, default=10)
+@click.option('--chunk-size', type=click.INT, default=CHUNK_SIZE)
+@click.option('--batch-size', type=click.INT, default=BATCH_SIZE)
+@click.option('--learning-rate', type=click.FLOAT, default=0.5)
+@click.option('--seed', type=click.INT, default=None)
+@click.option('-o', '--output', type=click.Path(), required=True)
+def cmd(records, weights, epochs, chunk_size, batch_size, learning_rate, seed,
+        output):
+    """
+    Tunes the evaluation weights to recorded self-play positions
+    """
+    start = WEIGHTS if weights is None else load_weights(weights)
+    tuned, scale = tune(records, start, epochs, chunk_size, batch_size,
+                        learning_rate, random.Random(seed), print)
+    tuned = tuple(int(round(w)) for w in tuned)
+    save_weights(output, tuned)
+
+    before, count = total_loss(records, start, scale, chunk_size)
+    after, _ = total_loss(records, tuned, scale, chunk_size)
+    print(f"{count} positions, scale {scale:.5f} per centi-man")
+    print(f"{'Feature':<12}{'Before':>8}{'After':>8}")
+    for name, old, new in zip(FEATURES, start, tuned):
+        print(f"{name:<12}{old:>8}{new:>8}")
+    print(f"{'Log loss':<12}{before:>8.4f}{after:>8.4f}")
+
+
+if __name__ == "__main__":
+    cmd()